@@ -1,16 +1,79 @@
 """Abstract Base Class for all robot arms.
+
+AbstractArm implements the motion of every arm (solving targets, planning the
+trajectories of joint, linear, queued and jog moves and checking them for
+collisions); an arm only constructs its chain, solver, executor and motion
+settings and writes the setpoints to its joints.
 """
+import math
 from abc import ABC,abstractmethod
+import numpy as np
+
+from arm_controller import instrumentation
+from arm_controller.motion.profiled_trajectory import plan_trajectory
+from arm_controller.motion.waypoint_trajectory import plan_waypoint_trajectory
+from arm_controller.motion.blended_trajectory import BlendedTrajectory
 
 class AbstractArm(ABC):
 
     @abstractmethod
     def __init__(self):
         """Constructs Robot class.
+
+        An arm sets chain (PyChain), _solver (AbstractSolver), executor (TrajectoryExecutor),
+        _servo_speed, _servo_acceleration, motion_profile, warm_start, workspace, collision,
+        _queue and blend_radius, which the methods below move it with.
+        """
+
+    def get_pos(self):
+        """Calculates and returns current position of the arm.
+
+        Calculates based on current positions of arm servo's, the
+        current position of the claw, returning as (x, y, z).
+
+        Returns:
+            current_xyz (list[float]): a list containing the (x, y, z) position of the claw.
+            current_rpy (list[float]): a list containing the (r, p, y) of the claw.
+        """
+        current_angles = self.chain.current_values()
+        with instrumentation.span('solver.forward_solve'):
+            current_xyz, current_rpy = self._solver.forward_solve(current_angles)
+        return current_xyz, current_rpy
+
+    def set_speed(self, ss, radians=False):
+        """Set's the speed at which the servo's move.
+
+        Set's the arm rate of speed at which the servo's move into position.
+
+        Args:
+            ss (float): Rate of speed on a 1-10 scale: 1 being slowest, 10 being fastest.
+            radians (bool): Whether the servo speed is given in radians or degrees per second.
+
+        Returns:
+            ss (float): Returns the new servo speed.
+        """
+        if ss >= 1.0 and not radians:
+            self._servo_speed = math.radians(ss)
+        elif ss >= 0.016 and radians:
+            self._servo_speed = ss
+        return self._servo_speed
+
+    def set_acceleration(self, acceleration, radians=False):
+        """Set's the acceleration at which the servo's speed up and slow down.
+
+        Args:
+            acceleration (float): acceleration in deg/s^2 (or rad/s^2).
+            radians (bool): Whether the acceleration is given in radians or degrees per second squared.
+
+        Returns:
+            acceleration (float): Returns the new servo acceleration (in rad/s^2).
         """
+        if acceleration > 0.0:
+            self._servo_acceleration = acceleration if radians else math.radians(acceleration)
+        return self._servo_acceleration
 
-    # abstract method
-    def move_to(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0):
+    @instrumentation.timed('arm.move_to')
+    def move_to(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
         """Moves the arm to the specified position.
 
         Calculates and moves the arm so the claw is centered at the
@@ -23,31 +86,399 @@ class AbstractArm(ABC):
             roll (float): Final roll angle of the wrist (default to 0).
             pitch (float): Final pitch angle of the wrist (default to 0).
             yaw (float): Final yaw angle of the wrist (default to 0).
+            radians (bool): whether the values given is in radians or degrees.
+
+        Return:
+            angles (list): list of the angles the arm is being set to (in radians).
+
+        Raises:
+            ValueError: if a workspace index is set and the target is outside of it, or if a collision
+                checker is set and the move collides.
+        """
+        if not radians:
+            roll = math.radians(roll)
+            pitch = math.radians(pitch)
+            yaw = math.radians(yaw)
+
+        targets, angles = self._solve_target([x_pos, y_pos, z_pos], [roll, pitch, yaw])
+        self.set_joints(targets, radians=True)
+
+        return angles
+
+    @instrumentation.timed('arm.move_linear')
+    def move_linear(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, step=0.001, speed=None, radians=False):
+        """Moves the claw in a straight line to the specified position.
+
+        Samples the line from the current position every step meters, solves
+        all waypoints in one warm-started batch before moving, and then streams
+        the joint setpoints along the line to the executor.
+
+        Args:
+            x_pos (float): Final X position of the claw.
+            y_pos (float): Final Y position of the claw.
+            z_pos (float): Final Z position of the claw.
+            roll (float): Final roll angle of the wrist (default to 0).
+            pitch (float): Final pitch angle of the wrist (default to 0).
+            yaw (float): Final yaw angle of the wrist (default to 0).
+            step (float): spacing of the waypoints along the line in meters.
+            speed (float): optional limit on the speed of the claw in meters per second.
+            radians (bool): whether the values given is in radians or degrees.
+
+        Return:
+            angles (ndarray): array of shape (N, J) of the angles of every waypoint (in radians).
+
+        Raises:
+            ValueError: if part of the line is outside the workspace, cannot be solved or collides.
         """
-        pass
+        if not radians:
+            roll = math.radians(roll)
+            pitch = math.radians(pitch)
+            yaw = math.radians(yaw)
 
-    # abstract method
-    def get_pos(self):
-        """Calculates and returns current position of the arm.
+        joints, trajectory, angles = self._plan_linear([x_pos, y_pos, z_pos], [roll, pitch, yaw], step, speed)
+        self.executor.run(trajectory, lambda setpoint: self._write_joints(joints, setpoint))
 
-        Calculates based on current positions of arm servo's, the
-        current position of the claw, returning as (x, y, z).
+        return angles
+
+    @instrumentation.timed('arm.jog')
+    def jog(self, dx, dy, dz, droll=0, dpitch=0, dyaw=0, radians=False):
+        """Moves the claw by a small correction within one control tick.
+
+        Meant to be called once per tick of an outside control loop (e.g. visual
+        servoing): the correction is turned into joint deltas with one damped
+        least squares step through the solver's Jacobian instead of a full inverse
+        solve, scaled down so no joint moves faster than its velocity limit over one
+        executor period, and written right away. The orientation of the claw is
+        only corrected when a rotation is given.
+
+        Args:
+            dx (float): displacement of the claw along the base X axis in meters.
+            dy (float): displacement of the claw along the base Y axis in meters.
+            dz (float): displacement of the claw along the base Z axis in meters.
+            droll (float): rotation of the claw about the base X axis (default to 0).
+            dpitch (float): rotation of the claw about the base Y axis (default to 0).
+            dyaw (float): rotation of the claw about the base Z axis (default to 0).
+            radians (bool): whether the rotation given is in radians or degrees.
 
         Return:
-            A list containing the (x, y, z) position of the claw.
+            angles (ndarray): the angles of every joint after the step (in radians).
+
+        Raises:
+            ValueError: if a collision checker is set and the new setpoint collides.
         """
-        pass
+        if not radians:
+            droll = math.radians(droll)
+            dpitch = math.radians(dpitch)
+            dyaw = math.radians(dyaw)
 
-    # abstract method
-    def set_speed(self, ss):
-        """Set's the speed at which the servo's move.
+        joints, values = self._plan_jog([dx, dy, dz], [droll, dpitch, dyaw])
+        self._write_joints(joints, values)
+        return self.chain.joints.current.copy()
 
-        Set's the arm rate of speed at which the servo's move into position.
+    def queue_move(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
+        """Adds a target to the motion queue without moving the arm.
+
+        The target is solved right away (starting from the previous queued
+        target), so unreachable targets are reported before anything moves.
 
         Args:
-            ss (float): Rate of speed on a 1-10 scale: 1 being slowest, 10 being fastest.
+            x_pos (float): X position of the claw.
+            y_pos (float): Y position of the claw.
+            z_pos (float): Z position of the claw.
+            roll (float): roll angle of the wrist (default to 0).
+            pitch (float): pitch angle of the wrist (default to 0).
+            yaw (float): yaw angle of the wrist (default to 0).
+            radians (bool): whether the values given is in radians or degrees.
+
+        Return:
+            angles (list): list of the angles of the queued target (in radians).
+
+        Raises:
+            ValueError: if a workspace index is set and the target is outside of it.
+        """
+        if not radians:
+            roll = math.radians(roll)
+            pitch = math.radians(pitch)
+            yaw = math.radians(yaw)
+
+        reference = self._queue[-1][1] if self._queue else None
+        targets, angles = self._solve_target([x_pos, y_pos, z_pos], [roll, pitch, yaw], reference=reference)
+        self._queue.append((targets, angles))
+        return angles
+
+    @instrumentation.timed('arm.flush_queue')
+    def flush_queue(self):
+        """Moves through every queued target, then empties the queue.
+
+        The arm only stops at the last target: the corner at every other target
+        is rounded, starting roughly blend_radius meters before it, so the arm
+        passes close to the intermediate targets at speed instead of stopping on them.
+
+        Return:
+            angles (list): list of the angles of every target that was queued (in radians).
+
+        Raises:
+            ValueError: if a collision checker is set and the blended move collides (the queue is emptied).
+        """
+        queue = self._queue
+        self._queue = []
+        joints, trajectory = self._plan_queue(queue)
+        if joints:
+            self.executor.run(trajectory, lambda setpoint: self._write_joints(joints, setpoint))
+        return [angles for _, angles in queue]
+
+    def clear_queue(self):
+        """Removes every target from the motion queue without moving the arm.
+        """
+        self._queue = []
+
+    def set_joint(self, joint, value, radians=False):
+        """Moves the specified segment to the given value.
+
+        Arguments:
+            joint (str): joint to move.
+            value (float): value to apply to joint.
+            radians (bool): whether the value given is in radians or degrees.
+        """
+        self.set_joints({joint: value}, radians=radians)
+
+    @instrumentation.timed('arm.set_joints')
+    def set_joints(self, values, radians=False):
+        """Moves several joints to their given values at the same time.
+
+        Every joint follows a shared time scaling so they all arrive together, in
+        the minimum time allowed by the servo speed and acceleration and each joint's
+        URDF velocity limit. Setpoints are written by the arm's executor at its control rate.
+
+        Arguments:
+            values (dict): mapping from joint names to the value to apply to each joint (None values are skipped).
+            radians (bool): whether the values given are in radians or degrees.
+        """
+        joints, trajectory = self._plan_joints(values, radians)
+        if joints:
+            self.executor.run(trajectory, lambda setpoint: self._write_joints(joints, setpoint))
+
+    def _default_moves(self):
+        """Returns the moves (values, radians) that bring the arm to its default position.
+
+        The elbow and shoulder are moved first, then every joint is set to its default value.
+        """
+        defaults = {}
+        for joint in self.chain.joints:
+            defaults[joint] = self.chain.joints[joint]['default_value']
+        return [({'elbow': 0}, False), ({'shoulder': 150}, False), (defaults, True)]
+
+    def _solve_target(self, target, rpy, reference=None):
+        """Solves the joint values that put the claw at the target.
+
+        Arguments:
+            target (list[float]): target XYZ position of the claw.
+            rpy (list[float]): target roll, pitch and yaw of the claw (in radians).
+            reference (list[float]): angles to start the solver from instead of the current ones.
 
         Returns:
-            ss (float): Returns the new servo speed.
+            targets (dict): mapping from joint names to their target value (in radians).
+            angles (list): the angles returned by the solver (in radians).
+        """
+        target = list(target)
+        if self.workspace is not None and not self.workspace.is_reachable(target):
+            raise ValueError(f'target {target} is outside the reachable workspace')
+
+        initial_angles = reference
+        if initial_angles is None and self.warm_start:
+            initial_angles = self.chain.get_current_values()
+        if self.workspace is not None:
+            initial_angles = self.workspace.nearest_seed(target, reference=initial_angles)
+        with instrumentation.span('solver.inverse_solve'):
+            angles = self._solver.inverse_solve(target, rpy, initial_angles=initial_angles)
+
+        # joints without a default value (the claw) are not positioned by the solver
+        targets = {}
+        for joint, angle in zip(self.chain.joints, angles):
+            if self.chain.joints[joint]['default_value'] is not None:
+                targets[joint] = angle
+        return targets, angles
+
+    def _plan_linear(self, target, rpy, step, speed):
+        """Solves the waypoints of a straight line to the target and plans their timing.
+
+        Arguments:
+            target (list[float]): final XYZ position of the claw.
+            rpy (list[float]): roll, pitch and yaw of the claw along the line (in radians).
+            step (float): spacing of the waypoints along the line in meters.
+            speed (float): optional limit on the speed of the claw in meters per second.
+
+        Returns:
+            joints (list[str]): names of the joints the trajectory moves.
+            trajectory (WaypointTrajectory): the planned trajectory.
+            angles (ndarray): array of shape (N, J) of the angles of every waypoint (in radians).
+        """
+        current = self.chain.get_current_values()
+        with instrumentation.span('solver.forward_solve'):
+            start = self._solver.forward_solve(current)[0]
+        target = np.asarray(target, dtype=float)
+        count = max(int(math.ceil(np.linalg.norm(target - start) / step)), 1) + 1
+        path = np.linspace(start, target, count)
+        if self.workspace is not None:
+            for point in path:
+                if not self.workspace.is_reachable(point):
+                    raise ValueError(f'line to {target.tolist()} leaves the reachable workspace at {point.tolist()}')
+
+        with instrumentation.span('solver.inverse_solve_batch'):
+            angles = self._solver.inverse_solve_batch(path, rpy, initial_angles=current)
+        with instrumentation.span('solver.forward_solve_batch'):
+            reached, _ = self._solver.forward_solve_batch(angles)
+        error = np.linalg.norm(reached - path, axis=1)
+        if np.max(error) > step:
+            raise ValueError(f'line to {target.tolist()} cannot be followed, '
+                             f'off by {np.max(error):.4f} m at {path[np.argmax(error)].tolist()}')
+
+        # joints without a default value (the claw) are not positioned by the solver
+        joints = []
+        columns = []
+        for i, joint in enumerate(self.chain.joints):
+            if self.chain.joints[joint]['default_value'] is not None:
+                joints.append(joint)
+                columns.append(i)
+        waypoints = angles[:, columns]
+        waypoints[0] = [self.chain.joints[joint]['current_value'] for joint in joints]
+
+        max_rate = speed / (np.linalg.norm(target - start) / (count - 1)) if speed and count > 1 else None
+        with instrumentation.span('arm.plan'):
+            trajectory = plan_waypoint_trajectory(waypoints, self._velocity_limits(joints), self._servo_acceleration,
+                                                  self.motion_profile, max_rate=max_rate)
+        self._check_collisions(joints, trajectory)
+        return joints, trajectory, angles
+
+    def _plan_queue(self, queue):
+        """Plans one blended move through the queued targets.
+
+        Arguments:
+            queue (list): (targets, angles) of every queued target, as returned by _solve_target.
+
+        Returns:
+            joints (list[str]): names of the joints the trajectory moves (empty if there is nothing to move).
+            trajectory (BlendedTrajectory): the planned trajectory (None if there is nothing to move).
+        """
+        if not queue:
+            return [], None
+        joints = list(queue[0][0])
+        points = [[self.chain.joints[joint]['current_value'] for joint in joints]]
+        points += [[targets[joint] for joint in joints] for targets, _ in queue]
+
+        # the blend radius is converted to a fraction of the shorter neighbouring segment
+        with instrumentation.span('solver.forward_solve'):
+            xyz = [self.get_pos()[0]] + [self._solver.forward_solve(angles)[0] for _, angles in queue]
+        lengths = np.linalg.norm(np.diff(np.asarray(xyz, dtype=float), axis=0), axis=1)
+        shorter = np.minimum(lengths[:-1], lengths[1:])
+        fractions = np.where(shorter > 0.0, 2.0 * self.blend_radius / np.where(shorter > 0.0, shorter, 1.0), 1.0)
+
+        with instrumentation.span('arm.plan'):
+            trajectory = BlendedTrajectory(points, self._velocity_limits(joints), self._servo_acceleration,
+                                           np.minimum(fractions, 1.0))
+        self._check_collisions(joints, trajectory)
+        return joints, trajectory
+
+    def _plan_joints(self, values, radians):
+        """Plans a synchronized move of several joints.
+
+        Arguments:
+            values (dict): mapping from joint names to the value to apply to each joint (None values are skipped).
+            radians (bool): whether the values given are in radians or degrees.
+
+        Returns:
+            joints (list[str]): names of the joints the trajectory moves (empty if there is nothing to move).
+            trajectory (AbstractTrajectory): the planned trajectory (None if there is nothing to move).
+        """
+        joints = []
+        targets = []
+        for joint in values:
+            if values[joint] is not None:
+                joints.append(joint)
+                targets.append(values[joint] if radians else math.radians(values[joint]))
+        if not joints:
+            return joints, None
+
+        start = [self.chain.joints[joint]['current_value'] for joint in joints]
+        with instrumentation.span('arm.plan'):
+            trajectory = plan_trajectory(start, targets, self._velocity_limits(joints), self._servo_acceleration,
+                                         self.motion_profile)
+        self._check_collisions(joints, trajectory)
+        return joints, trajectory
+
+    def _plan_jog(self, delta, rotation):
+        """Solves one differential step of the claw and limits it to one control tick.
+
+        Arguments:
+            delta (list[float]): displacement of the claw in the base frame (in meters).
+            rotation (list[float]): rotation vector of the claw in the base frame (in radians).
+
+        Returns:
+            joints (list[str]): names of the joints the step moves.
+            values (ndarray): value of each joint after the step (in radians).
+        """
+        current = self.chain.joints.current
+        delta_rpy = rotation if any(rotation) else None
+        with instrumentation.span('solver.differential_solve'):
+            angles = self._solver.differential_solve(current, delta, delta_rpy)
+
+        # joints without a default value (the claw) are not positioned by the solver
+        joints = [joint for joint in self.chain.joints if self.chain.joints[joint]['default_value'] is not None]
+        index = self.chain.joints.select(joints)
+        step = angles[index] - current[index]
+        ratio = np.max(np.abs(step) * self.executor.rate / np.asarray(self._velocity_limits(joints)))
+        if ratio > 1.0:
+            step /= ratio
+        values = np.clip(current[index] + step, self.chain.joints.lower[index], self.chain.joints.upper[index])
+
+        if self.collision is not None:
+            angles = current.copy()
+            angles[index] = values
+            with instrumentation.span('collision.check'):
+                pairs = self.collision.collisions(angles)
+            if pairs:
+                contacts = ', '.join(f'{first} with {second}' for first, second in pairs)
+                raise ValueError(f'jog collides in: {contacts}')
+        return joints, values
+
+    def _check_collisions(self, joints, trajectory):
+        """Checks the setpoints a planned trajectory would write against the collision checker.
+
+        Arguments:
+            joints (list[str]): names of the joints the trajectory moves.
+            trajectory (AbstractTrajectory): the planned trajectory.
+
+        Raises:
+            ValueError: if a collision checker is set and the trajectory collides.
+        """
+        if self.collision is None:
+            return
+        with instrumentation.span('collision.check'):
+            when, pairs = self.collision.check_trajectory(trajectory, joints, rate=self.executor.rate)
+        if when is not None:
+            contacts = ', '.join(f'{first} with {second}' for first, second in pairs)
+            raise ValueError(f'planned move collides {when:.2f} s in: {contacts}')
+
+    def _velocity_limits(self, joints):
+        """Returns the velocity limit of each joint: the servo speed or its URDF limit, whichever is lower.
+
+        Arguments:
+            joints (list[str]): joint names.
+        """
+        limits = dict(zip(self.chain.joints, self.chain.get_velocity_limits()))
+        velocity = []
+        for joint in joints:
+            if limits[joint] is None:
+                velocity.append(self._servo_speed)
+            else:
+                velocity.append(min(self._servo_speed, limits[joint]))
+        return velocity
+
+    @abstractmethod
+    def _write_joints(self, joints, values):
+        """Writes one setpoint to the arm's joints and records it in the chain.
+
+        Arguments:
+            joints (list[str]): joint names.
+            values (list[float]): value of each joint (in radians).
         """
-        pass
@@ -0,0 +1,267 @@
+"""Asyncio interface to a robot arm.
+
+Wraps a MechatronicsArm or PlotterArm so moves run as coroutines on an event
+loop instead of blocking the calling thread. Inverse kinematics and trajectory
+planning run in the loop's default thread pool and setpoints are written between awaits, so
+other tasks (reading sensors, accepting commands) keep running while the arm
+travels. Moves are executed one at a time in the order they were requested.
+
+    Typical usage example:
+    arm = AsyncArm(MechatronicsArm())
+    await arm.move_to(0.04, 0.06, 0.09)
+    move = arm.move_to_nowait(-0.04, 0.06, 0.09)
+    arm.cancel() # stops before the next setpoint
+"""
+import math
+import asyncio
+import contextvars
+
+from arm_controller import instrumentation
+
+
+class AsyncArm:
+
+    def __init__(self, arm):
+        """Constructs AsyncArm class.
+
+        Args:
+            arm (AbstractArm): the arm to control (MechatronicsArm or PlotterArm).
+        """
+        self.arm = arm
+        self.chain = arm.chain
+        self.executor = arm.executor
+        self._lock = None
+        self._tasks = set()
+
+    @property
+    def moving(self):
+        """Whether a move is in progress or a move started with one of the *_nowait methods is still pending.
+        """
+        if self._lock is not None and self._lock.locked():
+            return True
+        return any(not task.done() for task in self._tasks)
+
+    def get_pos(self):
+        """Calculates and returns current position of the arm.
+
+        Returns:
+            current_xyz (list[float]): a list containing the (x, y, z) position of the claw.
+            current_rpy (list[float]): a list containing the (r, p, y) of the claw.
+        """
+        return self.arm.get_pos()
+
+    def set_speed(self, ss, radians=False):
+        """Set's the speed at which the servo's move (see the wrapped arm's set_speed).
+        """
+        return self.arm.set_speed(ss, radians=radians)
+
+    def set_acceleration(self, acceleration, radians=False):
+        """Set's the acceleration of the servo's (see the wrapped arm's set_acceleration).
+        """
+        return self.arm.set_acceleration(acceleration, radians=radians)
+
+    async def move_to(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
+        """Moves the arm to the specified position.
+
+        Args:
+            x_pos (float): Final X position of the claw.
+            y_pos (float): Final Y position of the claw.
+            z_pos (float): Final Z position of the claw.
+            roll (float): Final roll angle of the wrist (default to 0).
+            pitch (float): Final pitch angle of the wrist (default to 0).
+            yaw (float): Final yaw angle of the wrist (default to 0).
+            radians (bool): whether the values given is in radians or degrees.
+
+        Return:
+            angles (list): list of the angles the arm is being set to (in radians).
+
+        Raises:
+            ValueError: if a workspace index is set and the target is outside of it.
+        """
+        rpy = [roll, pitch, yaw] if radians else [math.radians(roll), math.radians(pitch), math.radians(yaw)]
+        async with self._move_lock():
+            with instrumentation.span('arm.move_to'):
+                plan, angles = await self._in_thread(self._plan_move, [x_pos, y_pos, z_pos], rpy)
+                await self._run(*plan)
+        return angles
+
+    async def move_linear(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, step=0.001, speed=None, radians=False):
+        """Moves the claw in a straight line to the specified position.
+
+        Args:
+            x_pos (float): Final X position of the claw.
+            y_pos (float): Final Y position of the claw.
+            z_pos (float): Final Z position of the claw.
+            roll (float): Final roll angle of the wrist (default to 0).
+            pitch (float): Final pitch angle of the wrist (default to 0).
+            yaw (float): Final yaw angle of the wrist (default to 0).
+            step (float): spacing of the waypoints along the line in meters.
+            speed (float): optional limit on the speed of the claw in meters per second.
+            radians (bool): whether the values given is in radians or degrees.
+
+        Return:
+            angles (ndarray): array of shape (N, J) of the angles of every waypoint (in radians).
+
+        Raises:
+            ValueError: if part of the line is outside the workspace or cannot be solved.
+        """
+        rpy = [roll, pitch, yaw] if radians else [math.radians(roll), math.radians(pitch), math.radians(yaw)]
+        async with self._move_lock():
+            with instrumentation.span('arm.move_linear'):
+                joints, trajectory, angles = await self._in_thread(
+                    self.arm._plan_linear, [x_pos, y_pos, z_pos], rpy, step, speed)
+                await self._run(joints, trajectory)
+        return angles
+
+    def jog(self, dx, dy, dz, droll=0, dpitch=0, dyaw=0, radians=False):
+        """Moves the claw by a small correction within one control tick (see the wrapped arm's jog).
+
+        The setpoint is written right away, so it cannot be mixed with a pending move.
+
+        Raises:
+            RuntimeError: if a move is in progress or still pending.
+        """
+        if self.moving:
+            raise RuntimeError('cannot jog while a move is pending, cancel or wait for it first')
+        return self.arm.jog(dx, dy, dz, droll=droll, dpitch=dpitch, dyaw=dyaw, radians=radians)
+
+    def queue_move(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
+        """Adds a target to the motion queue without moving the arm (see the wrapped arm's queue_move).
+        """
+        return self.arm.queue_move(x_pos, y_pos, z_pos, roll=roll, pitch=pitch, yaw=yaw, radians=radians)
+
+    async def flush_queue(self):
+        """Moves through every queued target without stopping at the intermediate ones, then empties the queue.
+
+        Return:
+            angles (list): list of the angles of every target that was queued (in radians).
+        """
+        async with self._move_lock():
+            queue = self.arm._queue
+            self.arm._queue = []
+            with instrumentation.span('arm.flush_queue'):
+                await self._run(*await self._in_thread(self.arm._plan_queue, queue))
+        return [angles for _, angles in queue]
+
+    def flush_queue_nowait(self):
+        """Starts flush_queue as a task and returns it without waiting for the move.
+
+        Returns:
+            task (asyncio.Task): resolves to the angles returned by flush_queue.
+        """
+        return self._start(self.flush_queue())
+
+    async def set_joints(self, values, radians=False):
+        """Moves several joints to their given values at the same time.
+
+        Arguments:
+            values (dict): mapping from joint names to the value to apply to each joint (None values are skipped).
+            radians (bool): whether the values given are in radians or degrees.
+        """
+        async with self._move_lock():
+            await self._set_joints(values, radians)
+
+    async def set_joint(self, joint, value, radians=False):
+        """Moves the specified joint to the given value.
+
+        Arguments:
+            joint (str): joint to move.
+            value (float): value to apply to joint.
+            radians (bool): whether the value given is in radians or degrees.
+        """
+        await self.set_joints({joint: value}, radians=radians)
+
+    async def set_default_position(self):
+        """Loads the default position for the robot arm.
+
+        The whole sequence holds the move lock, so no other move can run between its steps.
+        """
+        async with self._move_lock():
+            for values, radians in self.arm._default_moves():
+                await self._set_joints(values, radians)
+            if hasattr(self.arm, 'open_claw'):
+                self.arm.open_claw()
+
+    def move_to_nowait(self, *args, **kwargs):
+        """Starts move_to as a task and returns it without waiting for the move.
+
+        Returns:
+            task (asyncio.Task): resolves to the angles returned by move_to.
+        """
+        return self._start(self.move_to(*args, **kwargs))
+
+    def move_linear_nowait(self, *args, **kwargs):
+        """Starts move_linear as a task and returns it without waiting for the move.
+
+        Returns:
+            task (asyncio.Task): resolves to the angles returned by move_linear.
+        """
+        return self._start(self.move_linear(*args, **kwargs))
+
+    def set_joints_nowait(self, values, radians=False):
+        """Starts set_joints as a task and returns it without waiting for the move.
+
+        Returns:
+            task (asyncio.Task): resolves to None once the joints arrive.
+        """
+        return self._start(self.set_joints(values, radians=radians))
+
+    def cancel(self):
+        """Cancels every pending move started with one of the *_nowait methods.
+
+        The arm stops before its next setpoint and the chain keeps the last
+        values that were actually written to the joints.
+
+        Returns:
+            cancelled (int): the number of moves cancelled.
+        """
+        cancelled = 0
+        for task in list(self._tasks):
+            if task.cancel():
+                cancelled += 1
+        return cancelled
+
+    async def wait(self):
+        """Waits until every pending move started with one of the *_nowait methods is finished.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _start(self, coroutine):
+        """Schedules a move on the running event loop and keeps track of it.
+        """
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _move_lock(self):
+        """Returns the lock serializing moves, created on first use inside the event loop.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _plan_move(self, target, rpy):
+        """Solves a target and plans the move to it, run in the thread pool by move_to.
+        """
+        targets, angles = self.arm._solve_target(target, rpy)
+        return self.arm._plan_joints(targets, True), angles
+
+    async def _set_joints(self, values, radians):
+        """Plans and runs a synchronized move of several joints, the caller holds the move lock.
+        """
+        with instrumentation.span('arm.set_joints'):
+            await self._run(*await self._in_thread(self.arm._plan_joints, values, radians))
+
+    async def _in_thread(self, function, *args):
+        """Runs a blocking function in the loop's default thread pool, inside the caller's open span.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run, function, *args)
+
+    async def _run(self, joints, trajectory):
+        """Streams a planned trajectory to the arm's joints.
+        """
+        if joints:
+            await self.executor.run_async(trajectory, lambda setpoint: self.arm._write_joints(joints, setpoint))
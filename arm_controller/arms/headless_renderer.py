@@ -0,0 +1,164 @@
+"""Offscreen rendering of arm motion to image sequences and video files.
+
+Frames are drawn with the Agg backend (no window or display needed) in the same
+style as the PlotterArm animation. The frames are split into contiguous chunks
+rendered by parallel worker processes. Every worker draws the axes once, then
+for each frame restores that background and draws only the arm's line (the
+axes never change), so long recordings render much faster than real time.
+
+    Typical usage example:
+    paths = render_frames(solver, angles, 'frames/')     # angles: array of shape (N, J)
+    render_video(solver, angles, 'shift.mp4', fps=30)
+"""
+import os
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from mpl_toolkits.mplot3d import Axes3D
+
+FRAME_PATTERN = 'frame_{:06d}.png'
+
+# solver of a worker process, handed over once when the worker starts rather than with every chunk
+_worker_solver = None
+
+
+def resample(times, angles, fps):
+    """Picks the joint values to show in every frame of a recording.
+
+    Args:
+        times (list[float]): time of every recorded setpoint in seconds (increasing).
+        angles (ndarray): array of shape (N, J) of the recorded joint values.
+        fps (float): frames per second of the output.
+
+    Returns:
+        frames (ndarray): array of shape (F, J), the last setpoint at or before each frame time.
+    """
+    times = np.asarray(times, dtype=float)
+    angles = np.atleast_2d(np.asarray(angles, dtype=float))
+    if len(times) == 0:
+        return angles[:0]
+    frame_times = times[0] + np.arange(int((times[-1] - times[0]) * fps) + 1) / fps
+    index = np.searchsorted(times, frame_times + 1e-9, side='right') - 1
+    return angles[np.clip(index, 0, len(angles) - 1)]
+
+
+def _init_worker(solver):
+    """Stores the solver in a newly started worker process.
+    """
+    global _worker_solver
+    _worker_solver = solver
+
+
+def _render_chunk(solver, angles, paths, dpi, size):
+    """Renders the frames of one chunk (in a worker process the solver is None and the worker's is used).
+    """
+    if solver is None:
+        solver = _worker_solver
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_xlabel('X Position')
+    ax.set_xlim(left=-0.20, right=0.20)
+    ax.set_ylabel('Y Position')
+    ax.set_ylim(bottom=-0.20, top=0.20)
+    ax.set_zlabel('Z Position')
+    ax.set_zlim(bottom=-0.05, top=0.2)
+    ax.set_title('3D Plot of Robot Arm')
+    line, = ax.plot([], [], [], c="black", lw=2, animated=True)
+    canvas = fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    previous = None
+    for angle, path in zip(angles, paths):
+        if previous is None or not np.array_equal(angle, previous, equal_nan=True):
+            coords = np.asarray(solver.segmented_forward_solve(angle))
+            line.set_data(coords[:, 0], coords[:, 1])
+            line.set_3d_properties(coords[:, 2])
+            canvas.restore_region(background)
+            ax.draw_artist(line)
+            image = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            previous = angle
+        # frames are short-lived intermediates, fast compression matters more than size
+        image.save(path, compress_level=1)
+    return len(paths)
+
+
+def render_frames(solver, angles, directory, workers=None, dpi=100, size=(6.4, 4.8)):
+    """Renders one PNG image per set of joint values.
+
+    Args:
+        solver (AbstractSolver): solver used to find the position of every joint.
+        angles (ndarray): array of shape (N, J), the joint values of every frame.
+        directory (str): directory the frames are written to (created if missing).
+        workers (int): number of worker processes (defaults to the number of CPUs, 1 renders in this process).
+        dpi (int): resolution of the images.
+        size (tuple): width and height of the images in inches.
+
+    Returns:
+        paths (list[str]): path of every frame, in order (named frame_000000.png, ...).
+    """
+    angles = np.atleast_2d(np.asarray(angles, dtype=float))
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.join(directory, FRAME_PATTERN.format(i)) for i in range(len(angles))]
+    workers = min(workers or os.cpu_count() or 1, len(angles))
+    if workers <= 1:
+        _render_chunk(solver, angles, paths, dpi, size)
+        return paths
+
+    chunks = np.array_split(np.arange(len(angles)), workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(solver,)) as pool:
+        rendered = [pool.submit(_render_chunk, None, angles[chunk], paths[chunk[0]:chunk[-1] + 1], dpi, size)
+                    for chunk in chunks]
+        for future in rendered:
+            future.result()
+    return paths
+
+
+def _open_frames(paths):
+    """Yields the frames one at a time, closing each file before the next one is opened.
+    """
+    for path in paths:
+        with Image.open(path) as image:
+            yield image
+
+
+def render_video(solver, angles, path, fps=30, workers=None, dpi=100, size=(6.4, 4.8)):
+    """Renders the joint values to a video (with ffmpeg) or an animated GIF (with Pillow).
+
+    Args:
+        solver (AbstractSolver): solver used to find the position of every joint.
+        angles (ndarray): array of shape (N, J), the joint values of every frame.
+        path (str): output file; a .gif is written with Pillow, anything else is encoded by ffmpeg.
+        fps (float): frames per second of the video.
+        workers (int): number of worker processes rendering frames.
+        dpi (int): resolution of the frames.
+        size (tuple): width and height of the frames in inches.
+
+    Returns:
+        path (str): the output file.
+
+    Raises:
+        RuntimeError: if a video format is requested and ffmpeg is not installed.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    gif = path.lower().endswith('.gif')
+    if not gif and ffmpeg is None:
+        raise RuntimeError('ffmpeg is needed to write video files, write a .gif or use render_frames instead')
+
+    with tempfile.TemporaryDirectory() as directory:
+        frames = render_frames(solver, angles, directory, workers=workers, dpi=dpi, size=size)
+        if gif:
+            with Image.open(frames[0]) as first:
+                first.save(path, save_all=True, append_images=_open_frames(frames[1:]),
+                           duration=1000.0 / fps, loop=0)
+        else:
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-framerate', str(fps),
+                            '-i', os.path.join(directory, FRAME_PATTERN.replace('{:06d}', '%06d')),
+                            '-pix_fmt', 'yuv420p', path], check=True)
+    return path
@@ -11,15 +11,22 @@ are inherited from abstract base Arm class.
 """
 import os
 import math
-from time import sleep
-from arm_controller.solvers.ikpy_solver import IKPySolver
+from arm_controller.solvers import create_solver
 from arm_controller.chains.py_chain import PyChain
+from arm_controller import instrumentation
 from arm_controller.arms.abstract_arm import AbstractArm
-from adafruit_servokit import ServoKit
+from arm_controller.motion.trajectory_executor import TrajectoryExecutor
+from arm_controller.servos.servokit_backend import ServoKitBackend
 
 class MechatronicsArm(AbstractArm):
-    def __init__(self):
+    def __init__(self, backend=None, solver=None):
         """Constructs Arm class.
+
+        Args:
+            backend (AbstractBackend): servo board to drive (defaults to a ServoKitBackend,
+                use a SimulatedBackend to run without hardware).
+            solver (str | type | AbstractSolver): kinematic solver, by registered name (e.g. 'ikpy',
+                'native', 'analytic'), class or instance (see arm_controller.solvers.create_solver).
         """
 
         dirname = os.path.dirname(__file__)
@@ -28,77 +35,29 @@ class MechatronicsArm(AbstractArm):
 
         # servo speed in rads / sec
         self._servo_speed = math.radians(20.0)
-        self._solver = IKPySolver(self.chain)
+        # servo acceleration in rads / sec^2 and the shape of the speed profile ('linear', 'trapezoidal' or 's_curve')
+        self._servo_acceleration = math.radians(80.0)
+        self.motion_profile = 'trapezoidal'
+        # servo board the setpoints are written to, its clock also times the executor
+        self.backend = backend if backend is not None else ServoKitBackend(channels=16)
+        # writes joint setpoints at a fixed rate (Hz)
+        self.executor = TrajectoryExecutor(rate=100.0, clock=self.backend.clock, sleep=self.backend.sleep,
+                                           async_sleep=self.backend.async_sleep)
+        self._solver = create_solver(solver, self.chain)
+        # seed inverse_solve with the current joint values so consecutive moves converge faster
+        self.warm_start = True
+        # optional WorkspaceIndex used to reject unreachable targets and seed inverse_solve
+        self.workspace = None
+        # optional CollisionChecker every planned trajectory is validated with before it runs
+        self.collision = None
+        # targets waiting in the motion queue and how far (in meters) from each queued target its corner is rounded
+        self._queue = []
+        self.blend_radius = 0.01
 
-        self._kit = ServoKit(channels=16)
         self.configure_board()
 
         self.set_default_position()
 
-    def get_pos(self):
-        """Calculates and returns current position of the arm.
-
-        Calculates based on current positions of arm servo's, the
-        current position of the claw, returning as (x, y, z).
-
-        Returns:
-            current_xyz (list[float]): a list containing the (x, y, z) position of the claw.
-            current_rpy (list[float]): a list containing the (r, p, y) of the claw.
-        """
-        current_angles = self.chain.get_current_values()
-        current_xyz, current_rpy = self._solver.forward_solve(current_angles)
-        return current_xyz, current_rpy
-
-    def set_speed(self, ss, radians=False):
-        """Set's the speed at which the servo's move.
-
-        Set's the arm rate of speed at which the servo's move into position.
-
-        Args:
-            ss (float): Rate of speed on a 1-10 scale: 1 being slowest, 10 being fastest.
-
-        Returns:
-            ss (float): Returns the new servo speed.
-            radians (bool): Whether the servo speed is given in radians or degrees per second.
-        """
-        if ss >= 1.0 and not radians:
-            self._servo_speed = math.radians(ss)
-        elif ss >= 0.016 and radians:
-            self._servo_speed = ss
-        return self._servo_speed
-
-    def move_to(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
-        """Moves the arm to the specified position.
-
-        Calculates and moves the arm so the claw is centered at the
-        position (x_pos, y_pos, z_pos).
-
-        Args:
-            x_pos (float): Final X position of the claw.
-            y_pos (float): Final Y position of the claw.
-            z_pos (float): Final Z position of the claw.
-            roll (float): Final roll angle of the wrist (default to 0).
-            pitch (float): Final pitch angle of the wrist (default to 0).
-            yaw (float): Final yaw angle of the wrist (default to 0).
-            radians (bool): whether the values given is in radians or degrees.
-            
-        Return:
-            angles (list): list of the angles the arm is being set to (in radians).
-        """
-        if not radians:
-            roll_rad = math.radians(roll)
-            pitch_rad = math.radians(pitch)
-            yaw_rad = math.radians(yaw)
-
-        angles = self._solver.inverse_solve([x_pos, y_pos, z_pos], [roll_rad, pitch_rad, yaw_rad])
-
-        i = 0
-        for joint in self.chain.joints:
-            self.set_joint(joint, angles[i], radians=True)
-            i += 1
-
-        return angles
-
     def open_claw(self, value=80.0, radians=False):
         """Opens the claw of the robot arm.
 
@@ -112,7 +71,7 @@ class MechatronicsArm(AbstractArm):
         if radians:
             value = math.degrees(value)
         if value > 0.0 or value < 180.0:
-            self._kit.servo[self.chain.joints['claw']['servo#']].angle = value
+            self.backend.set_angles({self.chain.joints['claw']['servo#']: value})
             self.chain.joints['claw']['current_value'] = math.radians(value)
 
     def close_claw(self, value=30.0, radians=False):
@@ -128,67 +87,41 @@ class MechatronicsArm(AbstractArm):
         if radians:
             value = math.degrees(value)
         if value > 0.0 or value < 180.0:
-            self._kit.servo[self.chain.joints['claw']['servo#']].angle = value
+            self.backend.set_angles({self.chain.joints['claw']['servo#']: value})
             self.chain.joints['claw']['current_value'] = math.radians(value)
 
+    @instrumentation.timed('arm.set_default_position')
     def set_default_position(self):
         """Loads the default position for the robot arm.
 
         Sets each servo to its default position found in the servo_info dictionary
         created during class initialization.
         """
-        self.set_joint('elbow', 0, radians=False)
-        self.set_joint('shoulder', 150, radians=False)
-        for joint in self.chain.joints:
-            self.set_joint(joint, self.chain.joints[joint]['default_value'], radians=True)
+        for values, radians in self._default_moves():
+            self.set_joints(values, radians=radians)
         self.open_claw()
 
-    def set_joint(self, joint, value, radians=False):
-        """Moves the specified segment to the given value.
+    def _write_joints(self, joints, values):
+        """Writes one setpoint to the servo backend and records it in the chain.
 
         Arguments:
-            joint (str): segment to move.
-            value (float): value to apply to joint.
-            radians (bool): whether the value given is in radians or degrees.
+            joints (list[str]): joint names.
+            values (list[float]): value of each joint (in radians).
         """
-        if value == None:
-            return
-
-        if radians:
-            value = math.degrees(value)
-
-        target = value
-        current = math.degrees(self.chain.joints[joint]['current_value'])
-        step = math.degrees(self._servo_speed) / 2 # divide by two here to allow for half second sleeps
-
-        if (current > target):
-            # current angle is LARGER than the target angle so we decrement it to get closer
-            while (current - target) > step:
-                current = current - step
-                self._kit.servo[self.chain.joints[joint]['servo#']].angle = current
-                sleep(0.5)
-            else:
-                self._kit.servo[self.chain.joints[joint]['servo#']].angle = target
-
-        elif (target > current):
-            # current angle is SMALLER than the target angle so we increment it to get closer
-            while (target - current) > step:
-                current = current + step
-                self._kit.servo[self.chain.joints[joint]['servo#']].angle = current
-                sleep(0.5)
-            else:
-                self._kit.servo[self.chain.joints[joint]['servo#']].angle = target
-
-        else:
-            # current angle is EQUAL to the target angle
-            self._kit.servo[self.chain.joints[joint]['servo#']].angle = target
-
-        # failsafe catches and set current values in chain
-        self._kit.servo[self.chain.joints[joint]['servo#']].angle = value
-        self.chain.joints[joint]['current_value'] = math.radians(value)
+        index = self.chain.joints.select(joints)
+        setpoint = self.chain.joints.current.copy()
+        setpoint[index] = values
+        angles = {}
+        for channel, value in zip(self.chain.joints.servo[index].tolist(), setpoint[index].tolist()):
+            if channel >= 0:
+                angles[channel] = math.degrees(value)
+        with instrumentation.span('servo.write'):
+            self.backend.set_angles(angles)
+        # recorded only once the write went through, so a failed write leaves the last reached pose
+        self.chain.joints.current[index] = setpoint[index]
 
     def configure_board(self, mapping={'waist':0,'shoulder':1,'elbow':2,'wrist_roll':3,'wrist_pitch':4,'claw':5}):
-        """Configures the joints with information with use with the Adafruit Servokit.
+        """Configures the servo channel of each joint on the servo board.
 
         Arguments:
             mapping {dict} -- mapping from the joint names (same as the URDF model) to their servo number (use None for joints without servos).
@@ -2,19 +2,28 @@
 """
 import os
 import math
-from time import sleep
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-from mpl_toolkits.mplot3d import Axes3D
-from multiprocessing import Process, Manager
+import time
+from collections import deque
+import numpy as np
+from multiprocessing import Process
 
+from arm_controller import instrumentation
 from arm_controller.arms.abstract_arm import AbstractArm
-from arm_controller.solvers.ikpy_solver import IKPySolver
+from arm_controller.arms.shared_joint_state import SharedJointState
+from arm_controller.solvers import create_solver
 from arm_controller.chains.py_chain import PyChain
+from arm_controller.motion.trajectory_executor import TrajectoryExecutor
+from arm_controller.servos.simulated_backend import SimulatedBackend
 
 class PlotterArm(AbstractArm):
-    def __init__(self):
+    def __init__(self, headless=False, solver=None):
         """Constructs Plotter class.
+
+        Arguments:
+            headless (bool): instead of animating in a window, record every setpoint in
+                virtual time (moves return as soon as they are computed) for render().
+            solver (str | type | AbstractSolver): kinematic solver, by registered name (e.g. 'ikpy',
+                'native', 'analytic'), class or instance (see arm_controller.solvers.create_solver).
         """
 
         dirname = os.path.dirname(__file__)
@@ -23,150 +32,134 @@ class PlotterArm(AbstractArm):
 
         # servo speed in rads / sec
         self._servo_speed = math.radians(20)
-        self._solver = IKPySolver(self.chain)
-
-        # variables animation depends on
-        self.manager = Manager()
-        self.anim_variables = self.manager.dict()
-        self.anim_variables['exit'] = False # variable to tell animation to exit
-
-        for joint in self.chain.joints:
-            self.anim_variables[joint] = self.chain.joints[joint]['current_value']
-
-        self.proc = Process(target=run_animation, args=(self.anim_variables, self._solver))
-        self.proc.start()
+        # servo acceleration in rads / sec^2 and the shape of the speed profile ('linear', 'trapezoidal' or 's_curve')
+        self._servo_acceleration = math.radians(80.0)
+        self.motion_profile = 'trapezoidal'
+        # writes joint setpoints at a fixed rate (Hz)
+        self.headless = headless
+        if headless:
+            # a simulated board only provides the virtual clock, the plotter has no servos
+            self._clock = SimulatedBackend()
+            self.executor = TrajectoryExecutor(rate=100.0, clock=self._clock.clock, sleep=self._clock.sleep,
+                                               async_sleep=self._clock.async_sleep)
+        else:
+            self.executor = TrajectoryExecutor(rate=100.0)
+        self._solver = create_solver(solver, self.chain)
+        # seed inverse_solve with the current joint values so consecutive moves converge faster
+        self.warm_start = True
+        # optional WorkspaceIndex used to reject unreachable targets and seed inverse_solve
+        self.workspace = None
+        # optional CollisionChecker every planned trajectory is validated with before it runs
+        self.collision = None
+        # targets waiting in the motion queue and how far (in meters) from each queued target its corner is rounded
+        self._queue = []
+        self.blend_radius = 0.01
+
+        # joint values the animation draws, shared with the animation process without a manager
+        self.state = SharedJointState(list(self.chain.joints))
+        self.state.write(self.chain.get_current_values())
+        # (time, joint values) of every setpoint written in headless mode
+        self.recording = []
+
+        if headless:
+            self.proc = None
+        else:
+            self.proc = Process(target=run_animation, args=(self.state.name, self.state.joints, self._solver))
+            self.proc.start()
 
         self.set_default_position()
 
-    def exit(self):
-        self.anim_variables['exit'] = True
-
-    def get_pos(self):
-        """Calculates and returns current position of the arm.
-
-        Calculates based on current positions of arm servo's, the
-        current position of the claw, returning as (x, y, z).
-
-        Returns:
-            current_xyz (list[float]): a list containing the (x, y, z) position of the claw.
-            current_rpy (list[float]): a list containing the (r, p, y) of the claw.
+    @property
+    def fps(self):
+        """Frames per second the animation currently achieves.
         """
-        current_angles = self.chain.get_current_values()
-        current_xyz, current_rpy = self._solver.forward_solve(current_angles)
-        return current_xyz, current_rpy
+        return self.state.fps
 
-    def set_speed(self, ss, radians=False):
-        """Set's the speed at which the servo's move.
+    def exit(self):
+        """Flags the animation process to exit (join on self.proc to wait for it).
+        """
+        self.state.request_exit()
 
-        Set's the arm rate of speed at which the servo's move into position.
+    def render(self, path, fps=30, workers=None, dpi=100):
+        """Renders the setpoints recorded in headless mode offscreen.
 
-        Args:
-            ss (float): Rate of speed on a 1-10 scale: 1 being slowest, 10 being fastest.
-            radians (bool): Whether the servo speed is given in radians or degrees per second.
+        Arguments:
+            path (str): a video (.mp4, .gif, ...) file to write, or a directory to write PNG frames to.
+            fps (float): frames per second, the recording is shown at the speed it was executed.
+            workers (int): number of processes rendering frames (defaults to the number of CPUs).
+            dpi (int): resolution of the frames.
 
         Returns:
-            ss (float): Returns the new servo speed.
+            path (str | list[str]): the video file, or the paths of the frames.
         """
-        if ss >= 1.0 and not radians:
-            self._servo_speed = math.radians(ss)
-        elif ss >= 0.016 and radians:
-            self._servo_speed = ss
-        return self._servo_speed
-
-    def move_to(self, x_pos, y_pos, z_pos, roll=0, pitch=0, yaw=0, radians=False):
-        """Moves the arm to the specified position.
-
-        Calculates and moves the arm so the claw is centered at the
-        position (x_pos, y_pos, z_pos).
-
-        Args:
-            x_pos (float): Final X position of the claw.
-            y_pos (float): Final Y position of the claw.
-            z_pos (float): Final Z position of the claw.
-            roll (float): Final roll angle of the wrist (default to 0).
-            pitch (float): Final pitch angle of the wrist (default to 0).
-            yaw (float): Final yaw angle of the wrist (default to 0).
-            radians (bool): whether the values given is in radians or degrees.
-
-        Return:
-            angles (list): list of the angles the arm is being set to (in radians).
+        # matplotlib is only needed once something is drawn
+        from arm_controller.arms.headless_renderer import resample, render_frames, render_video
+
+        if not self.recording:
+            raise ValueError('nothing recorded, construct the arm with headless=True and move it first')
+        times, values = zip(*self.recording)
+        frames = resample(times, np.array(values, dtype=float), fps)
+        if os.path.splitext(path)[1]:
+            return render_video(self._solver, frames, path, fps=fps, workers=workers, dpi=dpi)
+        return render_frames(self._solver, frames, path, workers=workers, dpi=dpi)
+
+    def jog(self, dx, dy, dz, droll=0, dpitch=0, dyaw=0, radians=False):
+        """Moves the claw by a small correction within one control tick (see AbstractArm.jog).
+
+        In headless mode every jog also takes one control tick of virtual time, so the
+        recording keeps its timing.
         """
-        if not radians:
-            roll_rad = math.radians(roll)
-            pitch_rad = math.radians(pitch)
-            yaw_rad = math.radians(yaw)
-
-        angles = self._solver.inverse_solve([x_pos, y_pos, z_pos], [roll_rad, pitch_rad, yaw_rad])
-
-        i = 0
-        for joint in self.chain.joints:
-            self.set_joint(joint, angles[i], radians=True)
-            i += 1
-
+        angles = super().jog(dx, dy, dz, droll=droll, dpitch=dpitch, dyaw=dyaw, radians=radians)
+        if self.headless:
+            self._clock.sleep(1.0 / self.executor.rate)
         return angles
 
+    @instrumentation.timed('arm.set_default_position')
     def set_default_position(self):
         """Loads the default position for the robot arm.
 
         Sets each servo to its default position found in the servo_info dictionary
         created during class initialization.
         """
-        self.set_joint('elbow', 0, radians=False)
-        self.set_joint('shoulder', 150, radians=False)
-        for joint in self.chain.joints:
-            self.set_joint(joint, self.chain.joints[joint]['default_value'], radians=True)
+        for values, radians in self._default_moves():
+            self.set_joints(values, radians=radians)
 
-    def set_joint(self, joint, value, radians=False):
-        """Moves the specified segment to the given value.
+    def _write_joints(self, joints, values):
+        """Sends one setpoint to the animation and records it in the chain.
 
         Arguments:
-            joint (str): joint to move.
-            value (float): value to apply to joint.
-            radians (bool) whether the value given is in radians or degrees.
+            joints (list[str]): joint names.
+            values (list[float]): value of each joint (in radians).
         """
-        if value == None:
-            return
-
-        if not radians:
-            value = math.radians(value)
-
-        target = value
-        current = self.chain.joints[joint]['current_value']
-        step = self._servo_speed / 2 # divide by two here to allow for half second sleeps
-
-        if (current > target):
-            # current angle is LARGER than the target angle so we decrement it to get closer
-            while (current - target) > step:
-                current = current - step
-                self.anim_variables[joint] = current
-                sleep(0.5)
-            else:
-                self.anim_variables[joint] = target
-
-        elif (target > current):
-            # current angle is SMALLER than the target angle so we increment it to get closer
-            while (target - current) > step:
-                current = current + step
-                self.anim_variables[joint] = current
-                sleep(0.5)
-            else:
-                self.anim_variables[joint] = target
-
-        else:
-            # current angle is EQUAL to the target angle
-            self.anim_variables[joint] = target
-
-        # failsafe catches and set current values in chain
-        self.anim_variables[joint] = value
-        self.chain.joints[joint]['current_value'] = value
-
-def run_animation(anim_variables, solver):
+        index = self.chain.joints.select(joints)
+        setpoint = self.chain.joints.current.copy()
+        setpoint[index] = values
+        with instrumentation.span('servo.write'):
+            self.state.write(setpoint)
+        # recorded only once the write went through, so a failed write leaves the last reached pose
+        self.chain.joints.current[index] = setpoint[index]
+        if self.headless:
+            self.recording.append((self.executor.clock(), setpoint))
+
+def run_animation(state_name, joints, solver):
     """Runs an animation on the given plotter arm.
 
+    The arm is drawn with one persistent line whose data is updated in place,
+    forward kinematics is only recomputed when the arm has written new joint
+    values, and the achieved frame rate is shown and published in the shared state.
+
     Args:
-        anim_variables:
-        solver:
+        state_name (str): name of the SharedJointState the arm writes its joint values to.
+        joints (list[str]): names of the joints in the shared state.
+        solver (AbstractSolver): solver used to find the position of every joint.
     """
+    # imported here so only the animation process pays for importing matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+    from mpl_toolkits.mplot3d import Axes3D
+
+    state = SharedJointState(joints, name=state_name)
+
     # matplotlib objects
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
@@ -178,29 +171,31 @@ def run_animation(anim_variables, solver):
     ax.set_zlim(bottom=-0.05, top=0.2)
     ax.set_title('3D Plot of Robot Arm')
 
+    line, = ax.plot([], [], [], c="black", lw=2)
+    fps_text = ax.text2D(0.02, 0.95, '', transform=ax.transAxes)
+    frame_times = deque(maxlen=60)
+    last_seq = -1
+    angles = np.empty(len(joints))
+
     # inner function called to animate
     def animate(i):
-        angles = []
-        for key in anim_variables.keys():
-            if key != 'exit':
-                angles.append(anim_variables[key])
-
-        coords = solver.segmented_forward_solve(angles)
-
-        xdata = []
-        ydata = []
-        zdata = []
-
-        for c in coords:
-            xdata.append(c[0])
-            ydata.append(c[1])
-            zdata.append(c[2])
-
-        line = ax.plot(xdata, ydata, zdata, c="black", lw=2)
-        return line
+        nonlocal last_seq
+        seq, _ = state.read(out=angles)
+        if seq != last_seq:
+            coords = np.asarray(solver.segmented_forward_solve(angles))
+            line.set_data(coords[:, 0], coords[:, 1])
+            line.set_3d_properties(coords[:, 2])
+            last_seq = seq
+
+        frame_times.append(time.monotonic())
+        if len(frame_times) > 1 and frame_times[-1] > frame_times[0]:
+            state.fps = (len(frame_times) - 1) / (frame_times[-1] - frame_times[0])
+            fps_text.set_text(f'{state.fps:.0f} FPS')
+        return line, fps_text
 
     anim = FuncAnimation(fig, func=animate, frames=300, interval=17, repeat=True, blit=True)
     plt.draw()
-    while not anim_variables['exit']:
+    while not state.exit_requested:
         plt.pause(0.01)
     plt.close()
+    state.close()
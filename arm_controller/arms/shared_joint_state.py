@@ -0,0 +1,163 @@
+"""Joint state shared between processes through shared memory.
+
+One process (the arm) writes joint values, any number of other processes
+(e.g. the plotter animation) read the latest values. The values live in a ring
+of slots in a multiprocessing.shared_memory block, each stamped with the
+sequence number of the write that filled it, so neither side takes a lock or
+talks to a manager process: the writer fills the next slot and then publishes
+its sequence number, a reader copies the newest slot and checks that its stamp
+did not change while copying.
+
+    Typical usage example:
+    state = SharedJointState(['waist', 'shoulder'])          # in the writing process
+    state.write([1.57, 2.61])
+    reader = SharedJointState(['waist', 'shoulder'], name=state.name)  # in another process
+    seq, values = reader.read()
+"""
+import weakref
+import numpy as np
+from multiprocessing import shared_memory
+
+# header: sequence number of the newest write, the exit flag, the number of slots and the reader's frame rate
+_HEADER = 4
+_SEQ = 0
+_EXIT = 1
+_SLOTS = 2
+_FPS = 3
+
+
+def _attach(name):
+    """Opens an existing shared memory block without making this process responsible for removing it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the resource tracker; processes
+        # started with multiprocessing share the creator's tracker, so this is a no-op there
+        return shared_memory.SharedMemory(name=name)
+
+
+def _release(block, owner):
+    """Closes a shared memory block and removes it if this process created it.
+    """
+    try:
+        block.close()
+    except BufferError:
+        # arrays still view the block (e.g. at interpreter exit), the mapping goes away with the process
+        pass
+    if owner:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedJointState:
+
+    def __init__(self, joints, slots=64, name=None):
+        """Creates a new shared joint state, or attaches to an existing one.
+
+        Args:
+            joints (list[str]): names of the joints, in the order values are written.
+            slots (int): number of slots in the ring when creating; a reader only fails to
+                get a consistent copy if the writer laps the whole ring while it copies.
+            name (str): name of an existing block to attach to (None creates a new one).
+        """
+        self.joints = list(joints)
+        self._width = len(self.joints) + 1
+        owner = name is None
+        if owner:
+            self._block = shared_memory.SharedMemory(create=True, size=8 * (_HEADER + slots * self._width))
+        else:
+            self._block = _attach(name)
+        self.name = self._block.name
+        self._header = np.ndarray((_HEADER,), dtype=np.int64, buffer=self._block.buf)
+        if owner:
+            self._header[:] = [0, 0, slots, 0]
+        self.slots = int(self._header[_SLOTS])
+        self._fps = np.ndarray((1,), dtype=np.float64, buffer=self._block.buf, offset=8 * _FPS)
+        # every slot holds its sequence stamp followed by the joint values
+        self._ring = np.ndarray((self.slots, self._width), dtype=np.float64, buffer=self._block.buf,
+                                offset=8 * _HEADER)
+        if owner:
+            self._ring[:] = np.nan
+            self._ring[:, 0] = -1.0
+        self._finalizer = weakref.finalize(self, _release, self._block, owner)
+
+    @property
+    def seq(self):
+        """Sequence number of the newest write (0 before the first write).
+        """
+        return int(self._header[_SEQ])
+
+    def write(self, values):
+        """Publishes the values of every joint.
+
+        Only one process may write.
+
+        Args:
+            values (list[float] | ndarray): value of each joint, in the order of self.joints (None is
+                stored as NaN, an array is copied in without conversion).
+        """
+        seq = int(self._header[_SEQ]) + 1
+        slot = self._ring[seq % self.slots]
+        # the stamp is cleared while the slot is being filled so readers reject it
+        slot[0] = -1.0
+        if isinstance(values, np.ndarray):
+            slot[1:] = values
+        else:
+            slot[1:] = [np.nan if value is None else value for value in values]
+        slot[0] = seq
+        self._header[_SEQ] = seq
+
+    def read(self, out=None):
+        """Returns a consistent copy of the newest values.
+
+        Args:
+            out (ndarray): array to copy the values into instead of allocating a new one.
+        Returns:
+            seq (int): sequence number of the values (0 if nothing has been written yet).
+            values (ndarray): value of each joint, in the order of self.joints.
+        """
+        if out is None:
+            out = np.empty(len(self.joints))
+        while True:
+            seq = int(self._header[_SEQ])
+            if seq == 0:
+                out[:] = self._ring[0, 1:]
+                return 0, out
+            slot = self._ring[seq % self.slots]
+            out[:] = slot[1:]
+            if slot[0] == seq:
+                return seq, out
+
+    def request_exit(self):
+        """Flags the readers that the writer is done.
+        """
+        self._header[_EXIT] = 1
+
+    @property
+    def exit_requested(self):
+        """Whether request_exit has been called.
+        """
+        return bool(self._header[_EXIT])
+
+    @property
+    def fps(self):
+        """Frames per second the reader reports it achieves (see the fps setter).
+        """
+        return float(self._fps[0])
+
+    @fps.setter
+    def fps(self, value):
+        """Lets a reader that draws the joint state publish its frame rate.
+        """
+        self._fps[0] = value
+
+    def close(self):
+        """Detaches from the shared memory (and removes it if this process created it).
+        """
+        self._header = None
+        self._ring = None
+        self._fps = None
+        self._finalizer()
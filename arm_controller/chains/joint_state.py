@@ -0,0 +1,156 @@
+"""Array-backed state of the joints of a PyChain.
+
+The current value, default value and servo channel of every joint live in
+contiguous NumPy arrays ordered like the chain's kinematic model, so solvers
+and arms read and write them without building lists or looking up nested
+dicts. JointState still behaves like the dict of dicts PyChain used to keep:
+
+    Typical usage example:
+    chain.joints['elbow']['current_value'] = 0.5     # dict-like compatibility accessor
+    chain.joints.current                               # ndarray, one value per joint (zero-copy)
+    index = chain.joints.select(('waist', 'elbow'))    # cached index array for a joint subset
+    chain.joints.current[index] = [1.2, 0.4]
+
+Values that used to be None (a default for a joint that does not move, a joint
+without a servo) are stored as NaN and -1 and read back as None through the
+compatibility accessor.
+"""
+import numpy as np
+
+# keys of the per joint dicts PyChain used to keep
+_KEYS = ('current_value', 'default_value', 'servo#')
+
+
+class JointView:
+    """
+    Dict-like view of one joint of a JointState (reads and writes go to the arrays)
+    """
+
+    __slots__ = ('_state', '_i')
+
+    def __init__(self, state, i):
+        self._state = state
+        self._i = i
+
+    def __getitem__(self, key):
+        if key == 'current_value':
+            return float(self._state.current[self._i])
+        if key == 'default_value':
+            value = self._state.default[self._i]
+            return None if np.isnan(value) else float(value)
+        if key == 'servo#':
+            channel = self._state.servo[self._i]
+            return None if channel < 0 else int(channel)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'current_value':
+            self._state.current[self._i] = value
+        elif key == 'default_value':
+            self._state.default[self._i] = np.nan if value is None else value
+        elif key == 'servo#':
+            self._state.servo[self._i] = -1 if value is None else value
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return _KEYS
+
+    def items(self):
+        return [(key, self[key]) for key in _KEYS]
+
+    def __iter__(self):
+        return iter(_KEYS)
+
+    def __len__(self):
+        return len(_KEYS)
+
+    def __contains__(self, key):
+        return key in _KEYS
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class JointState:
+    """
+    Current values, defaults and servo channels of every joint, in the order of a kinematic model
+    """
+
+    __slots__ = ('names', 'current', 'default', 'servo', 'lower', 'upper', '_index', '_views', '_selections',
+                 '_readonly')
+
+    def __init__(self, model):
+        """Creates the state of a chain's joints, all at 0 with no default and no servo.
+
+        Args:
+            model (KinematicModel): model of the chain (fixes the joint order and limits).
+        """
+        self.names = model.joint_names
+        self.current = np.zeros(len(model))
+        self.default = np.full(len(model), np.nan)
+        self.servo = np.full(len(model), -1, dtype=int)
+        # read-only views of the model's limits
+        self.lower = model.lower
+        self.upper = model.upper
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self._views = [JointView(self, i) for i in range(len(self.names))]
+        self._selections = {}
+        self._readonly = self.current.view()
+        self._readonly.flags.writeable = False
+
+    def view(self):
+        """Returns a read-only, zero-copy view of the current values (it follows later writes, copy to keep).
+        """
+        return self._readonly
+
+    def index(self, name) -> int:
+        """Returns the position of a joint in the arrays.
+        """
+        return self._index[name]
+
+    def select(self, names):
+        """Returns the positions of the given joints in the arrays.
+
+        The result is cached per tuple of names, so the per tick writes of a
+        trajectory look their joints up only once.
+
+        Args:
+            names (tuple[str]): joint names.
+        Returns:
+            index (ndarray): read-only integer array, usable for fancy indexing.
+        """
+        names = tuple(names)
+        index = self._selections.get(names)
+        if index is None:
+            index = np.array([self._index[name] for name in names], dtype=int)
+            index.flags.writeable = False
+            self._selections[names] = index
+        return index
+
+    def __getitem__(self, name):
+        return self._views[self._index[name]]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def keys(self):
+        return list(self.names)
+
+    def values(self):
+        return list(self._views)
+
+    def items(self):
+        return list(zip(self.names, self._views))
@@ -0,0 +1,149 @@
+"""Immutable, array-backed kinematic model of a URDF chain.
+
+The model is built once per URDF (and shared by every PyChain and solver made
+from it) so all of them agree on the order of the joints, the value of index i
+of an angle list always belongs to model.joint_names[i], and no backend has to
+walk the URDF objects or read the file again.
+
+    Typical usage example:
+    model = KinematicModel.from_urdf(PyURDF.load('arm.urdf'))
+    model.origins[model.index('elbow')]      # static 4x4 origin transform of the elbow joint
+"""
+import numpy as np
+
+from arm_controller.chains.py_urdf import PyURDF
+from arm_controller.chains.urdf_object import JointType
+
+# models already built by this process, keyed by URDF identity
+_models = {}
+
+
+def rpy_to_matrix(rpy):
+    """Takes URDF roll, pitch, yaw values and returns the equivalent 3x3 rotation matrix.
+
+    Args:
+        rpy(list[float]): roll, pitch, and yaw values (fixed axis X, Y, Z)
+
+    Returns:
+        matrix: 3x3 rotation matrix Rz(yaw) * Ry(pitch) * Rx(roll)
+    """
+    cr, cp, cy = np.cos(rpy)
+    sr, sp, sy = np.sin(rpy)
+    return np.array([[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                     [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                     [-sp, cp * sr, cp * cr]])
+
+
+def _frozen(array):
+    """Makes an array read-only and returns it.
+    """
+    array.flags.writeable = False
+    return array
+
+
+class KinematicModel:
+    """
+    Joint order, transforms and limits of a URDF chain, one array entry per joint in URDF order
+    """
+
+    __slots__ = ('name', 'urdf_id', 'joint_names', 'joint_types', 'parents', 'origin_xyz', 'origin_rpy',
+                 'origins', 'axes', 'lower', 'upper', 'velocity', 'revolute', 'prismatic', 'active', '_index')
+
+    def __init__(self, urdf):
+        """Builds the model of a parsed URDF (use from_urdf to share models between chains).
+
+        Args:
+            urdf (URDFObject): the parsed URDF.
+        """
+        joints = urdf.joints
+        count = len(joints)
+        set_ = object.__setattr__
+        set_(self, 'name', urdf.name)
+        set_(self, 'urdf_id', PyURDF.identity(urdf))
+        set_(self, 'joint_names', tuple(jnt.name for jnt in joints))
+        set_(self, 'joint_types', tuple(jnt.type for jnt in joints))
+        set_(self, '_index', {name: i for i, name in enumerate(self.joint_names)})
+
+        # index of the joint whose child link each joint is attached to (-1 at the root)
+        child_of = {jnt.child: i for i, jnt in enumerate(joints)}
+        parents = np.array([child_of.get(jnt.parent, -1) for jnt in joints], dtype=int)
+
+        origin_xyz = np.zeros((count, 3))
+        origin_rpy = np.zeros((count, 3))
+        origins = np.zeros((count, 4, 4))
+        axes = np.zeros((count, 3))
+        lower = np.full(count, -np.inf)
+        upper = np.full(count, np.inf)
+        velocity = np.full(count, np.nan)
+        for i, jnt in enumerate(joints):
+            origin_xyz[i] = jnt.origin_xyz
+            origin_rpy[i] = jnt.origin_rpy
+            origins[i] = np.eye(4)
+            origins[i, :3, :3] = rpy_to_matrix(jnt.origin_rpy)
+            origins[i, :3, 3] = jnt.origin_xyz
+            if jnt.type != JointType.FIXED and jnt.axis_xyz is not None:
+                axes[i] = jnt.axis_xyz / np.linalg.norm(jnt.axis_xyz)
+            if jnt.type != JointType.CONTINUOUS:
+                if jnt.limit_lower is not None:
+                    lower[i] = jnt.limit_lower
+                if jnt.limit_upper is not None:
+                    upper[i] = jnt.limit_upper
+            if jnt.limit_velocity is not None:
+                velocity[i] = jnt.limit_velocity
+
+        moving = np.any(axes != 0, axis=1)
+        revolute = moving & np.array([t in (JointType.REVOLUTE, JointType.CONTINUOUS) for t in self.joint_types],
+                                     dtype=bool)
+        prismatic = moving & np.array([t == JointType.PRISMATIC for t in self.joint_types], dtype=bool)
+        for i, jnt in enumerate(joints):
+            if moving[i] and not (revolute[i] or prismatic[i]):
+                raise ValueError(f'joint {jnt.name} has unsupported type {jnt.type.value}')
+
+        for name, value in (('parents', parents), ('origin_xyz', origin_xyz), ('origin_rpy', origin_rpy),
+                            ('origins', origins), ('axes', axes), ('lower', lower), ('upper', upper),
+                            ('velocity', velocity), ('revolute', revolute), ('prismatic', prismatic),
+                            ('active', revolute | prismatic)):
+            set_(self, name, _frozen(value))
+
+    @classmethod
+    def from_urdf(cls, urdf):
+        """Returns the model of a parsed URDF, building it only the first time the URDF is seen.
+
+        Args:
+            urdf (URDFObject): the parsed URDF.
+        Returns:
+            model (KinematicModel): the shared model.
+        """
+        urdf_id = PyURDF.identity(urdf)
+        model = _models.get(urdf_id)
+        if model is None:
+            model = _models[urdf_id] = cls(urdf)
+        return model
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            if isinstance(value, np.ndarray):
+                value = _frozen(value)
+            object.__setattr__(self, name, value)
+
+    def __len__(self):
+        return len(self.joint_names)
+
+    def index(self, name) -> int:
+        """Returns the position of a joint in every angle list.
+
+        Raises:
+            KeyError: if the chain has no joint of that name.
+        """
+        return self._index[name]
+
+    def velocity_limits(self):
+        """Returns the velocity limit of each joint (None where the URDF gives none).
+        """
+        return [None if np.isnan(value) else float(value) for value in self.velocity]
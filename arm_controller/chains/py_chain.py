@@ -1,16 +1,20 @@
 """Contains PyChain class to simulate PyKDL Chain with the use of PySegment's.
 """
 import math
+import numpy as np
 from arm_controller.chains.py_urdf import PyURDF, URDFObject
+from arm_controller.chains.kinematic_model import KinematicModel
+from arm_controller.chains.joint_state import JointState
 
 class PyChain():
     def __init__(self, urdf_file_path):
         """Basic constructor for PyChain class.
         """
-        self.urdf = PyURDF.parse(urdf_file_path)
-        self.joints = {}
-        for joint in self.urdf.joints:
-                self.joints[joint.name] = {'current_value': 0.0}
+        self.urdf = PyURDF.load(urdf_file_path)
+        # shared with every solver built from this chain, fixes the order of the joint values
+        self.model = KinematicModel.from_urdf(self.urdf)
+        # array-backed, also usable like the dict of {'current_value', 'default_value', 'servo#'} dicts
+        self.joints = JointState(self.model)
 
         self.set_default_values()
 
@@ -40,18 +44,27 @@ class PyChain():
         Returns:
             current_values {list} -- list containing each rotating joints current value (in degrees).
         """
-        current_values = []
-        for joint in self.joints:
-            current_values.append(self.joints[joint]['current_value'])
-        return current_values
+        return self.joints.current.tolist()
+
+    def current_values(self):
+        """Returns the current value of each joint without copying.
+
+        Returns:
+            current_values (ndarray): read-only view of the current values (in radians), it follows
+                later moves, so copy it to keep a snapshot.
+        """
+        return self.joints.view()
 
     def set_default_values(self, defaults={'waist':90.0,'shoulder':150.0,'elbow':35.0,'wrist_roll':140.0,'wrist_pitch':85.0,'claw':None}):
         """Set the default values for the rotatable joints in the chain.
 
         Args:
-            defaults {dict} -- mapping from the joint names (same as urdf) to their default values (if joint doesn't move use None).
+            defaults {dict} -- mapping from the joint names (same as urdf) to their default values (if joint doesn't move use None),
+                joints the chain does not have are skipped.
         """
         for joint in defaults:
+            if joint not in self.joints:
+                continue
             if defaults[joint] != None:
                 self.joints[joint]['default_value'] = math.radians(defaults[joint])
             else:
@@ -63,7 +76,12 @@ class PyChain():
         Returns:
             default_values {list} -- list containg each rotating joints default value (in degrees).
         """
-        default_values = []
-        for joint in self.joints:
-            default_values.append(self.joints[joint]['default_value'])
-        return default_values
+        return [None if np.isnan(value) else value for value in self.joints.default.tolist()]
+
+    def get_velocity_limits(self):
+        """Gets the velocity limit of each joint in the chain from the URDF.
+
+        Returns:
+            velocity_limits {list} -- list containing each joints velocity limit (None where the URDF gives none).
+        """
+        return self.model.velocity_limits()
@@ -1,10 +1,145 @@
 """URDF parser / static methods
+
+PyURDF.load keeps a compiled copy of every parsed URDF next to the file (the
+URDFObject as plain JSON) and in memory, so constructing arms, chains and
+solvers only parses and hashes a URDF once. The compiled copy is used while the
+URDF's modification time and size match; if they changed, it is still used when
+the contents hash the same, otherwise the URDF is parsed and compiled again.
+Reading a compiled copy only ever creates the URDF classes below, never
+arbitrary objects, so a tampered file is rejected and the URDF parsed instead.
 """
+import os
+import json
+import hashlib
+from enum import Enum
 import xml.etree.ElementTree as ET
+import numpy as np
+from arm_controller import instrumentation
 from arm_controller.chains.urdf_object import URDFObject, URDFMaterial, URDFCollision, URDFVisual, URDFLink, URDFJoint
+from arm_controller.chains.urdf_object import JointType, GeometryType
+
+# bumped whenever the URDF objects change so compiled files from older versions are rebuilt
+COMPILED_VERSION = 3
+
+# the only classes a compiled file can create
+_COMPILED_CLASSES = {cls.__name__: cls for cls in (URDFObject, URDFMaterial, URDFCollision, URDFVisual,
+                                                   URDFLink, URDFJoint)}
+_COMPILED_ENUMS = {cls.__name__: cls for cls in (JointType, GeometryType)}
+
+# compiled URDFs already loaded by this process, keyed by absolute path
+_loaded = {}
+
+
+def _sha1(filepath) -> str:
+    """Hashes the contents of a file.
+    """
+    with open(filepath, 'rb') as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+def _encode(value):
+    """Converts a parsed URDF (or any part of it) to plain JSON values.
+    """
+    if isinstance(value, np.ndarray):
+        return {'array': value.tolist(), 'dtype': value.dtype.str}
+    if isinstance(value, Enum):
+        return {'enum': type(value).__name__, 'value': value.value}
+    if type(value).__name__ in _COMPILED_CLASSES:
+        return {'class': type(value).__name__, 'fields': {k: _encode(v) for k, v in vars(value).items()}}
+    if isinstance(value, dict):
+        return {'dict': {k: _encode(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+def _decode(value):
+    """Rebuilds the values written by _encode.
+
+    Raises:
+        KeyError: if the value names a class or enum that is not part of a URDF.
+    """
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if 'array' in value:
+        return np.array(value['array'], dtype=np.dtype(value['dtype']))
+    if 'enum' in value:
+        return _COMPILED_ENUMS[value['enum']](value['value'])
+    if 'class' in value:
+        obj = object.__new__(_COMPILED_CLASSES[value['class']])
+        obj.__dict__.update({k: _decode(v) for k, v in value['fields'].items()})
+        return obj
+    return {k: _decode(v) for k, v in value['dict'].items()}
 
 class PyURDF:
 
+    def identity(urdf) -> str:
+        """
+        Identifies the robot a URDFObject was parsed from, for keying data derived from it
+
+        Returns:
+            identity (str): robot name and SHA-1 hash of the URDF file contents
+        """
+        sha1 = getattr(urdf, 'sha1', None) or _sha1(urdf.path)
+        return f'{urdf.name}:{sha1}'
+
+    def compiled_path(filepath) -> str:
+        """Returns the file the compiled copy of a URDF is stored in (next to the URDF).
+        """
+        return os.path.splitext(filepath)[0] + '.compiled.json'
+
+    @instrumentation.timed('urdf.load')
+    def load(filepath, compiled_path=None) -> URDFObject:
+        """
+        Loads a URDF file into a URDFObject, reusing its compiled copy when it is up to date
+
+        Args:
+            filepath (str): path to the URDF file
+            compiled_path (str): file to keep the compiled copy in instead of the default next to the URDF
+
+        Returns:
+            urdf (URDFObject): URDF Object created from file (shared, do not modify)
+        """
+        stat = os.stat(filepath)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = os.path.abspath(filepath)
+        if key in _loaded and _loaded[key][0] == stamp:
+            return _loaded[key][1]
+
+        compiled_path = compiled_path if compiled_path is not None else PyURDF.compiled_path(filepath)
+        urdf = None
+        stale = True
+        try:
+            with open(compiled_path) as fh:
+                compiled = json.load(fh)
+            if compiled['version'] == COMPILED_VERSION:
+                compiled_urdf = _decode(compiled['urdf'])
+                if not isinstance(compiled_urdf, URDFObject):
+                    raise TypeError(f'{compiled_path} does not contain a URDF')
+                if tuple(compiled['stamp']) == stamp:
+                    urdf = compiled_urdf
+                    stale = False
+                elif compiled_urdf.sha1 == _sha1(filepath):
+                    # touched or copied but unchanged, only the stamp needs refreshing
+                    urdf = compiled_urdf
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # missing, unreadable or not written by this version, parsed again below
+            pass
+        if urdf is None:
+            instrumentation.count('urdf.parse')
+            urdf = PyURDF.parse(filepath)
+        if stale:
+            try:
+                with open(compiled_path, 'w') as fh:
+                    json.dump({'version': COMPILED_VERSION, 'stamp': stamp, 'urdf': _encode(urdf)}, fh)
+            except OSError:
+                # read-only install, the in-process copy still saves the repeated work
+                pass
+
+        urdf.path = filepath
+        _loaded[key] = (stamp, urdf)
+        return urdf
+
     def parse(filepath) -> URDFObject:
         """
         Parses a URDF file into a URDFObject, a pythonic representation of URDF
@@ -52,4 +187,4 @@ class PyURDF:
                                 item.find('limit'))
                 joints.append(jnt)
 
-        return URDFObject(name, filepath, materials, links, joints)
+        return URDFObject(name, filepath, materials, links, joints, sha1=_sha1(filepath))
@@ -135,11 +135,10 @@ class URDFLink:
             )
         self.collisions = []
         for coll in collisions:
-            self.visuals.append(
-                URDFVisual(
+            self.collisions.append(
+                URDFCollision(
                     coll.find('origin'),
-                    coll.find('geometry'),
-                    coll.find('material')
+                    coll.find('geometry')
                 )
             )
 
@@ -148,9 +147,11 @@ class URDFObject:
     Object representation of a URDF file's elements
     """
 
-    def __init__(self, name, path, mats, links, joints):
+    def __init__(self, name, path, mats, links, joints, sha1=None):
         self.name = name
         self.path = path
         self.mats = mats
         self.links = links
         self.joints = joints
+        # SHA-1 hash of the file contents the object was parsed from
+        self.sha1 = sha1
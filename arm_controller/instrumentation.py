@@ -0,0 +1,340 @@
+"""Timing spans, counters and histograms for the arm, solver and servo layers.
+
+Instrumentation is off by default and then costs one flag check per call site:
+span() hands back a shared context manager that does nothing, count() and
+observe() return right away. Once enabled, every span records its duration in a
+histogram named after it, and the outermost span of a call tree (e.g. one
+move_to) is kept with a breakdown of where its time went: the exclusive time of
+every span name below it, so the parts add up to the whole move.
+
+    Typical usage example:
+    instrumentation.enable()
+    arm.move_to(0.04, 0.06, 0.09)
+    instrumentation.recent()[-1]['breakdown']   # {'arm.move_to': ..., 'solver.inverse_solve': ..., 'executor.sleep': ...}
+    instrumentation.write_json('metrics.json')
+    instrumentation.serve_prometheus(port=9464)  # GET /metrics in the Prometheus text format
+"""
+import json
+import time
+import bisect
+import threading
+import functools
+import contextvars
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# upper bounds in seconds of the histogram buckets, from servo writes to whole moves
+BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+_enabled = False
+_lock = threading.Lock()
+# innermost open span of the running thread or task
+_current = contextvars.ContextVar('arm_controller_span', default=None)
+_counters = {}
+_histograms = {}
+_recent = deque(maxlen=100)
+
+
+class _Histogram:
+    """
+    Bucketed distribution of observed values with their count and sum
+    """
+
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self):
+        cumulative = []
+        total = 0
+        for count in self.buckets[:-1]:
+            total += count
+            cumulative.append(total)
+        return {'count': self.count, 'sum': self.sum, 'max': self.max,
+                'buckets': dict(zip(BUCKETS, cumulative))}
+
+
+class _NullSpan:
+    """
+    Span handed out while instrumentation is disabled
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Timed section of code, nested spans attribute their time to the outermost one
+    """
+
+    __slots__ = ('name', 'start', 'duration', 'breakdown', '_parent', '_root', '_children', '_token', '_wall')
+
+    def __init__(self, name):
+        self.name = name
+        self.duration = None
+        self.breakdown = None
+
+    def __enter__(self):
+        parent = _current.get()
+        self._parent = parent
+        if parent is None:
+            self._root = self
+            self.breakdown = {}
+            self._wall = time.time()
+        else:
+            self._root = parent._root
+        self._children = 0.0
+        self._token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.duration = time.perf_counter() - self.start
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            # closed in another context than it was opened in (e.g. a generator finished by another task)
+            _current.set(self._parent)
+        breakdown = self._root.breakdown
+        breakdown[self.name] = breakdown.get(self.name, 0.0) + self.duration - self._children
+        with _lock:
+            _histogram(self.name).add(self.duration)
+            if exc_type is not None:
+                _counters[self.name + '.errors'] = _counters.get(self.name + '.errors', 0) + 1
+            if self._parent is None:
+                _recent.append({'name': self.name, 'start': self._wall, 'duration': self.duration,
+                                'breakdown': dict(breakdown), 'error': exc_type is not None})
+        if self._parent is not None:
+            self._parent._children += self.duration
+        return False
+
+
+def _histogram(name):
+    """Returns the histogram of a name, creating it on first use (call with the lock held).
+    """
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = _Histogram()
+    return histogram
+
+
+def enable(history=100):
+    """Starts recording spans, counters and histograms.
+
+    Args:
+        history (int): number of outermost spans (moves) kept with their breakdown.
+    """
+    global _enabled, _recent
+    with _lock:
+        if _recent.maxlen != history:
+            _recent = deque(_recent, maxlen=history)
+    _enabled = True
+
+
+def disable():
+    """Stops recording (what was recorded is kept until reset).
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """Whether instrumentation is recording.
+    """
+    return _enabled
+
+
+def reset():
+    """Removes every recorded counter, histogram and span.
+    """
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _recent.clear()
+
+
+def span(name):
+    """Returns a context manager timing the code it wraps.
+
+    Args:
+        name (str): name of the span, dotted by layer (e.g. 'solver.inverse_solve').
+    Returns:
+        span (Span): the span, its duration is set once it is closed (a shared no-op object while disabled).
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name)
+
+
+def timed(name):
+    """Decorator wrapping every call of a function in a span.
+
+    Args:
+        name (str): name of the span.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """Adds to a counter.
+
+    Args:
+        name (str): name of the counter.
+        value (float): amount to add.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, value):
+    """Records a value (in seconds for timings) in a histogram.
+
+    Args:
+        name (str): name of the histogram.
+        value (float): the observed value.
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _histogram(name).add(value)
+
+
+def current():
+    """Returns the innermost open span of the running thread or task (None outside of spans or while disabled).
+    """
+    return _current.get()
+
+
+def recent():
+    """Returns the most recent outermost spans, oldest first.
+
+    Returns:
+        spans (list[dict]): 'name', 'start' (wall clock time), 'duration' and 'error' of every span,
+            and its 'breakdown': the exclusive seconds spent in every span name below it (including itself).
+    """
+    with _lock:
+        return list(_recent)
+
+
+def snapshot():
+    """Returns everything recorded so far.
+
+    Returns:
+        metrics (dict): 'counters' by name, 'histograms' by name (count, sum, max and cumulative
+            bucket counts by upper bound) and the 'recent' outermost spans.
+    """
+    with _lock:
+        return {'counters': dict(_counters),
+                'histograms': {name: histogram.snapshot() for name, histogram in _histograms.items()},
+                'recent': list(_recent)}
+
+
+def write_json(path):
+    """Writes the snapshot of everything recorded so far to a JSON file.
+
+    Args:
+        path (str): file to write.
+    """
+    metrics = snapshot()
+    for histogram in metrics['histograms'].values():
+        histogram['buckets'] = {repr(bound): count for bound, count in histogram['buckets'].items()}
+    with open(path, 'w') as fh:
+        json.dump(metrics, fh, indent=2)
+
+
+def _metric_name(name, prefix):
+    """Turns a dotted span or counter name into a Prometheus metric name.
+    """
+    return prefix + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def prometheus_text(prefix='arm_controller_'):
+    """Returns the counters and histograms in the Prometheus text exposition format.
+
+    Span histograms are exported as <prefix><name>_seconds, counters as <prefix><name>_total.
+
+    Args:
+        prefix (str): prefix of every metric name.
+    """
+    metrics = snapshot()
+    lines = []
+    for name, value in sorted(metrics['counters'].items()):
+        metric = _metric_name(name, prefix) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    for name, histogram in sorted(metrics['histograms'].items()):
+        metric = _metric_name(name, prefix) + '_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        for bound, count in histogram['buckets'].items():
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram["count"]}')
+        lines.append(f'{metric}_sum {histogram["sum"]}')
+        lines.append(f'{metric}_count {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serves prometheus_text() at /metrics
+    """
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # scrapes every few seconds would flood stderr
+        pass
+
+
+def serve_prometheus(port=9464, host='127.0.0.1'):
+    """Serves the metrics for Prometheus to scrape at http://host:port/metrics from a background thread.
+
+    Args:
+        port (int): port to listen on (0 picks a free one, see server.server_port).
+        host (str): address to listen on.
+    Returns:
+        server (ThreadingHTTPServer): the server, call shutdown() on it to stop serving.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='arm_controller-metrics', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,25 @@
+"""Abstract Base Class for all joint space trajectories.
+"""
+from abc import ABC, abstractmethod
+
+
+class AbstractTrajectory(ABC):
+
+    @abstractmethod
+    def __init__(self):
+        """Constructs Trajectory class.
+
+        Subclasses set self.duration (seconds) once the trajectory is planned.
+        """
+
+    # abstract method
+    def sample(self, t):
+        """Returns the joint values the trajectory commands at time t.
+
+        Args:
+            t (float): seconds since the start of the trajectory (clamped to [0, duration]).
+
+        Returns:
+            values (ndarray): array of joint values, one per joint in the trajectory.
+        """
+        pass
@@ -0,0 +1,96 @@
+"""Joint space trajectory through several via points without stopping at them.
+
+The path is made of straight joint space segments, each run at the highest
+speed the joint velocity limits allow. Around every via point the velocity is
+changed at constant acceleration over a blend time centred on the via point
+(linear segments with parabolic blends), which rounds the corner instead of
+stopping on it. The arm starts and ends at rest on the first and last point.
+
+    Typical usage example:
+    trajectory = BlendedTrajectory([start, via, end], [0.5] * 5, [2.0] * 5, blend_fractions=[0.5])
+    executor.run(trajectory, write_servos)
+"""
+import numpy as np
+
+from arm_controller.motion.abstract_trajectory import AbstractTrajectory
+
+
+class BlendedTrajectory(AbstractTrajectory):
+
+    def __init__(self, points, max_velocity, max_acceleration, blend_fractions=None):
+        """Constructs a BlendedTrajectory.
+
+        Args:
+            points (ndarray): array of shape (N, J) of joint values: the start, the via points and the end.
+            max_velocity (list[float]): velocity limit of each joint (units per second).
+            max_acceleration (list[float]): acceleration limit of each joint (units per second squared).
+            blend_fractions (list[float]): for each of the N - 2 via points, how much of the
+                shorter neighbouring segment is used to round the corner, from 0 (the sharpest
+                corner the acceleration limits allow) to 1 (the widest). Defaults to 0.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        fractions = np.zeros(max(len(points) - 2, 0)) if blend_fractions is None else \
+            np.clip(np.asarray(blend_fractions, dtype=float), 0.0, 1.0)
+        if len(fractions) != max(len(points) - 2, 0):
+            raise ValueError(f'expected {max(len(points) - 2, 0)} blend fractions, got {len(fractions)}')
+
+        # repeated points would make zero length segments
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(points[1:] != points[:-1], axis=1)
+        corner_fractions = np.concatenate([[0.0], fractions, [0.0]])[keep] if len(points) > 1 else np.zeros(1)
+        self.points = points[keep]
+        self.start = points[0]
+        self.end = points[-1]
+        if len(self.points) == 1:
+            self.duration = 0.0
+            return
+
+        velocity = np.broadcast_to(np.asarray(max_velocity, dtype=float), self.points.shape[1:])
+        acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=float), self.points.shape[1:])
+        delta = np.diff(self.points, axis=0)
+        durations = np.max(np.abs(delta) / velocity, axis=1)
+        count = len(durations)
+
+        for _ in range(100):
+            speeds = np.vstack([np.zeros(delta.shape[1]), delta / durations[:, None], np.zeros(delta.shape[1])])
+            change = np.diff(speeds, axis=0)
+            required = np.max(np.abs(change) / acceleration, axis=1)
+            # a blend may take at most the shorter neighbouring segment, so neighbouring blends never overlap
+            cap = np.minimum(np.concatenate([[np.inf], durations]), np.concatenate([durations, [np.inf]]))
+            if np.all(required <= cap * (1.0 + 1e-9)):
+                break
+            # corner too sharp for the acceleration limits: slow the neighbouring segments down
+            scale = np.sqrt(np.maximum(required / cap, 1.0))
+            durations = durations * np.maximum(scale[:-1], scale[1:])
+
+        blends = np.minimum(np.maximum(required, corner_fractions * cap), cap)
+        self._times = np.concatenate([[0.0], np.cumsum(durations)])
+        self._speeds = speeds
+        self._blends = blends
+        self._accelerations = change / np.where(blends > 0.0, blends, 1.0)[:, None]
+        self._offset = blends[0] / 2.0
+        self.duration = self._times[-1] + blends[-1] / 2.0 + self._offset
+        self._count = count
+
+    def sample(self, t):
+        """Returns the joint values the trajectory commands at time t.
+
+        Args:
+            t (float): seconds since the start of the trajectory (clamped to [0, duration]).
+
+        Returns:
+            values (ndarray): array of joint values, one per joint in the trajectory.
+        """
+        if t >= self.duration:
+            return self.end.copy()
+        t = max(t, 0.0) - self._offset
+        k = int(np.searchsorted(self._times, t))
+        for corner in (k - 1, k):
+            if 0 <= corner <= self._count and abs(t - self._times[corner]) <= self._blends[corner] / 2.0:
+                half = self._blends[corner] / 2.0
+                elapsed = t - self._times[corner] + half
+                incoming = self._speeds[corner]
+                return (self.points[corner] - incoming * half + incoming * elapsed
+                        + 0.5 * self._accelerations[corner] * elapsed * elapsed)
+        segment = min(max(k - 1, 0), self._count - 1)
+        return self.points[segment] + self._speeds[segment + 1] * (t - self._times[segment])
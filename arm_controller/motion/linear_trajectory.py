@@ -0,0 +1,38 @@
+"""Constant speed joint space trajectory.
+"""
+import numpy as np
+
+from arm_controller.motion.abstract_trajectory import AbstractTrajectory
+
+
+class LinearTrajectory(AbstractTrajectory):
+
+    def __init__(self, start, end, speed):
+        """Constructs a LinearTrajectory.
+
+        All joints move in a straight line through joint space and arrive
+        together; the joint with the largest travel moves at the given speed.
+
+        Args:
+            start (list[float]): joint values at the start of the trajectory.
+            end (list[float]): joint values at the end of the trajectory.
+            speed (float): speed of the joint with the largest travel (units per second).
+        """
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        travel = np.max(np.abs(self.end - self.start)) if self.start.size else 0.0
+        self.duration = travel / speed
+
+    def sample(self, t):
+        """Returns the joint values the trajectory commands at time t.
+
+        Args:
+            t (float): seconds since the start of the trajectory (clamped to [0, duration]).
+
+        Returns:
+            values (ndarray): array of joint values, one per joint in the trajectory.
+        """
+        if self.duration <= 0.0:
+            return self.end.copy()
+        fraction = min(max(t / self.duration, 0.0), 1.0)
+        return self.start + (self.end - self.start) * fraction
@@ -0,0 +1,127 @@
+"""Velocity and acceleration limited joint space trajectories.
+
+All joints follow one shared time scaling s(t) from 0 to 1, so they stay
+synchronized and arrive together. The time scaling is the minimum time
+profile that keeps every joint within its own velocity and acceleration limit.
+
+    Typical usage example:
+    trajectory = ProfiledTrajectory(start, end, max_velocity=[0.5] * 5, max_acceleration=[2.0] * 5)
+    executor.run(trajectory, write_servos)
+"""
+import math
+import numpy as np
+
+from arm_controller.motion.abstract_trajectory import AbstractTrajectory
+from arm_controller.motion.linear_trajectory import LinearTrajectory
+
+PROFILES = ('linear', 'trapezoidal', 's_curve')
+
+
+class ProfiledTrajectory(AbstractTrajectory):
+
+    def __init__(self, start, end, max_velocity, max_acceleration, profile='trapezoidal'):
+        """Constructs a ProfiledTrajectory.
+
+        Args:
+            start (list[float]): joint values at the start of the trajectory.
+            end (list[float]): joint values at the end of the trajectory.
+            max_velocity (list[float]): velocity limit of each joint (units per second).
+            max_acceleration (list[float]): acceleration limit of each joint (units per second squared).
+            profile (str): 'trapezoidal' (constant acceleration ramps) or 's_curve'
+                (sine squared acceleration ramps, continuous acceleration and bounded jerk).
+        """
+        if profile not in ('trapezoidal', 's_curve'):
+            raise ValueError(f'unknown motion profile {profile}')
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.profile = profile
+        travel = np.abs(self.end - self.start)
+        moving = travel > 0.0
+
+        if not np.any(moving):
+            self.duration = 0.0
+            return
+
+        # limits of the shared path parameter s, set by the most constrained joint
+        velocity = np.broadcast_to(np.asarray(max_velocity, dtype=float), travel.shape)
+        acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=float), travel.shape)
+        v = float(np.min(velocity[moving] / travel[moving]))
+        a = float(np.min(acceleration[moving] / travel[moving]))
+
+        if profile == 'trapezoidal':
+            # ramp covers v^2 / 2a, no cruise phase if both ramps cover the whole path
+            if v * v / a > 1.0:
+                v = math.sqrt(a)
+            ramp = v / a
+        else:
+            # sine squared ramp averages half the peak acceleration, covering v^2 / a
+            if 2.0 * v * v / a > 1.0:
+                v = math.sqrt(a / 2.0)
+            ramp = 2.0 * v / a
+
+        self._velocity = v
+        self._acceleration = a
+        self._ramp = ramp
+        self._ramp_distance = v * ramp / 2.0
+        self.duration = 2.0 * ramp + (1.0 - v * ramp) / v
+
+    def _ramp_position(self, t):
+        """Returns s after t seconds of the acceleration ramp.
+        """
+        if self.profile == 'trapezoidal':
+            return 0.5 * self._acceleration * t * t
+        w = 2.0 * math.pi / self._ramp
+        return 0.5 * self._acceleration * (0.5 * t * t + (math.cos(w * t) - 1.0) / (w * w))
+
+    def position(self, t):
+        """Returns the shared path parameter s (0 to 1) at time t.
+        """
+        if t <= 0.0:
+            return 0.0
+        if t >= self.duration:
+            return 1.0
+        if t < self._ramp:
+            return self._ramp_position(t)
+        if t > self.duration - self._ramp:
+            return 1.0 - self._ramp_position(self.duration - t)
+        return self._ramp_distance + self._velocity * (t - self._ramp)
+
+    def sample(self, t):
+        """Returns the joint values the trajectory commands at time t.
+
+        Args:
+            t (float): seconds since the start of the trajectory (clamped to [0, duration]).
+
+        Returns:
+            values (ndarray): array of joint values, one per joint in the trajectory.
+        """
+        if self.duration <= 0.0:
+            return self.end.copy()
+        return self.start + (self.end - self.start) * self.position(t)
+
+
+def plan_trajectory(start, end, max_velocity, max_acceleration, profile='trapezoidal'):
+    """Plans a synchronized joint space move with the given motion profile.
+
+    Args:
+        start (list[float]): joint values at the start of the move.
+        end (list[float]): joint values at the end of the move.
+        max_velocity (list[float]): velocity limit of each joint.
+        max_acceleration (list[float]): acceleration limit of each joint.
+        profile (str): 'linear' (constant speed, ignores acceleration), 'trapezoidal' or 's_curve'.
+
+    Returns:
+        trajectory (AbstractTrajectory): the planned trajectory.
+    """
+    if profile == 'linear':
+        start = np.asarray(start, dtype=float)
+        end = np.asarray(end, dtype=float)
+        travel = np.abs(end - start)
+        moving = travel > 0.0
+        if not np.any(moving):
+            return LinearTrajectory(start, end, 1.0)
+        # speed of the largest travel so that no joint exceeds its own limit
+        velocity = np.broadcast_to(np.asarray(max_velocity, dtype=float), travel.shape)
+        speed = np.max(travel) * float(np.min(velocity[moving] / travel[moving]))
+        return LinearTrajectory(start, end, speed)
+    return ProfiledTrajectory(start, end, max_velocity, max_acceleration, profile)
@@ -0,0 +1,148 @@
+"""Executes joint space trajectories at a fixed control rate.
+
+Setpoints are generated on a grid of absolute deadlines measured from the start
+of the trajectory on a monotonic clock, so time spent writing setpoints does not
+accumulate as drift the way fixed sleeps do. Ticks that are overrun by a whole
+period are skipped and counted as missed deadlines.
+
+    Typical usage example:
+    executor = TrajectoryExecutor(rate=100.0)
+    stats = executor.run(LinearTrajectory(start, end, speed), write_servos)
+"""
+import math
+import time
+import asyncio
+
+from arm_controller import instrumentation
+
+
+class ExecutorStats:
+    """
+    Timing statistics of one executed trajectory
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.missed_deadlines = 0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+        self.duration = 0.0
+
+    @property
+    def mean_lateness(self):
+        """Average seconds a setpoint was written after its deadline.
+        """
+        return self.total_lateness / self.ticks if self.ticks else 0.0
+
+    def __repr__(self):
+        return (f'ExecutorStats(ticks={self.ticks}, missed_deadlines={self.missed_deadlines}, '
+                f'max_lateness={self.max_lateness:.6f}, mean_lateness={self.mean_lateness:.6f})')
+
+
+class TrajectoryExecutor:
+
+    def __init__(self, rate=100.0, clock=time.monotonic, sleep=time.sleep, async_sleep=asyncio.sleep):
+        """Constructs a TrajectoryExecutor.
+
+        Args:
+            rate (float): setpoints written per second (50 - 200 Hz is typical for hobby servos).
+            clock (callable): monotonic clock returning seconds.
+            sleep (callable): function sleeping for the given number of seconds.
+            async_sleep (callable): coroutine function sleeping for the given number of seconds (used by run_async).
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.async_sleep = async_sleep
+        self.stats = ExecutorStats()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Sets the number of setpoints written per second.
+
+        Args:
+            rate (float): setpoints per second.
+        Returns:
+            rate (float): the new rate.
+        """
+        if rate <= 0:
+            raise ValueError(f'control rate must be positive, got {rate}')
+        self.rate = float(rate)
+        self.period = 1.0 / self.rate
+        return self.rate
+
+    def run(self, trajectory, write):
+        """Writes the setpoints of a trajectory until it is finished.
+
+        Args:
+            trajectory (AbstractTrajectory): trajectory to sample.
+            write (callable): called with the joint values of every tick, the
+                last call is always the end of the trajectory.
+        Returns:
+            stats (ExecutorStats): timing statistics of this run (also kept in self.stats).
+        """
+        for delay in self._ticks(trajectory, write):
+            with instrumentation.span('executor.sleep'):
+                self.sleep(delay)
+        return self.stats
+
+    async def run_async(self, trajectory, write):
+        """Writes the setpoints of a trajectory until it is finished without blocking the event loop.
+
+        Waits between ticks with async_sleep, so other tasks run while the
+        arm is moving. Cancelling the task stops the trajectory before the next
+        setpoint; the last setpoint written is the last one commanded.
+
+        Args:
+            trajectory (AbstractTrajectory): trajectory to sample.
+            write (callable): called with the joint values of every tick.
+        Returns:
+            stats (ExecutorStats): timing statistics of this run (also kept in self.stats).
+        """
+        ticks = self._ticks(trajectory, write)
+        try:
+            for delay in ticks:
+                with instrumentation.span('executor.sleep'):
+                    await self.async_sleep(delay)
+        finally:
+            ticks.close()
+        return self.stats
+
+    def _ticks(self, trajectory, write):
+        """Writes the setpoints of a trajectory, yielding the time to wait before each deadline.
+
+        Shared by run and run_async, which only differ in how they wait.
+        """
+        stats = ExecutorStats()
+        self.stats = stats
+        start = self.clock()
+        tick = 0
+        try:
+            while True:
+                deadline = start + tick * self.period
+                now = self.clock()
+                if now < deadline:
+                    yield deadline - now
+                    now = self.clock()
+                elif now - deadline >= self.period:
+                    # overran whole ticks, skip their setpoints instead of falling further behind
+                    skipped = math.floor((now - deadline) / self.period)
+                    stats.missed_deadlines += skipped
+                    instrumentation.count('executor.missed_deadlines', skipped)
+                    tick += skipped
+                    deadline = start + tick * self.period
+
+                lateness = max(now - deadline, 0.0)
+                stats.ticks += 1
+                stats.total_lateness += lateness
+                stats.max_lateness = max(stats.max_lateness, lateness)
+                instrumentation.observe('executor.lateness', lateness)
+
+                t = tick * self.period
+                with instrumentation.span('executor.write'):
+                    if t >= trajectory.duration:
+                        write(trajectory.sample(trajectory.duration))
+                        break
+                    write(trajectory.sample(t))
+                tick += 1
+        finally:
+            stats.duration = self.clock() - start
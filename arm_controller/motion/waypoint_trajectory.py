@@ -0,0 +1,82 @@
+"""Joint space trajectory through a dense sequence of waypoints.
+
+Used for paths planned in Cartesian space (e.g. straight lines): the joint
+values are interpolated linearly between neighbouring waypoints and the
+progress along the waypoints follows a single motion profile, so the path is
+traced in order while every joint stays within its velocity and acceleration limits.
+
+    Typical usage example:
+    trajectory = plan_waypoint_trajectory(waypoints, [0.5] * 5, 2.0)
+    executor.run(trajectory, write_servos)
+"""
+import numpy as np
+
+from arm_controller.motion.abstract_trajectory import AbstractTrajectory
+from arm_controller.motion.profiled_trajectory import plan_trajectory
+
+
+class WaypointTrajectory(AbstractTrajectory):
+
+    def __init__(self, waypoints, timing):
+        """Constructs a WaypointTrajectory.
+
+        Args:
+            waypoints (ndarray): array of shape (N, J) of joint values, one row per waypoint.
+            timing (AbstractTrajectory): one dimensional trajectory from 0 to N - 1 giving
+                the (fractional) waypoint index at each time.
+        """
+        self.waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+        self.timing = timing
+        self.duration = timing.duration
+
+    def sample(self, t):
+        """Returns the joint values the trajectory commands at time t.
+
+        Args:
+            t (float): seconds since the start of the trajectory (clamped to [0, duration]).
+
+        Returns:
+            values (ndarray): array of joint values, one per joint in the trajectory.
+        """
+        last = len(self.waypoints) - 1
+        if last == 0:
+            return self.waypoints[0].copy()
+        index = min(max(float(self.timing.sample(t)[0]), 0.0), float(last))
+        i = min(int(index), last - 1)
+        fraction = index - i
+        return self.waypoints[i] + (self.waypoints[i + 1] - self.waypoints[i]) * fraction
+
+
+def plan_waypoint_trajectory(waypoints, max_velocity, max_acceleration, profile='trapezoidal', max_rate=None):
+    """Plans the timing of a path through evenly spaced waypoints.
+
+    The waypoint index is treated as a single joint: its velocity and acceleration
+    limits are those of the most constrained joint over the largest step between
+    neighbouring waypoints.
+
+    Args:
+        waypoints (ndarray): array of shape (N, J) of joint values, one row per waypoint.
+        max_velocity (list[float]): velocity limit of each joint.
+        max_acceleration (list[float]): acceleration limit of each joint.
+        profile (str): 'linear', 'trapezoidal' or 's_curve' (see plan_trajectory).
+        max_rate (float): optional limit on waypoints passed per second (e.g. a Cartesian
+            speed divided by the waypoint spacing).
+
+    Returns:
+        trajectory (WaypointTrajectory): the planned trajectory.
+    """
+    waypoints = np.atleast_2d(np.asarray(waypoints, dtype=float))
+    last = len(waypoints) - 1
+    step = np.max(np.abs(np.diff(waypoints, axis=0)), axis=0) if last > 0 else np.zeros(waypoints.shape[1])
+    moving = step > 0.0
+    if not np.any(moving):
+        return WaypointTrajectory(waypoints, plan_trajectory([last], [last], [1.0], [1.0], profile))
+
+    velocity = np.broadcast_to(np.asarray(max_velocity, dtype=float), step.shape)
+    acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=float), step.shape)
+    rate = float(np.min(velocity[moving] / step[moving]))
+    if max_rate is not None:
+        rate = min(rate, max_rate)
+    rate_acceleration = float(np.min(acceleration[moving] / step[moving]))
+    timing = plan_trajectory([0.0], [float(last)], [rate], [rate_acceleration], profile)
+    return WaypointTrajectory(waypoints, timing)
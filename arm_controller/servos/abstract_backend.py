@@ -0,0 +1,46 @@
+"""Abstract Base Class for all servo board backends.
+
+A backend is the hardware layer of an arm: it receives the servo angles of
+every control tick and provides the clock the arm's executor schedules ticks
+on, so a simulated board can also run the arm in virtual time.
+"""
+import time
+import asyncio
+from abc import ABC, abstractmethod
+
+
+class AbstractBackend(ABC):
+
+    @abstractmethod
+    def __init__(self):
+        """Constructs Backend class.
+        """
+
+    # abstract method
+    def set_angles(self, angles):
+        """Writes the angles of one control tick to the servos.
+
+        Args:
+            angles (dict): mapping from servo channel to angle in degrees.
+        """
+        pass
+
+    def clock(self):
+        """Returns the current time of the backend in seconds (monotonic).
+        """
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Waits for the given number of seconds of backend time.
+        """
+        time.sleep(seconds)
+
+    async def async_sleep(self, seconds):
+        """Waits for the given number of seconds of backend time without blocking the event loop.
+        """
+        await asyncio.sleep(seconds)
+
+    def close(self):
+        """Releases the hardware used by the backend.
+        """
+        pass
@@ -0,0 +1,184 @@
+"""Batched servo output for the PCA9685 PWM driver used by the Adafruit ServoKit.
+
+Setting ServoKit servo angles one at a time costs one I2C transaction per
+joint. BatchedServoWriter stages the angles of every joint for a control tick
+and writes them with one transaction: the PCA9685 auto-increments the register
+address, so the LEDn_ON/LEDn_OFF registers of neighbouring channels can be
+written in one block starting at the lowest staged channel.
+
+Pulse widths are computed exactly like adafruit_motor.servo.Servo, so an angle
+written here produces the same register values as kit.servo[n].angle.
+
+    Typical usage example:
+    writer = BatchedServoWriter(kit._pca.i2c_device, frequency=kit._pca.frequency)
+    writer.set_angle(0, 90.0)
+    writer.set_angle(1, 45.0)
+    writer.flush() # one I2C transaction
+"""
+import struct
+
+_MODE1 = 0x00
+_MODE1_AI = 0x20
+_LED0_ON_L = 0x06
+_CHANNEL_BYTES = 4
+
+
+class BatchedServoWriter:
+
+    def __init__(self, i2c_device, channels=16, frequency=50.0, min_pulse=750, max_pulse=2250, actuation_range=180):
+        """Constructs a BatchedServoWriter and turns on register auto-increment.
+
+        Args:
+            i2c_device: the PCA9685's I2C device (an adafruit_bus_device I2CDevice, e.g.
+                kit._pca.i2c_device, or a FakePCA9685).
+            channels (int): number of PWM channels on the board.
+            frequency (float): PWM frequency the board is running at in Hz (kit._pca.frequency).
+            min_pulse (int): pulse width at 0 degrees in microseconds (ServoKit default 750).
+            max_pulse (int): pulse width at actuation_range degrees in microseconds (ServoKit default 2250).
+            actuation_range (float): range of motion of the servos in degrees (ServoKit default 180).
+        """
+        self.i2c_device = i2c_device
+        self.channels = channels
+        self.actuation_range = actuation_range
+        self._min_duty = int((min_pulse * frequency) / 1000000 * 0xFFFF)
+        max_duty = (max_pulse * frequency) / 1000000 * 0xFFFF
+        self._duty_range = int(max_duty - self._min_duty)
+        # last (on, off) register values written to each channel, None if never written
+        self._registers = [None] * channels
+        self._staged = {}
+        self.transactions = 0
+
+        mode = bytearray(1)
+        with self.i2c_device as device:
+            device.write_then_readinto(bytes([_MODE1]), mode)
+        self.transactions += 1
+        if not mode[0] & _MODE1_AI:
+            with self.i2c_device as device:
+                device.write(bytes([_MODE1, mode[0] | _MODE1_AI]))
+            self.transactions += 1
+
+    def set_angle(self, channel, angle):
+        """Stages the angle of a servo, written on the next flush.
+
+        Args:
+            channel (int): PWM channel of the servo.
+            angle (float): angle in degrees, between 0 and actuation_range.
+
+        Raises:
+            ValueError: if the channel or angle is out of range.
+        """
+        if not 0 <= channel < self.channels:
+            raise ValueError(f'channel {channel} out of range')
+        if not 0 <= angle <= self.actuation_range:
+            raise ValueError('Angle out of range')
+        duty_cycle = self._min_duty + int(angle / self.actuation_range * self._duty_range)
+        self._staged[channel] = self._duty_cycle_registers(duty_cycle)
+
+    def flush(self):
+        """Writes every staged angle in one I2C transaction.
+
+        Channels between the staged ones are rewritten with their last values so
+        the block stays contiguous; if one of them has never been written the
+        block is split around it instead.
+
+        Returns:
+            transactions (int): the number of I2C transactions used (0 if nothing was staged).
+        """
+        if not self._staged:
+            return 0
+        registers = list(self._registers)
+        for channel, value in self._staged.items():
+            registers[channel] = value
+        staged = sorted(self._staged)
+        self._staged = {}
+
+        blocks = []
+        first = staged[0]
+        for channel in range(staged[0], staged[-1] + 1):
+            if registers[channel] is None:
+                if first is not None:
+                    blocks.append((first, channel))
+                first = None
+            elif first is None:
+                first = channel
+        blocks.append((first, staged[-1] + 1))
+
+        for first, last in blocks:
+            buffer = bytearray([_LED0_ON_L + _CHANNEL_BYTES * first])
+            for channel in range(first, last):
+                buffer += struct.pack('<HH', *registers[channel])
+            with self.i2c_device as device:
+                device.write(buffer)
+        self._registers = registers
+        self.transactions += len(blocks)
+        return len(blocks)
+
+    @staticmethod
+    def _duty_cycle_registers(duty_cycle):
+        """Converts a 16 bit duty cycle to LEDn_ON and LEDn_OFF values the way adafruit_pca9685 does.
+        """
+        if duty_cycle == 0xFFFF:
+            return (0x1000, 0)
+        if duty_cycle < 0x0010:
+            return (0, 0x1000)
+        return (0, duty_cycle >> 4)
+
+
+class FakePCA9685:
+    """In-memory PCA9685 with the I2CDevice interface, for testing without hardware.
+
+    Keeps the 256 registers of the chip, honours the MODE1 auto-increment bit and
+    counts the transactions and bytes written to it.
+    """
+
+    def __init__(self):
+        self.registers = bytearray(256)
+        self.transactions = 0
+        self.bytes_written = 0
+        self._pointer = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, buf, *, start=0, end=None):
+        """Writes a register address followed by data, like an I2C write to the chip.
+        """
+        self.transactions += 1
+        self._receive(bytes(buf[start:end]))
+
+    def _receive(self, data):
+        """Stores the bytes of a write, the first one being the register address.
+        """
+        self.bytes_written += len(data)
+        if not data:
+            return
+        self._pointer = data[0]
+        for value in data[1:]:
+            self.registers[self._pointer] = value
+            if self.registers[_MODE1] & _MODE1_AI:
+                self._pointer = (self._pointer + 1) % len(self.registers)
+
+    def readinto(self, buf, *, start=0, end=None):
+        """Reads registers starting at the current register address.
+        """
+        end = len(buf) if end is None else end
+        for i in range(start, end):
+            buf[i] = self.registers[self._pointer]
+            if self.registers[_MODE1] & _MODE1_AI:
+                self._pointer = (self._pointer + 1) % len(self.registers)
+
+    def write_then_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        """Sets the register address and reads back in one transaction.
+        """
+        self.transactions += 1
+        self._receive(bytes(out_buffer[out_start:out_end]))
+        self.readinto(in_buffer, start=in_start, end=in_end)
+
+    def channel_registers(self, channel):
+        """Returns the (LEDn_ON, LEDn_OFF) values of a channel.
+        """
+        address = _LED0_ON_L + _CHANNEL_BYTES * channel
+        return struct.unpack('<HH', bytes(self.registers[address:address + _CHANNEL_BYTES]))
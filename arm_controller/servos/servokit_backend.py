@@ -0,0 +1,39 @@
+"""Backend driving the servos of an Adafruit 16-channel PWM/Servo board (PCA9685).
+
+adafruit_servokit is only imported when the backend is constructed, so the
+rest of the library can be used on machines without it.
+"""
+from arm_controller.servos.abstract_backend import AbstractBackend
+from arm_controller.servos.pca9685 import BatchedServoWriter
+
+
+class ServoKitBackend(AbstractBackend):
+
+    def __init__(self, channels=16, **kwargs):
+        """Constructs ServoKitBackend class.
+
+        Args:
+            channels (int): number of channels on the board (8 or 16).
+            **kwargs: passed to adafruit_servokit.ServoKit (e.g. address, frequency).
+        """
+        from adafruit_servokit import ServoKit
+
+        self.kit = ServoKit(channels=channels, **kwargs)
+        # writes the setpoints of every servo of a control tick in one I2C transaction
+        self.writer = BatchedServoWriter(self.kit._pca.i2c_device, channels=channels,
+                                         frequency=self.kit._pca.frequency)
+
+    def set_angles(self, angles):
+        """Writes the angles of one control tick to the servos in one I2C transaction.
+
+        Args:
+            angles (dict): mapping from servo channel to angle in degrees.
+        """
+        for channel, angle in angles.items():
+            self.writer.set_angle(channel, angle)
+        self.writer.flush()
+
+    def close(self):
+        """Resets the PCA9685, turning every servo output off.
+        """
+        self.kit._pca.deinit()
@@ -0,0 +1,163 @@
+"""Backend simulating a servo board, for running arms without hardware.
+
+Every servo follows its commanded angle at a limited slew rate after a fixed
+command latency, so the physical position lags the setpoints the way a real
+hobby servo does. Time is virtual: with time_scale None sleeping only advances
+the simulated clock (full moves run as fast as they can be computed), otherwise
+the simulation runs time_scale times faster than real time.
+
+    Typical usage example:
+    backend = SimulatedBackend(slew_rate=300.0, latency=0.02)
+    arm = MechatronicsArm(backend=backend)
+    arm.move_to(0.04, 0.06, 0.09)
+    print(backend.clock(), backend.get_angles())
+"""
+import math
+import time
+import asyncio
+from collections import deque
+
+from arm_controller.servos.abstract_backend import AbstractBackend
+
+
+class SimulatedBackend(AbstractBackend):
+
+    def __init__(self, channels=16, slew_rate=300.0, latency=0.02, write_time=0.0, time_scale=None,
+                 actuation_range=180):
+        """Constructs SimulatedBackend class.
+
+        Args:
+            channels (int): number of servo channels on the simulated board.
+            slew_rate (float): fastest a servo turns in degrees per second.
+            latency (float): seconds between a command being written and the servo reacting to it.
+            write_time (float): seconds every set_angles call takes (time spent on the bus).
+            time_scale (float): None to run in virtual time, otherwise how many times faster than
+                real time the simulation runs (1.0 is real time).
+            actuation_range (float): range of motion of the servos in degrees.
+        """
+        if time_scale is not None and time_scale <= 0:
+            raise ValueError(f'time scale must be positive or None, got {time_scale}')
+        self.channels = channels
+        self.slew_rate = slew_rate
+        self.latency = latency
+        self.write_time = write_time
+        self.time_scale = time_scale
+        self.actuation_range = actuation_range
+        self.writes = 0
+        # last commanded angle of each channel (None if never commanded)
+        self.commanded = [None] * channels
+
+        self._now = 0.0
+        self._origin = time.monotonic()
+        self._positions = [None] * channels
+        self._targets = [None] * channels
+        self._updated = [0.0] * channels
+        self._pending = [deque() for _ in range(channels)]
+
+    def clock(self):
+        """Returns the simulated time in seconds.
+        """
+        if self.time_scale is None:
+            return self._now
+        return (time.monotonic() - self._origin) * self.time_scale
+
+    def sleep(self, seconds):
+        """Waits for the given number of seconds of simulated time.
+        """
+        if seconds <= 0:
+            return
+        if self.time_scale is None:
+            self._now += seconds
+        else:
+            time.sleep(seconds / self.time_scale)
+
+    async def async_sleep(self, seconds):
+        """Waits for the given number of seconds of simulated time without blocking the event loop.
+        """
+        if self.time_scale is None:
+            self._now += max(seconds, 0.0)
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(max(seconds, 0.0) / self.time_scale)
+
+    def set_angles(self, angles):
+        """Writes the angles of one control tick to the simulated servos.
+
+        Args:
+            angles (dict): mapping from servo channel to angle in degrees.
+
+        Raises:
+            ValueError: if a channel or angle is out of range.
+        """
+        for channel, angle in angles.items():
+            if not 0 <= channel < self.channels:
+                raise ValueError(f'channel {channel} out of range')
+            if not 0 <= angle <= self.actuation_range:
+                raise ValueError('Angle out of range')
+        now = self.clock()
+        for channel, angle in angles.items():
+            self._pending[channel].append((now + self.latency, float(angle)))
+            self.commanded[channel] = float(angle)
+        self.writes += 1
+        self.sleep(self.write_time)
+
+    def get_angles(self):
+        """Returns the simulated physical angle of every servo that has been commanded.
+
+        Returns:
+            angles (dict): mapping from servo channel to its current angle in degrees.
+        """
+        now = self.clock()
+        angles = {}
+        for channel in range(self.channels):
+            self._advance(channel, now)
+            if self._positions[channel] is not None:
+                angles[channel] = self._positions[channel]
+        return angles
+
+    def settle(self, tolerance=0.5, timeout=5.0, step=0.005):
+        """Waits until every servo is within tolerance of its commanded angle.
+
+        Args:
+            tolerance (float): accepted difference in degrees.
+            timeout (float): longest time to wait in seconds.
+            step (float): time between checks in seconds.
+        Returns:
+            waited (float): the seconds waited, timeout if the servos did not settle.
+        """
+        start = self.clock()
+        while self.clock() - start < timeout:
+            angles = self.get_angles()
+            # a servo whose first command has not arrived yet has no position and is not settled
+            if all(channel in angles and abs(angles[channel] - angle) <= tolerance
+                   for channel, angle in enumerate(self.commanded) if angle is not None):
+                return self.clock() - start
+            self.sleep(step)
+        return timeout
+
+    def _advance(self, channel, t):
+        """Moves a simulated servo up to time t, applying the commands that reached it in between.
+        """
+        pending = self._pending[channel]
+        while pending and pending[0][0] <= t:
+            arrival, angle = pending.popleft()
+            self._slew(channel, arrival)
+            if self._positions[channel] is None:
+                # a servo's position is unknown until its first command, it jumps there
+                self._positions[channel] = angle
+            self._targets[channel] = angle
+        self._slew(channel, t)
+
+    def _slew(self, channel, t):
+        """Turns a simulated servo towards its target at the slew rate until time t.
+        """
+        elapsed = t - self._updated[channel]
+        self._updated[channel] = max(t, self._updated[channel])
+        position, target = self._positions[channel], self._targets[channel]
+        if position is None or target is None or elapsed <= 0:
+            return
+        step = self.slew_rate * elapsed
+        if abs(target - position) <= step:
+            self._positions[channel] = target
+        else:
+            self._positions[channel] = position + math.copysign(step, target - position)
@@ -0,0 +1,101 @@
+"""Registry of the kinematic solvers, selected by name and imported on first use.
+
+Every solver module imports its kinematics library when it is imported (IKPy
+pulls in sympy and scipy.optimize, RTBSolver roboticstoolbox, PyKDLSolver
+PyKDL), so the arms only name the solver they are configured with and the
+registry imports that one module when the solver is created.
+
+    Typical usage example:
+    solver = create_solver('native', chain)
+    arm = MechatronicsArm(solver='analytic')
+    register_solver('mine', 'my_package.my_solver:MySolver')
+
+The arms' default solver is DEFAULT_SOLVER unless the ARM_CONTROLLER_SOLVER
+environment variable names another one.
+"""
+import os
+import importlib
+
+DEFAULT_SOLVER = 'ikpy'
+
+# solver classes by name, as 'module:Class' paths until they are first used
+_solvers = {
+    'ikpy': 'arm_controller.solvers.ikpy_solver:IKPySolver',
+    'native': 'arm_controller.solvers.native_solver:NativeSolver',
+    'analytic': 'arm_controller.solvers.analytic_solver:AnalyticSolver',
+    'rtb': 'arm_controller.solvers.rtb_solver:RTBSolver',
+    'pykdl': 'arm_controller.solvers.pykdl_solver:PyKDLSolver',
+}
+
+
+def _import(path):
+    """Imports a solver class from its 'module:Class' path.
+    """
+    module, _, name = path.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def register_solver(name, solver):
+    """Makes a solver available by name (replacing a solver registered under the same name).
+
+    Args:
+        name (str): name to select the solver by.
+        solver (type | str): the solver class, or its 'module:Class' path to import it only when first used.
+    """
+    _solvers[name] = solver
+
+
+def solver_names():
+    """Returns the names of every registered solver (whether or not its library is installed).
+    """
+    return list(_solvers)
+
+
+def solver_class(name):
+    """Returns the class of a registered solver, importing its module the first time.
+
+    Args:
+        name (str): name of the solver.
+    Returns:
+        solver (type): the solver class.
+
+    Raises:
+        ValueError: if no solver is registered under that name.
+        ImportError: if the solver's library is not installed.
+    """
+    try:
+        solver = _solvers[name]
+    except KeyError:
+        raise ValueError(f"unknown solver '{name}', choose one of: {', '.join(_solvers)}") from None
+    if isinstance(solver, str):
+        try:
+            solver = _import(solver)
+        except ImportError as error:
+            raise ImportError(f"solver '{name}' is not available: {error}") from error
+        _solvers[name] = solver
+    return solver
+
+
+def create_solver(solver, chain, **kwargs):
+    """Creates a solver for a chain.
+
+    Args:
+        solver (str | type | AbstractSolver): a registered name, a 'module:Class' path, a solver class,
+            or an already created solver (returned as is). None selects the ARM_CONTROLLER_SOLVER
+            environment variable, or DEFAULT_SOLVER if it is not set.
+        chain (PyChain): chain the solver is created for.
+        **kwargs: passed to the solver's constructor.
+    Returns:
+        solver (AbstractSolver): the solver.
+
+    Raises:
+        ValueError: if the name is not registered.
+        ImportError: if the solver's library is not installed.
+    """
+    if solver is None:
+        solver = os.environ.get('ARM_CONTROLLER_SOLVER') or DEFAULT_SOLVER
+    if isinstance(solver, str):
+        solver = _import(solver) if ':' in solver and solver not in _solvers else solver_class(solver)
+    if isinstance(solver, type):
+        return solver(chain, **kwargs)
+    return solver
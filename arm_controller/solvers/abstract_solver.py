@@ -1,8 +1,10 @@
 """Abstract Solver class and requisite methods
+
+scipy's Rotation is only imported by the helpers that use it, importing scipy.spatial
+takes longer than everything else an arm imports.
 """
 from abc import ABC
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
 def matrix4x4_to_xyz_rpy(matrix):
     """Takes a 4x4 transformation matrix and returns a tuple of the xyz coordinates and rpy values extracted from the matrix
@@ -14,12 +16,30 @@ def matrix4x4_to_xyz_rpy(matrix):
         xyz(list[float]): x,y,z coordinates
         rpy(list[float]): roll, pitch, and yaw values
     """
+    from scipy.spatial.transform import Rotation as R
     xyz = matrix[:-1, -1]
     r = R.from_matrix(matrix[:-1, :-1])
     rpy = r.as_rotvec()
     return xyz, rpy
 
 
+def matrices4x4_to_xyz_rpy(matrices):
+    """Takes N 4x4 transformation matrices and returns the xyz coordinates and rpy values extracted from each
+
+    Args:
+        matrices: array of shape (N, 4, 4) of transformation matrices to convert into xyz rpy
+
+    Returns:
+        xyz(ndarray): array of shape (N, 3) of x,y,z coordinates
+        rpy(ndarray): array of shape (N, 3) of roll, pitch, and yaw values
+    """
+    from scipy.spatial.transform import Rotation as R
+    matrices = np.asarray(matrices, dtype=float)
+    xyz = matrices[:, :-1, -1]
+    rpy = R.from_matrix(matrices[:, :-1, :-1]).as_rotvec()
+    return xyz, rpy
+
+
 def xyz_rpy_to_matrix4x4(xyz, rpy):
     """Takes xyz coordinates and rpy values and returns a 4x4 transformation matrix created from those values
 
@@ -30,6 +50,7 @@ def xyz_rpy_to_matrix4x4(xyz, rpy):
     Returns:
         matrix: Transformation matrix created from xyz and rpy values
     """
+    from scipy.spatial.transform import Rotation as R
     matrix = np.eye(4)
     r = R.from_rotvec(rpy)
     matrix[:-1, :-1] = r.as_matrix()
@@ -37,6 +58,26 @@ def xyz_rpy_to_matrix4x4(xyz, rpy):
     return matrix
 
 
+def damped_least_squares(jacobian, error, damping=1e-3):
+    """Takes a Jacobian and a task space error and returns the damped least squares joint step
+
+    Minimizes |J dq - e|^2 + damping^2 |dq|^2, i.e. dq = J^T (J J^T + damping^2 I)^-1 e. Away from
+    singularities this is the pseudo-inverse step, near them the damping keeps the step bounded.
+
+    Args:
+        jacobian: array of shape (M, N), M task space rows and N joint columns
+        error: array of shape (M,) of the task space error
+        damping(float): damping factor, in the units of the error
+
+    Returns:
+        step: array of shape (N,) of joint deltas
+    """
+    jacobian = np.asarray(jacobian, dtype=float)
+    error = np.asarray(error, dtype=float)
+    system = jacobian @ jacobian.T + damping * damping * np.eye(len(error))
+    return jacobian.T @ np.linalg.solve(system, error)
+
+
 class AbstractSolver(ABC):
     def __init__(self, chain):
         """Abstract Kinematic Solver class.
@@ -52,10 +93,36 @@ class AbstractSolver(ABC):
             target_coords (list[float]): target end effector XYZ coordinates.
             target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
             **kwargs:
+                initial_angles (list[float]): angles to start the solve from (warm start)
         Returns:
             angles (list[float]): list of angles for each rotating joint in the chain.
         """
 
+    def inverse_solve_batch(self, target_coords, target_rpy, **kwargs):
+        """Finds the joint angles for a sequence of N target end effectors.
+
+        Every target is solved starting from the solution of the previous one,
+        so neighbouring targets along a continuous path (e.g. a sampled line)
+        converge in a fraction of the iterations of a cold start.
+
+        Args:
+            target_coords (ndarray): array of shape (N, 3) of target end effector XYZ coordinates.
+            target_rpy (ndarray): array of shape (N, 3) of target end effector Roll, Pitch, and Yaw.
+            **kwargs:
+                initial_angles (list[float]): angles to start the first solve from
+                (any other kwargs are passed through to inverse_solve)
+        Returns:
+            angles (ndarray): array of shape (N, J) of angles for each rotating joint in the chain.
+        """
+        target_coords = np.atleast_2d(np.asarray(target_coords, dtype=float))
+        target_rpy = np.broadcast_to(np.asarray(target_rpy, dtype=float), target_coords.shape)
+        seed = kwargs.pop('initial_angles', None)
+        solutions = []
+        for coords, rpy in zip(target_coords, target_rpy):
+            seed = self.inverse_solve(coords, rpy, initial_angles=seed, **kwargs)
+            solutions.append(seed)
+        return np.array(solutions, dtype=float)
+
     def forward_solve(self, angles, **kwargs):
         """Finds the (x, y, z, roll, pitch, yaw) position of the end effector of the chain.
 
@@ -69,3 +136,86 @@ class AbstractSolver(ABC):
             coords (list[float]): list containing XYZ coordinates of the end effector.
             rpy (list[float]): list containing Roll, Pitch, and Yaw of the end effector.
         """
+
+    def forward_solve_batch(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector for N sets of joint angles.
+
+        Solvers that can evaluate many configurations in one array operation
+        override this; the default simply calls forward_solve once per row.
+
+        Args:
+            angles (ndarray): array of shape (N, J), one row of joint angles per configuration.
+            **kwargs: passed through to forward_solve.
+        Returns:
+            coords (ndarray): array of shape (N, 3) of XYZ coordinates of the end effector.
+            rpy (ndarray): array of shape (N, 3) of Roll, Pitch, and Yaw of the end effector.
+        """
+        coords = []
+        rpy = []
+        for row in np.atleast_2d(angles):
+            xyz, orientation = self.forward_solve(row, **kwargs)
+            coords.append(xyz)
+            rpy.append(orientation)
+        return np.array(coords, dtype=float).reshape(-1, 3), np.array(rpy, dtype=float).reshape(-1, 3)
+
+    def jacobian(self, angles, **kwargs):
+        """Finds the geometric Jacobian of the end effector for the given joint angles.
+
+        Rows 0-2 map joint velocities to the linear velocity of the end effector,
+        rows 3-5 to its angular velocity, both expressed in the base frame of the
+        chain. The default estimates it with central differences of forward_solve,
+        solvers that know the structure of the chain override it with the analytic one.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            **kwargs:
+                step (float): finite difference step in radians or meters (default 1e-6)
+        Returns:
+            jacobian (ndarray): array of shape (6, J), one column per joint (zero for fixed joints).
+        """
+        from scipy.spatial.transform import Rotation as R
+        angles = np.asarray(angles, dtype=float)
+        step = kwargs.get('step', 1e-6)
+        jacobian = np.zeros((6, len(angles)))
+        for i in range(len(angles)):
+            ahead = angles.copy()
+            behind = angles.copy()
+            ahead[i] += step
+            behind[i] -= step
+            xyz_ahead, rpy_ahead = self.forward_solve(ahead)
+            xyz_behind, rpy_behind = self.forward_solve(behind)
+            rotation = R.from_rotvec(rpy_ahead) * R.from_rotvec(rpy_behind).inv()
+            jacobian[:3, i] = (np.asarray(xyz_ahead, dtype=float) - np.asarray(xyz_behind, dtype=float)) / (2 * step)
+            jacobian[3:, i] = rotation.as_rotvec() / (2 * step)
+        return jacobian
+
+    def differential_solve(self, angles, delta_coords, delta_rpy=None, **kwargs):
+        """Finds the joint angles that move the end effector by a small correction.
+
+        Takes one damped least squares step through the Jacobian at the given
+        angles instead of solving the full inverse kinematics, so it is cheap
+        enough to run every control tick (e.g. closed-loop visual servoing). It is
+        only accurate for small corrections, the caller closes the loop by
+        measuring the remaining error on the next tick.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            delta_coords (list[float]): XYZ displacement of the end effector in the base frame.
+            delta_rpy (list[float]): rotation of the end effector as a rotation vector in the base frame
+                (None corrects only the position and leaves the orientation free).
+            **kwargs:
+                damping (float): damping factor, larger values give smaller, safer steps near singularities (default 1e-3) |
+                jacobian (ndarray): the Jacobian at angles, if the caller already has it
+        Returns:
+            angles (ndarray): angles of each joint after the step.
+        """
+        angles = np.asarray(angles, dtype=float)
+        jacobian = kwargs.get('jacobian')
+        if jacobian is None:
+            jacobian = self.jacobian(angles)
+        if delta_rpy is None:
+            jacobian = np.asarray(jacobian)[:3]
+            error = np.asarray(delta_coords, dtype=float)
+        else:
+            error = np.concatenate([np.asarray(delta_coords, dtype=float), np.asarray(delta_rpy, dtype=float)])
+        return angles + damped_least_squares(jacobian, error, kwargs.get('damping', 1e-3))
@@ -0,0 +1,230 @@
+"""Implementation of Solver Class that solves the Mechatronics arm geometry in closed form.
+
+The expected chain is a waist yaw joint followed by shoulder and elbow pitch
+joints, a wrist roll about the forearm and a wrist pitch joint (see
+mechatronics_arm.urdf). Holding the wrist roll at the value that makes the wrist
+pitch axis parallel to the shoulder and elbow axes turns the arm into a planar
+three link chain rotated by the waist, which is solved geometrically. Chains
+that do not match this structure fall back to the numerical NativeSolver.
+"""
+import math
+import numpy as np
+
+from arm_controller.chains.py_chain import PyChain
+from arm_controller.solvers.native_solver import NativeSolver
+
+# approach angles tried when no approach is requested (every 5 degrees)
+_APPROACH_SWEEP = np.linspace(-math.pi, math.pi, 72, endpoint=False)
+
+
+def _wrap_into_limits(angles, lower, upper):
+    """Shifts angles by multiples of 2 pi into [lower, upper] where possible.
+
+    Returns:
+        angles (ndarray): the shifted angles.
+        valid (ndarray): boolean mask of the angles that landed inside the limits.
+    """
+    if np.isfinite(lower):
+        wrapped = lower + np.mod(angles - lower, 2 * math.pi)
+    else:
+        wrapped = np.mod(angles + math.pi, 2 * math.pi) - math.pi
+    return wrapped, wrapped <= upper + 1e-9
+
+
+class AnalyticSolver(NativeSolver):
+
+    def __init__(self, chain: PyChain):
+        """Basic constructor for AnalyticSolver class.
+
+        Derives the waist axis, the planar link lengths and the zero offset and
+        direction of every pitch joint from the parsed URDF. If the chain does not
+        have the expected structure self.planar is False and every inverse_solve
+        is done numerically.
+        """
+        super().__init__(chain)
+        lower, upper = self._bounds
+        self._lower = np.full(len(self._active), -np.inf)
+        self._upper = np.full(len(self._active), np.inf)
+        self._lower[self._active] = lower
+        self._upper[self._active] = upper
+        self.planar = self._derive_geometry()
+
+    def _derive_geometry(self):
+        """Measures the planar model of the arm from forward kinematics.
+
+        Returns:
+            planar (bool): whether the chain matches the expected structure.
+        """
+        if len(self._active_index) != 5 or not np.all(self._revolute[self._active_index]):
+            return False
+        waist, shoulder, elbow, roll, pitch = self._active_index
+        axes = [axis if active else None for axis, active in zip(self.chain.model.axes, self._active)]
+
+        def world_axes(q):
+            frames = self._chain_transforms(q)
+            return frames, [None if a is None else frames[i, :3, :3] @ a for i, a in enumerate(axes)]
+
+        # the waist has to turn about the vertical, the arm plane normal is the shoulder axis
+        q = np.zeros(len(self._active))
+        frames, world = world_axes(q)
+        z_axis = np.array([0.0, 0.0, 1.0])
+        if abs(abs(world[waist] @ z_axis) - 1) > 1e-4:
+            return False
+        normal = world[shoulder]
+        if abs(normal @ z_axis) > 1e-3:
+            return False
+
+        # wrist roll value that lines the wrist pitch axis up with the shoulder axis
+        q[roll] = 0.0
+        first = world_axes(q)[1][pitch]
+        q[roll] = math.pi / 2
+        second = world_axes(q)[1][pitch]
+        neutral = math.atan2(second @ normal, first @ normal)
+        for candidate in (neutral, neutral + math.pi, neutral - math.pi):
+            if self._lower[roll] - 1e-9 <= candidate <= self._upper[roll] + 1e-9:
+                neutral = candidate
+                break
+        q[roll] = neutral
+        frames, world = world_axes(q)
+        for i in (shoulder, elbow, pitch):
+            if abs(abs(world[i] @ normal) - 1) > 1e-4:
+                return False
+
+        # planar coordinates: r along the arm (horizontal), h up, origin on the waist axis
+        base = frames[waist, :3, 3]
+        radial = np.cross(normal, z_axis)
+        radial /= np.linalg.norm(radial)
+
+        def planar_points(q):
+            frames = self._chain_transforms(q)
+            points = np.array([frames[shoulder, :3, 3], frames[elbow, :3, 3], frames[pitch, :3, 3], frames[-1, :3, 3]])
+            if np.any(np.abs((points - base) @ normal) > 1e-3):
+                return None
+            return np.stack([(points - base) @ radial, points[:, 2]], axis=1)
+
+        points = planar_points(q)
+        if points is None:
+            return False
+        links = np.diff(points, axis=0)
+        lengths = np.linalg.norm(links, axis=1)
+        if np.any(lengths < 1e-9):
+            return False
+        absolute = np.arctan2(links[:, 1], links[:, 0])
+
+        # the wrist roll must not move the wrist pitch joint
+        moved = q.copy()
+        moved[roll] += 0.5
+        if np.linalg.norm(self._chain_transforms(moved)[pitch, :3, 3] - frames[pitch, :3, 3]) > 1e-6:
+            return False
+
+        # direction each pitch joint turns its link in the plane
+        directions = []
+        for i, link in ((shoulder, 0), (elbow, 1), (pitch, 2)):
+            moved = q.copy()
+            moved[i] += 0.1
+            moved_points = planar_points(moved)
+            if moved_points is None:
+                return False
+            moved_link = moved_points[link + 1] - moved_points[link]
+            turn = math.atan2(moved_link[1], moved_link[0]) - absolute[link]
+            turn = (turn + math.pi) % (2 * math.pi) - math.pi
+            if abs(abs(turn) - 0.1) > 1e-4:
+                return False
+            directions.append(math.copysign(1.0, turn))
+
+        self._joints = (waist, shoulder, elbow, roll, pitch)
+        self._roll_neutral = neutral
+        self._base = base
+        self._radial_azimuth = math.atan2(radial[1], radial[0])
+        self._waist_direction = math.copysign(1.0, world[waist] @ z_axis)
+        self._shoulder_point = points[0]
+        self._lengths = lengths
+        self._offsets = np.array([absolute[0], absolute[1] - absolute[0], absolute[2] - absolute[1]])
+        self._directions = np.array(directions)
+        return True
+
+    def inverse_solve_all(self, target_coords, target_rpy, **kwargs):
+        """Finds every analytic solution for the target end effector.
+
+        Returns both waist branches (facing the target and reaching over the
+        back) with both elbow-up and elbow-down solutions, keeping only those
+        inside the joint limits.
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            target_rpy (list[float]): target end effector Roll, Pitch, and Yaw (not used, see approach).
+            **kwargs:
+                approach (float): angle of the claw in the arm's vertical plane, measured
+                    from horizontal (radians). Without it a sweep of approach angles is solved.
+        Returns:
+            angles (ndarray): array of shape (K, J) of solutions, K may be 0.
+        """
+        if not self.planar:
+            return np.empty((0, len(self._active)))
+        waist, shoulder, elbow, roll, pitch = self._joints
+        l1, l2, l3 = self._lengths
+        target = np.asarray(target_coords, dtype=float)
+
+        approach = kwargs.get('approach')
+        approach = _APPROACH_SWEEP if approach is None else np.atleast_1d(np.asarray(approach, dtype=float))
+
+        dx, dy = target[0] - self._base[0], target[1] - self._base[1]
+        heading = math.atan2(dy, dx) - self._radial_azimuth
+        reach = math.hypot(dx, dy)
+
+        # candidate grid: waist branch x elbow branch x approach angle
+        side = np.repeat([1.0, -1.0], 2 * len(approach))
+        bend = np.tile(np.repeat([1.0, -1.0], len(approach)), 2)
+        phi = np.tile(approach, 4)
+        # reaching over the back mirrors the target in the arm plane and the approach with it
+        phi = np.where(side > 0, phi, math.pi - phi)
+
+        wrist_r = side * reach - l3 * np.cos(phi) - self._shoulder_point[0]
+        wrist_h = target[2] - l3 * np.sin(phi) - self._shoulder_point[1]
+        cos_beta = (wrist_r ** 2 + wrist_h ** 2 - l1 ** 2 - l2 ** 2) / (2 * l1 * l2)
+        reachable = np.abs(cos_beta) <= 1.0
+        beta = bend * np.arccos(np.clip(cos_beta, -1.0, 1.0))
+        a1 = np.arctan2(wrist_h, wrist_r) - np.arctan2(l2 * np.sin(beta), l1 + l2 * np.cos(beta))
+        a2 = a1 + beta
+
+        solutions = np.zeros((len(phi), len(self._active)))
+        solutions[:, waist] = (heading + np.where(side > 0, 0.0, math.pi)) / self._waist_direction
+        solutions[:, shoulder] = (a1 - self._offsets[0]) / self._directions[0]
+        solutions[:, elbow] = (beta - self._offsets[1]) / self._directions[1]
+        solutions[:, roll] = self._roll_neutral
+        solutions[:, pitch] = (phi - a2 - self._offsets[2]) / self._directions[2]
+
+        valid = reachable
+        for i in (waist, shoulder, elbow, pitch):
+            solutions[:, i], inside = _wrap_into_limits(solutions[:, i], self._lower[i], self._upper[i])
+            valid &= inside
+        return solutions[valid]
+
+    def inverse_solve(self, target_coords, target_rpy, **kwargs):
+        """Finds the angles for each joint of the arm given a target end effector.
+
+        Picks the analytic solution closest to initial_angles (or to the middle
+        of the joint ranges). Falls back to numerical IK when the chain does not
+        match the expected structure or no analytic solution is within limits.
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
+            **kwargs:
+                initial_angles (list[float]): angles the chosen solution should be closest to |
+                approach (float): angle of the claw in the arm's vertical plane (radians)
+        Returns:
+            angles (list[float]): list of angles for each rotating joint in the chain.
+        """
+        solutions = self.inverse_solve_all(target_coords, target_rpy, **kwargs)
+        if len(solutions) == 0:
+            return super().inverse_solve(target_coords, target_rpy, **kwargs)
+
+        if kwargs.get('initial_angles') is not None:
+            reference = np.nan_to_num(np.asarray(kwargs['initial_angles'], dtype=float))
+        else:
+            reference = np.zeros(len(self._active))
+            finite = np.isfinite(self._lower) & np.isfinite(self._upper)
+            reference[finite] = (self._lower[finite] + self._upper[finite]) / 2
+        distance = np.sum(np.abs(solutions - reference)[:, self._active], axis=1)
+        return solutions[np.argmin(distance)]
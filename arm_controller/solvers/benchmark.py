@@ -0,0 +1,268 @@
+"""Speed and accuracy benchmark of the kinematic solvers.
+
+Every solver backend is run against every URDF on the same reproducible set of
+poses: joint configurations are sampled uniformly within the joint limits and
+forward solved with the native solver, so every target is reachable and its
+exact pose is known. For forward kinematics the latency and the difference to
+the native result are measured, for inverse kinematics the latency, how often
+the solution reaches the target within a tolerance and the position and
+orientation error of the solution. Backends whose library is not installed are
+reported as skipped.
+
+    Typical usage example:
+    results = run_benchmarks(samples=200, seed=445)
+    write_results(results, 'benchmark.json')
+
+    python -m arm_controller.solvers.benchmark --samples 200 --output benchmark.json
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import platform
+import numpy as np
+
+from arm_controller.chains.py_chain import PyChain
+from arm_controller.solvers import solver_names, solver_class
+from arm_controller.solvers.native_solver import NativeSolver, matrix_to_rotvec, rotvec_to_matrix
+
+URDF_DIRECTORY = os.path.join(os.path.dirname(__file__), '../urdf')
+
+
+def sample_poses(chain, count, seed=0):
+    """Samples reachable end effector poses of a chain.
+
+    Args:
+        chain (PyChain): chain to sample.
+        count (int): number of poses.
+        seed (int): seed of the random generator, the same seed gives the same poses.
+
+    Returns:
+        angles (ndarray): array of shape (N, J) of the sampled joint values (joints without
+            limits are sampled in [-pi, pi], fixed joints are 0).
+        coords (ndarray): array of shape (N, 3) of the XYZ coordinates of the end effector.
+        rpy (ndarray): array of shape (N, 3) of the orientation of the end effector (rotation vectors).
+    """
+    model = chain.model
+    rng = np.random.default_rng(seed)
+    lower = np.where(np.isfinite(model.lower), model.lower, -np.pi)
+    upper = np.where(np.isfinite(model.upper), model.upper, np.pi)
+    angles = np.where(model.active, rng.uniform(lower, upper, (count, len(model))), 0.0)
+    coords, rpy = NativeSolver(chain).forward_solve_batch(angles)
+    return angles, coords, rpy
+
+
+def _latency(times):
+    """Summarizes call durations (in seconds) as latency percentiles in microseconds and calls per second.
+    """
+    micro = np.asarray(times, dtype=float) * 1e6
+    if len(micro) == 0:
+        return None
+    return {'mean_us': float(np.mean(micro)),
+            'p50_us': float(np.percentile(micro, 50)),
+            'p90_us': float(np.percentile(micro, 90)),
+            'p99_us': float(np.percentile(micro, 99)),
+            'max_us': float(np.max(micro)),
+            'throughput_per_s': float(1e6 * len(micro) / np.sum(micro)) if np.sum(micro) > 0 else None}
+
+
+def _errors(values):
+    """Summarizes errors as median, 90th percentile and maximum.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return None
+    return {'median': float(np.median(values)),
+            'p90': float(np.percentile(values, 90)),
+            'max': float(np.max(values))}
+
+
+def _rotation_errors(rpy, reference):
+    """Returns the angle in radians between pairs of orientations given as rotation vectors.
+    """
+    first = np.array([rotvec_to_matrix(row) for row in rpy]).reshape(-1, 3, 3)
+    second = np.array([rotvec_to_matrix(row) for row in reference]).reshape(-1, 3, 3)
+    return np.linalg.norm(matrix_to_rotvec(first @ np.swapaxes(second, -1, -2)), axis=-1)
+
+
+def benchmark_solver(solver, reference, angles, coords, rpy, seeds, tolerance=1e-3, orientation=False):
+    """Measures the forward and inverse kinematics of one solver on a set of poses.
+
+    Args:
+        solver (AbstractSolver): solver to measure.
+        reference (NativeSolver): solver the results are checked with.
+        angles (ndarray): array of shape (N, J) of the joint values of every pose.
+        coords (ndarray): array of shape (N, 3) of the end effector position of every pose.
+        rpy (ndarray): array of shape (N, 3) of the end effector orientation of every pose.
+        seeds (ndarray): array of shape (N, J) of the angles every inverse solve starts from.
+        tolerance (float): position error in meters below which an inverse solve counts as converged.
+        orientation (bool): whether the inverse solves are asked for the orientation too.
+
+    Returns:
+        results (dict): 'fk' and 'ik' sections with latency, throughput and error statistics.
+    """
+    fk_times = []
+    fk_coords = []
+    fk_rpy = []
+    for row in angles:
+        start = time.perf_counter()
+        xyz, fk_orientation = solver.forward_solve(row)
+        fk_times.append(time.perf_counter() - start)
+        fk_coords.append(np.asarray(xyz, dtype=float))
+        fk_rpy.append(np.asarray(fk_orientation, dtype=float))
+    start = time.perf_counter()
+    solver.forward_solve_batch(angles)
+    batch_time = time.perf_counter() - start
+
+    ik_times = []
+    solutions = []
+    failures = 0
+    for target, target_rpy, seed in zip(coords, rpy, seeds):
+        start = time.perf_counter()
+        try:
+            solution = solver.inverse_solve(target, target_rpy, initial_angles=seed, orientation=orientation)
+        except Exception:
+            solution = None
+        ik_times.append(time.perf_counter() - start)
+        if solution is None:
+            failures += 1
+            solution = np.full(angles.shape[1], np.nan)
+        solutions.append(np.asarray(solution, dtype=float))
+    reached, reached_rpy = reference.forward_solve_batch(np.nan_to_num(np.array(solutions)))
+    solved = ~np.any(np.isnan(solutions), axis=1)
+    position_error = np.linalg.norm(reached - coords, axis=1)[solved]
+    orientation_error = _rotation_errors(reached_rpy, rpy)[solved]
+
+    return {
+        'fk': {
+            'latency': _latency(fk_times),
+            'batch_throughput_per_s': float(len(angles) / batch_time) if batch_time > 0 else None,
+            'position_error': _errors(np.linalg.norm(np.array(fk_coords) - coords, axis=1)),
+            'orientation_error': _errors(_rotation_errors(np.array(fk_rpy), rpy)),
+        },
+        'ik': {
+            'latency': _latency(ik_times),
+            'convergence_rate': float(np.sum(position_error <= tolerance) / len(coords)),
+            'failures': failures,
+            'position_error': _errors(position_error),
+            'orientation_error': _errors(orientation_error),
+        },
+    }
+
+
+def run_benchmarks(urdf_paths=None, backends=None, samples=100, seed=0, tolerance=1e-3, orientation=False):
+    """Benchmarks every backend against every URDF.
+
+    Args:
+        urdf_paths (list[str]): URDF files to load (defaults to every file in arm_controller/urdf).
+        backends (list[str]): names of the registered solvers to run (defaults to all of them).
+        samples (int): number of poses per URDF.
+        seed (int): seed of the pose sampling, the same seed gives the same poses.
+        tolerance (float): position error in meters below which an inverse solve counts as converged.
+        orientation (bool): whether the inverse solves are asked for the orientation too.
+
+    Returns:
+        results (dict): 'meta' describing the run and 'results', one entry per URDF and backend with
+            a 'status' of 'ok', 'skipped' (library not installed) or 'error' (the solver cannot load
+            the URDF), the 'reason' when not ok and the measurements of benchmark_solver.
+    """
+    if urdf_paths is None:
+        urdf_paths = sorted(glob.glob(os.path.join(URDF_DIRECTORY, '*.urdf')))
+    if backends is None:
+        backends = solver_names()
+
+    classes = {}
+    skipped = {}
+    for name in backends:
+        try:
+            classes[name] = solver_class(name)
+        except ImportError as error:
+            skipped[name] = str(error.__cause__ or error)
+
+    results = []
+    for path in urdf_paths:
+        chain = PyChain(urdf_file_path=path)
+        reference = NativeSolver(chain)
+        angles, coords, rpy = sample_poses(chain, samples, seed=seed)
+        # every backend starts each inverse solve from the same random configuration
+        seeds, _, _ = sample_poses(chain, samples, seed=seed + 1)
+        for name in backends:
+            entry = {'urdf': os.path.basename(path), 'backend': name, 'joints': len(chain.model),
+                     'active_joints': int(np.sum(chain.model.active))}
+            if name in skipped:
+                entry.update(status='skipped', reason=skipped[name])
+            else:
+                try:
+                    solver = classes[name](chain)
+                except Exception as error:
+                    entry.update(status='error', reason=f'{type(error).__name__}: {error}')
+                else:
+                    entry.update(status='ok')
+                    entry.update(benchmark_solver(solver, reference, angles, coords, rpy, seeds,
+                                                  tolerance=tolerance, orientation=orientation))
+            results.append(entry)
+
+    return {'meta': {'samples': samples,
+                     'seed': seed,
+                     'tolerance': tolerance,
+                     'orientation': orientation,
+                     'python': platform.python_version(),
+                     'numpy': np.__version__,
+                     'platform': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')},
+            'results': results}
+
+
+def write_results(results, path):
+    """Writes benchmark results to a JSON file.
+
+    Args:
+        results (dict): results returned by run_benchmarks.
+        path (str): file to write.
+    """
+    with open(path, 'w') as fh:
+        json.dump(results, fh, indent=2)
+
+
+def format_results(results):
+    """Returns a one line per URDF and backend text summary of benchmark results.
+    """
+    lines = [f'{"urdf":<24}{"backend":<10}{"fk p50 us":>11}{"ik p50 us":>11}{"ik p99 us":>11}'
+             f'{"converged":>11}{"ik err p90 m":>14}']
+    for entry in results['results']:
+        if entry['status'] != 'ok':
+            lines.append(f'{entry["urdf"]:<24}{entry["backend"]:<10}  {entry["status"]}: {entry["reason"]}')
+            continue
+        fk, ik = entry['fk'], entry['ik']
+        error = ik['position_error']['p90'] if ik['position_error'] else float('nan')
+        lines.append(f'{entry["urdf"]:<24}{entry["backend"]:<10}{fk["latency"]["p50_us"]:>11.1f}'
+                     f'{ik["latency"]["p50_us"]:>11.1f}{ik["latency"]["p99_us"]:>11.1f}'
+                     f'{ik["convergence_rate"]:>11.1%}{error:>14.2e}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Runs the benchmark from the command line, prints a summary and optionally writes the JSON results.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the kinematic solver backends.')
+    parser.add_argument('urdf', nargs='*', help='URDF files to load (defaults to arm_controller/urdf/*.urdf)')
+    parser.add_argument('--backend', action='append', choices=solver_names(), help='backend to run (repeatable)')
+    parser.add_argument('--samples', type=int, default=100, help='number of poses per URDF')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the pose sampling')
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='IK convergence tolerance in meters')
+    parser.add_argument('--orientation', action='store_true', help='solve IK for the orientation too')
+    parser.add_argument('--output', help='JSON file to write the results to')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.urdf or None, args.backend, samples=args.samples, seed=args.seed,
+                             tolerance=args.tolerance, orientation=args.orientation)
+    print(format_results(results))
+    if args.output:
+        write_results(results, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
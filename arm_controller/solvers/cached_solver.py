@@ -0,0 +1,233 @@
+"""Implementation of Solver Class that caches the inverse kinematics results of another solver.
+
+    Typical usage example:
+    solver = CachedSolver(chain, IKPySolver(chain), cache_path='ik_cache.json')
+    angles = solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0])
+    solver.save()
+"""
+import os
+import json
+from collections import OrderedDict
+import numpy as np
+
+from arm_controller.chains.py_chain import PyChain
+from arm_controller.chains.py_urdf import PyURDF
+from arm_controller.solvers.abstract_solver import AbstractSolver
+from arm_controller.solvers.native_solver import matrix_to_rotvec, rotvec_to_matrix
+
+# version of the saved cache files, files of other versions were quantized differently
+CACHE_VERSION = 2
+
+
+class CachedSolver(AbstractSolver):
+
+    def __init__(self, chain: PyChain, solver: AbstractSolver, tolerance=0.0005, rpy_tolerance=0.01,
+                 max_entries=4096, cache_path=None):
+        """Constructs a CachedSolver in front of another solver.
+
+        Targets are quantized to a grid whose cells have a half diagonal of half the
+        tolerance, and every cell is solved once for its center: a cached solution
+        that reaches the center within half the tolerance therefore reaches every
+        target in the cell within the tolerance.
+
+        Args:
+            chain (PyChain): chain the wrapped solver was built from.
+            solver (AbstractSolver): solver to cache the inverse_solve results of.
+            tolerance (float): position error in meters accepted for a solution.
+            rpy_tolerance (float): orientation error in radians accepted for a solution (when the
+                orientation is solved for).
+            max_entries (int): number of solutions kept before the least recently used is evicted.
+            cache_path (str): file to load the cache from (if it exists) and save it to.
+        """
+        self.chain = chain
+        self._solver = solver
+        self.tolerance = tolerance
+        self.rpy_tolerance = rpy_tolerance
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._entries = OrderedDict()
+        # the half diagonal of a cell (sqrt(3) / 2 of its size) is half the tolerance
+        self._cell = tolerance / np.sqrt(3.0)
+        self._rpy_cell = rpy_tolerance / np.sqrt(3.0)
+
+        self._urdf_id = PyURDF.identity(chain.urdf)
+
+        if cache_path is not None and os.path.exists(cache_path):
+            self.load(cache_path)
+
+    def _key(self, target_coords, target_rpy, options=()):
+        """Quantizes a target pose and the options it is solved with into a hashable cache key.
+        """
+        xyz = np.round(np.asarray(target_coords, dtype=float) / self._cell).astype(int)
+        rpy = np.round(np.asarray(target_rpy, dtype=float) / self._rpy_cell).astype(int)
+        return (self._urdf_id, tuple(xyz.tolist()), tuple(rpy.tolist()), tuple(options))
+
+    @staticmethod
+    def _options(kwargs):
+        """Returns the keyword arguments that change the solution (all but the seed) as hashable pairs.
+        """
+        options = []
+        for name in sorted(kwargs):
+            if name == 'initial_angles':
+                continue
+            value = np.asarray(kwargs[name]).tolist()
+            options.append((name, tuple(value) if isinstance(value, list) else value))
+        return tuple(options)
+
+    def inverse_solve(self, target_coords, target_rpy, **kwargs):
+        """Finds the angles for each joint of the arm given a target end effector.
+
+        Returns the cached solution when the target falls in the cell of a
+        previously solved target with the same options and forward solving the
+        cached angles reaches this target within tolerance (and rpy_tolerance when
+        the orientation is solved for); otherwise the wrapped solver is called for
+        the center of the cell and its result cached if it reaches the center
+        within half the tolerances (failed solves and targets out of reach are
+        never cached).
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
+            **kwargs: passed through to the wrapped solver on a miss, all but initial_angles are
+                part of the cache key.
+        Returns:
+            angles (list[float]): list of angles for each rotating joint in the chain.
+        """
+        orientation = bool(kwargs.get('orientation', False))
+        key = self._key(target_coords, target_rpy, self._options(kwargs))
+        entry = self._entries.get(key)
+        if entry is not None:
+            angles, _ = entry
+            if self._reaches(angles, target_coords, target_rpy, orientation, 1.0):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return angles.copy()
+            # the cached solution no longer matches the model, solve it again
+            del self._entries[key]
+            self.rejected += 1
+
+        self.misses += 1
+        center = np.array(key[1], dtype=float) * self._cell
+        center_rpy = np.array(key[2], dtype=float) * self._rpy_cell if orientation else target_rpy
+        angles = np.asarray(self._solver.inverse_solve(center, center_rpy, **kwargs), dtype=float)
+        if self._reaches(angles, center, center_rpy, orientation, 0.5):
+            self._store(key, angles, self._solver.forward_solve(angles)[0])
+        return angles.copy()
+
+    def _reaches(self, angles, target_coords, target_rpy, orientation, fraction):
+        """Whether forward solving angles reaches a target within a fraction of the tolerances.
+        """
+        xyz, rpy = self._solver.forward_solve(angles)
+        distance = np.linalg.norm(np.asarray(xyz, dtype=float) - np.asarray(target_coords, dtype=float))
+        if distance > fraction * self.tolerance:
+            return False
+        if not orientation:
+            return True
+        difference = rotvec_to_matrix(rpy) @ rotvec_to_matrix(target_rpy).T
+        return bool(np.linalg.norm(matrix_to_rotvec(difference)) <= fraction * self.rpy_tolerance)
+
+    def _store(self, key, angles, xyz):
+        """Adds a solution to the cache, evicting the least recently used if full.
+        """
+        self._entries[key] = (np.asarray(angles, dtype=float), np.asarray(xyz, dtype=float))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def forward_solve(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector of the chain.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            **kwargs:
+        Returns:
+            coords (list[float]): list containing XYZ coordinates of the end effector.
+            rpy (list[float]): list containing Roll, Pitch, and Yaw of the end effector.
+        """
+        return self._solver.forward_solve(angles, **kwargs)
+
+    def forward_solve_batch(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector for N sets of joint angles.
+
+        Args:
+            angles (ndarray): array of shape (N, J), one row of joint angles per configuration.
+            **kwargs:
+        Returns:
+            coords (ndarray): array of shape (N, 3) of XYZ coordinates of the end effector.
+            rpy (ndarray): array of shape (N, 3) of Roll, Pitch, and Yaw of the end effector.
+        """
+        return self._solver.forward_solve_batch(angles, **kwargs)
+
+    def segmented_forward_solve(self, angles):
+        """Finds the (x, y, z) position of every joint in the chain (including the end effector).
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+        Returns:
+            coords (list): 2 dimensional list containing sets of (X, Y, Z) coordinates of each joint.
+        """
+        return self._solver.segmented_forward_solve(angles)
+
+    def jacobian(self, angles, **kwargs):
+        """Finds the geometric Jacobian of the end effector (not cached, see the wrapped solver).
+        """
+        return self._solver.jacobian(angles, **kwargs)
+
+    def differential_solve(self, angles, delta_coords, delta_rpy=None, **kwargs):
+        """Finds the joint angles that move the end effector by a small correction (not cached, see the wrapped solver).
+        """
+        return self._solver.differential_solve(angles, delta_coords, delta_rpy, **kwargs)
+
+    def clear(self):
+        """Removes every cached solution and resets the hit/miss counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def save(self, path=None):
+        """Writes the cached solutions to a JSON file.
+
+        Args:
+            path (str): file to write to (defaults to cache_path).
+        """
+        path = path if path is not None else self.cache_path
+        entries = []
+        for (urdf_id, xyz_key, rpy_key, options), (angles, xyz) in self._entries.items():
+            entries.append({'urdf': urdf_id,
+                            'xyz_key': list(xyz_key),
+                            'rpy_key': list(rpy_key),
+                            'options': [list(option) for option in options],
+                            'angles': angles.tolist(),
+                            'xyz': xyz.tolist()})
+        with open(path, 'w') as fh:
+            json.dump({'version': CACHE_VERSION,
+                       'tolerance': self.tolerance,
+                       'rpy_tolerance': self.rpy_tolerance,
+                       'entries': entries}, fh)
+
+    def load(self, path):
+        """Loads cached solutions from a JSON file written by save.
+
+        Files of another cache version and entries quantized with a different
+        tolerance are skipped, entries for other URDF files are kept so one file
+        can be shared between robots.
+
+        Args:
+            path (str): file to read from.
+        """
+        with open(path, 'r') as fh:
+            data = json.load(fh)
+        if data.get('version') != CACHE_VERSION:
+            return
+        if data['tolerance'] != self.tolerance or data['rpy_tolerance'] != self.rpy_tolerance:
+            return
+        for entry in data['entries']:
+            options = tuple((name, tuple(value) if isinstance(value, list) else value)
+                            for name, value in entry['options'])
+            key = (entry['urdf'], tuple(entry['xyz_key']), tuple(entry['rpy_key']), options)
+            self._store(key, entry['angles'], entry['xyz'])
@@ -0,0 +1,317 @@
+"""Self-collision and environment collision checking from URDF geometry.
+
+Every link is covered by the primitives of its <collision> elements (or of its
+<visual> elements when it has none): boxes and cylinders become oriented
+bounding boxes, spheres stay spheres. For a batch of joint configurations the
+primitives are moved with the forward kinematics of their link, then each
+pair that may collide is tested in two phases, vectorized over the whole
+batch: a broad phase rejects pairs whose axis aligned bounding boxes do not
+overlap, and only the remaining (configuration, pair) entries get the exact
+narrow phase test (separating axis test for two boxes, closest point for a
+sphere and a box, center distance for two spheres).
+
+Links connected by a joint and links already touching in the reference pose
+(the chain's default position) are never tested against each other, they
+overlap by construction.
+
+    Typical usage example:
+    checker = CollisionChecker(arm.chain, padding=0.002)
+    checker.add_box('table', size=[1.0, 1.0, 0.02], xyz=[0, 0, -0.02])
+    checker.collisions(angles)                  # [('shoulder_elbow_link', 'table')]
+    checker.in_collision(trajectory_angles)     # one bool per row
+    arm.collision = checker                     # validate every planned move before it runs
+"""
+import numpy as np
+
+from arm_controller.chains.py_chain import PyChain
+from arm_controller.chains.kinematic_model import rpy_to_matrix
+from arm_controller.chains.urdf_object import GeometryType
+from arm_controller.solvers.native_solver import NativeSolver
+
+_OBB = 0
+_SPHERE = 1
+
+
+def _origin(xyz, rpy):
+    """Returns the 4x4 transform of a URDF origin.
+    """
+    transform = np.eye(4)
+    transform[:3, :3] = rpy_to_matrix(np.asarray(rpy, dtype=float))
+    transform[:3, 3] = xyz
+    return transform
+
+
+def _primitive(geometry_type, attrib, padding):
+    """Returns the kind and half extents (radius for spheres) of a URDF geometry, None for meshes.
+    """
+    if geometry_type == GeometryType.BOX:
+        return _OBB, np.asarray(attrib['size'], dtype=float) / 2 + padding
+    if geometry_type == GeometryType.CYLINDER:
+        radius = attrib['radius'] + padding
+        return _OBB, np.array([radius, radius, attrib['length'] / 2 + padding])
+    if geometry_type == GeometryType.SPHERE:
+        return _SPHERE, np.full(3, attrib['radius'] + padding)
+    return None
+
+
+def _obb_overlap(ca, ra, ha, cb, rb, hb):
+    """Separating axis test between M pairs of oriented boxes.
+
+    Args:
+        ca, cb: arrays of shape (M, 3), the box centers.
+        ra, rb: arrays of shape (M, 3, 3), the box orientations.
+        ha, hb: arrays of shape (M, 3), the half extents.
+    Returns:
+        overlap (ndarray): bool array of shape (M,).
+    """
+    rot = np.einsum('mji,mjk->mik', ra, rb)
+    t = np.einsum('mji,mj->mi', ra, cb - ca)
+    abs_rot = np.abs(rot) + 1e-9
+    separated = np.any(np.abs(t) > ha + np.einsum('mk,mik->mi', hb, abs_rot), axis=1)
+    t_b = np.einsum('mi,mik->mk', t, rot)
+    separated |= np.any(np.abs(t_b) > hb + np.einsum('mi,mik->mk', ha, abs_rot), axis=1)
+    for i in range(3):
+        i1, i2 = (i + 1) % 3, (i + 2) % 3
+        for j in range(3):
+            j1, j2 = (j + 1) % 3, (j + 2) % 3
+            radius = (ha[:, i1] * abs_rot[:, i2, j] + ha[:, i2] * abs_rot[:, i1, j]
+                      + hb[:, j1] * abs_rot[:, i, j2] + hb[:, j2] * abs_rot[:, i, j1])
+            separated |= np.abs(t[:, i2] * rot[:, i1, j] - t[:, i1] * rot[:, i2, j]) > radius
+    return ~separated
+
+
+def _sphere_obb_overlap(cs, radius, cb, rb, hb):
+    """Tests M spheres against M oriented boxes by the box point closest to each sphere center.
+    """
+    local = np.einsum('mji,mj->mi', rb, cs - cb)
+    closest = np.clip(local, -hb, hb)
+    return np.sum((local - closest) ** 2, axis=1) <= radius ** 2
+
+
+class CollisionChecker:
+
+    def __init__(self, chain: PyChain, padding=0.0, ignore=(), reference=None):
+        """Builds the collision primitives of every link of the chain.
+
+        Args:
+            chain (PyChain): chain to check.
+            padding (float): safety margin in meters added around every primitive.
+            ignore (list[tuple[str, str]]): extra pairs of link or obstacle names never tested.
+            reference (list[float]): pose whose touching links are not tested (defaults to the
+                chain's default values, joints without one at 0).
+        """
+        self.chain = chain
+        self.padding = padding
+        self._solver = NativeSolver(chain)
+        model = chain.model
+        count = len(model)
+
+        # frame of every link: the joint it is the child of, the base (index count) for the root
+        link_frames = {jnt.child: i for i, jnt in enumerate(chain.urdf.joints)}
+        self.links = [link.name for link in chain.urdf.links]
+        kinds, halves, locals_, frames, owners = [], [], [], [], []
+        for owner, link in enumerate(chain.urdf.links):
+            for geometry in (link.collisions or link.visuals):
+                primitive = _primitive(geometry.geometry_type, geometry.geometry_attrib, padding)
+                if primitive is None:
+                    continue
+                kinds.append(primitive[0])
+                halves.append(primitive[1])
+                locals_.append(_origin(geometry.origin_xyz, geometry.origin_rpy))
+                frames.append(link_frames.get(link.name, count))
+                owners.append(owner)
+        self._link_kinds = np.array(kinds, dtype=int)
+        self._link_halves = np.array(halves, dtype=float).reshape(-1, 3)
+        self._link_locals = np.array(locals_, dtype=float).reshape(-1, 4, 4)
+        self._link_frames = np.array(frames, dtype=int)
+        self._link_owners = np.array(owners, dtype=int)
+
+        # environment primitives, fixed in the base frame of the chain
+        self.obstacles = {}
+
+        ignored = {frozenset(pair) for pair in ignore}
+        for jnt in chain.urdf.joints:
+            ignored.add(frozenset((jnt.parent, jnt.child)))
+        self._ignored = ignored
+        self._rebuild()
+
+        if reference is None:
+            reference = [0.0 if value is None else value for value in chain.get_default_values()]
+        for pair in self.collisions(reference):
+            self._ignored.add(frozenset(pair))
+        self._rebuild()
+
+    def add_box(self, name, size, xyz=(0.0, 0.0, 0.0), rpy=(0.0, 0.0, 0.0)):
+        """Adds a box shaped fixture (in the base frame of the chain).
+
+        Args:
+            name (str): name of the obstacle (replaces an obstacle of the same name).
+            size (list[float]): lengths of the box along its x, y and z axes.
+            xyz (list[float]): position of the box center.
+            rpy (list[float]): orientation of the box (roll, pitch, yaw in radians).
+        """
+        self.obstacles[name] = (_OBB, np.asarray(size, dtype=float) / 2 + self.padding, _origin(xyz, rpy))
+        self._rebuild()
+
+    def add_cylinder(self, name, length, radius, xyz=(0.0, 0.0, 0.0), rpy=(0.0, 0.0, 0.0)):
+        """Adds a cylinder shaped fixture (covered by its bounding box), its axis along its z axis.
+        """
+        self.add_box(name, [2 * radius, 2 * radius, length], xyz, rpy)
+
+    def add_sphere(self, name, radius, xyz=(0.0, 0.0, 0.0)):
+        """Adds a sphere shaped fixture (in the base frame of the chain).
+        """
+        self.obstacles[name] = (_SPHERE, np.full(3, radius + self.padding), _origin(xyz, (0.0, 0.0, 0.0)))
+        self._rebuild()
+
+    def remove_obstacle(self, name):
+        """Removes a fixture added with add_box, add_cylinder or add_sphere.
+        """
+        del self.obstacles[name]
+        self._rebuild()
+
+    def _rebuild(self):
+        """Collects the link and obstacle primitives and the pairs that have to be tested.
+        """
+        count = len(self.chain.model)
+        names = list(self.links) + list(self.obstacles)
+        obstacles = list(self.obstacles.values())
+        self._names = names
+        self._kinds = np.concatenate([self._link_kinds, np.array([o[0] for o in obstacles], dtype=int)])
+        self._halves = np.concatenate([self._link_halves, np.array([o[1] for o in obstacles]).reshape(-1, 3)])
+        self._locals = np.concatenate([self._link_locals, np.array([o[2] for o in obstacles]).reshape(-1, 4, 4)])
+        self._frames = np.concatenate([self._link_frames, np.full(len(obstacles), count, dtype=int)])
+        self._owners = np.concatenate([self._link_owners,
+                                       np.arange(len(self.links), len(names), dtype=int)])
+
+        first, second = [], []
+        for a in range(len(self._kinds)):
+            for b in range(a + 1, len(self._kinds)):
+                owner_a, owner_b = self._owners[a], self._owners[b]
+                if owner_a == owner_b:
+                    continue
+                if owner_a >= len(self.links) and owner_b >= len(self.links):
+                    continue
+                if frozenset((names[owner_a], names[owner_b])) in self._ignored:
+                    continue
+                # spheres come first so mixed pairs are always (sphere, box)
+                if self._kinds[b] == _SPHERE and self._kinds[a] == _OBB:
+                    first.append(b)
+                    second.append(a)
+                else:
+                    first.append(a)
+                    second.append(b)
+        self._first = np.array(first, dtype=int)
+        self._second = np.array(second, dtype=int)
+        pair_kinds = self._kinds[self._first] + self._kinds[self._second] if first else np.zeros(0, dtype=int)
+        self._pair_kinds = pair_kinds
+
+    def _poses(self, angles):
+        """Returns the world transform of every primitive, shape (N, P, 4, 4).
+        """
+        local = self._solver._local_transforms(angles)
+        parents = self.chain.model.parents
+        frames = np.empty((local.shape[0], local.shape[1] + 1, 4, 4))
+        frames[:, -1] = np.eye(4)
+        for i in range(local.shape[1]):
+            frames[:, i] = local[:, i] if parents[i] < 0 else frames[:, parents[i]] @ local[:, i]
+        return frames[:, self._frames] @ self._locals
+
+    def _colliding(self, angles):
+        """Returns a bool array of shape (N, K): whether each tested pair collides in each configuration.
+        """
+        angles = np.nan_to_num(np.atleast_2d(np.asarray(angles, dtype=float)))
+        result = np.zeros((angles.shape[0], len(self._first)), dtype=bool)
+        if not len(self._first):
+            return result
+        poses = self._poses(angles)
+        centers = poses[..., :3, 3]
+        rotations = poses[..., :3, :3]
+        extents = np.einsum('npij,pj->npi', np.abs(rotations), self._halves)
+
+        # broad phase: overlap of the axis aligned bounding boxes of every pair
+        gap = np.abs(centers[:, self._first] - centers[:, self._second])
+        candidates = np.all(gap <= extents[:, self._first] + extents[:, self._second], axis=2)
+        rows, pairs = np.nonzero(candidates)
+        if not len(rows):
+            return result
+
+        # narrow phase: exact test of the candidates only, grouped by the kinds of primitive
+        a, b = self._first[pairs], self._second[pairs]
+        kinds = self._pair_kinds[pairs]
+        hit = np.zeros(len(rows), dtype=bool)
+        boxes = kinds == 2 * _OBB
+        if np.any(boxes):
+            r, i, j = rows[boxes], a[boxes], b[boxes]
+            hit[boxes] = _obb_overlap(centers[r, i], rotations[r, i], self._halves[i],
+                                      centers[r, j], rotations[r, j], self._halves[j])
+        mixed = kinds == _OBB + _SPHERE
+        if np.any(mixed):
+            r, i, j = rows[mixed], a[mixed], b[mixed]
+            hit[mixed] = _sphere_obb_overlap(centers[r, i], self._halves[i, 0],
+                                             centers[r, j], rotations[r, j], self._halves[j])
+        spheres = kinds == 2 * _SPHERE
+        if np.any(spheres):
+            r, i, j = rows[spheres], a[spheres], b[spheres]
+            distance = np.linalg.norm(centers[r, i] - centers[r, j], axis=1)
+            hit[spheres] = distance <= self._halves[i, 0] + self._halves[j, 0]
+        result[rows, pairs] = hit
+        return result
+
+    def in_collision(self, angles):
+        """Checks one or many joint configurations.
+
+        Args:
+            angles (ndarray): array of shape (J,) or (N, J) of joint values (in radians).
+        Returns:
+            colliding (bool | ndarray): whether the configuration collides, one bool per row for (N, J).
+        """
+        colliding = np.any(self._colliding(angles), axis=1)
+        return bool(colliding[0]) if np.ndim(angles) == 1 else colliding
+
+    def collisions(self, angles):
+        """Returns the colliding pairs of one joint configuration.
+
+        Args:
+            angles (list[float]): value of every joint (in radians).
+        Returns:
+            pairs (list[tuple[str, str]]): names of the links or obstacles in contact.
+        """
+        colliding = self._colliding(angles)[0]
+        pairs = set()
+        for k in np.flatnonzero(colliding):
+            a, b = self._owners[self._first[k]], self._owners[self._second[k]]
+            pairs.add(tuple(sorted((self._names[a], self._names[b]))))
+        return sorted(pairs)
+
+    def first_collision(self, angles):
+        """Finds the first colliding row of a sequence of configurations.
+
+        Args:
+            angles (ndarray): array of shape (N, J) of joint values (in radians).
+        Returns:
+            index (int): index of the first colliding row (None if no row collides).
+            pairs (list[tuple[str, str]]): the colliding pairs of that row (empty if none).
+        """
+        colliding = self.in_collision(np.atleast_2d(angles))
+        if not np.any(colliding):
+            return None, []
+        index = int(np.argmax(colliding))
+        return index, self.collisions(np.atleast_2d(angles)[index])
+
+    def check_trajectory(self, trajectory, joints, rate=100.0):
+        """Checks a planned trajectory at the setpoints an executor running at the rate writes.
+
+        Args:
+            trajectory (AbstractTrajectory): trajectory of the given joints.
+            joints (list[str]): names of the joints the trajectory moves, the others keep their current value.
+            rate (float): control rate in Hz.
+        Returns:
+            time (float): time into the trajectory of the first collision (None if it does not collide).
+            pairs (list[tuple[str, str]]): the colliding pairs at that time (empty if none).
+        """
+        times = np.append(np.arange(0.0, trajectory.duration, 1.0 / rate), trajectory.duration)
+        angles = np.tile(self.chain.joints.current, (len(times), 1))
+        angles[:, self.chain.joints.select(joints)] = [trajectory.sample(t) for t in times]
+        index, pairs = self.first_collision(angles)
+        return (None, pairs) if index is None else (float(times[index]), pairs)
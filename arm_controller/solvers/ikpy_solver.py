@@ -1,18 +1,136 @@
 """Implementation of Solver Class to solve Kinematics of Arm Class using IKPy library.
+
+ikpy (with sympy and scipy.optimize) takes most of a second to import, so it is
+only imported when the first solve builds the ikpy chain. Forward and inverse
+kinematics are ikpy's own; only the Jacobian comes from NativeSolver's analytic
+form of the same model.
 """
+import math
+import importlib.util
 import numpy as np
-from ikpy import chain as ikpc
 from arm_controller.chains.py_chain import PyChain
+from arm_controller.chains.urdf_object import JointType
 from arm_controller.solvers.abstract_solver import AbstractSolver, matrix4x4_to_xyz_rpy
+from arm_controller.solvers.native_solver import NativeSolver
+
+# a missing ikpy is still reported when the solver is selected, not at its first solve
+if importlib.util.find_spec('ikpy') is None:
+    raise ModuleNotFoundError("No module named 'ikpy'", name='ikpy')
+
+# ikpy link class used for every chain, chosen by _link_class_for on first use
+_link_class = None
+
+
+def _precomputed_link_class(ikpl):
+    """Defines the ikpy link class evaluating frames from precomputed matrices.
+    """
+
+    class _PrecomputedLink(ikpl.URDFLink):
+        """ikpy link whose frame matrix is evaluated from the static matrices precomputed by NativeSolver.
+
+        ikpy's numeric links rebuild every frame matrix from the origin and axis on
+        each call, and its symbolic links need sympy to compile them first; this is
+        as fast as the symbolic path without the compilation. It overrides
+        URDFLink.get_link_frame_matrix, which ikpy does not document, so it is only
+        used once _link_class_for has checked it against stock links.
+        """
+
+        def get_link_frame_matrix(self, parameters):
+            if self.joint_type == 'revolute':
+                return self._static + math.sin(parameters) * self._first + (1.0 - math.cos(parameters)) * self._second
+            if self.joint_type == 'prismatic':
+                return self._static + parameters * self._first
+            return self._static
+
+    return _PrecomputedLink
+
+
+def _link_class_for(model, native):
+    """Returns the ikpy link class to build chains with, checking the precomputed links on first use.
+
+    The precomputed links are used only if the installed ikpy still evaluates
+    frames through URDFLink.get_link_frame_matrix with the same result as its
+    stock links; otherwise the stock links are used, which are slower to
+    evaluate but always agree with ikpy.
+
+    Args:
+        model (KinematicModel): the chain's model, used to compare both link classes.
+        native (NativeSolver): solver built from the same model, provides the precomputed matrices.
+    """
+    global _link_class
+    if _link_class is None:
+        from ikpy import link as ikpl
+        from ikpy import chain as ikpc
+        _link_class = ikpl.URDFLink
+        if callable(getattr(ikpl.URDFLink, 'get_link_frame_matrix', None)):
+            precomputed = _precomputed_link_class(ikpl)
+            probe = np.clip(0.3 + 0.1 * np.arange(len(model.joint_names)), model.lower, model.upper)
+            try:
+                fast = ikpc.Chain(_ikpy_links(model, native, precomputed))
+                stock = ikpc.Chain(_ikpy_links(model, native, ikpl.URDFLink))
+                if np.allclose(fast.forward_kinematics(probe, full_kinematics=True),
+                               stock.forward_kinematics(probe, full_kinematics=True), atol=1e-12):
+                    _link_class = precomputed
+            except (TypeError, ValueError, AttributeError):
+                pass
+    return _link_class
+
+
+def _ikpy_links(model, native, link_class):
+    """Builds the ikpy links of a chain's kinematic model.
+
+    Mirrors ikpy.URDF.get_urdf_parameters without reading the file again or
+    compiling a symbolic matrix per link with sympy (which dominated the solver's
+    construction time).
+
+    Args:
+        model (KinematicModel): the chain's model.
+        native (NativeSolver): solver built from the same model, provides the precomputed matrices.
+        link_class (type): ikpy.link.URDFLink or a subclass of it.
+    """
+    links = []
+    for i, (name, joint_type) in enumerate(zip(model.joint_names, model.joint_types)):
+        link = link_class(
+            name=name,
+            bounds=(model.lower[i], model.upper[i]),
+            origin_translation=model.origin_xyz[i],
+            origin_orientation=model.origin_rpy[i],
+            rotation=model.axes[i] if model.revolute[i] else None,
+            translation=model.axes[i] if model.prismatic[i] else None,
+            use_symbolic_matrix=False,
+            joint_type=joint_type.value
+        )
+        link._static, link._first, link._second = native._static[i], native._first[i], native._second[i]
+        links.append(link)
+    return links
+
 
 class IKPySolver(AbstractSolver):
 
     def __init__(self, chain):
         """Abstract Kinematic Solver class.
         """
-        self._chain = ikpc.Chain(ikpc.URDF.get_urdf_parameters(chain.urdf.path, [chain.urdf.links[0].name]))
+        self._model = chain.model
+        for joint_type in self._model.joint_types:
+            if joint_type not in (JointType.REVOLUTE, JointType.PRISMATIC, JointType.FIXED):
+                raise ValueError(f'Unknown joint type: {joint_type.value}')
+        # provides the precomputed link matrices and the analytic Jacobian
+        self._native = NativeSolver(chain)
+        self._ikpy_chain = None
+        self._lower = np.array(self._model.lower, dtype=float)
+        self._upper = np.array(self._model.upper, dtype=float)
+
+    @property
+    def _chain(self):
+        """The ikpy chain, built (and ikpy imported) on first use.
+        """
+        if self._ikpy_chain is None:
+            from ikpy import chain as ikpc
+            link_class = _link_class_for(self._model, self._native)
+            self._ikpy_chain = ikpc.Chain(_ikpy_links(self._model, self._native, link_class))
+        return self._ikpy_chain
 
-    def inverse_solve(self, target_coords, target_rpy):
+    def inverse_solve(self, target_coords, target_rpy, **kwargs):
         """Finds the angles for each joint of the arm given a target end effector.
 
         Calculates the angles each joint needs to be at given the target end
@@ -21,13 +139,21 @@ class IKPySolver(AbstractSolver):
         Args:
             target_coords (list[float]): target end effector XYZ coordinates.
             target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
+            **kwargs:
+                initial_angles (list[float]): angles to start the optimizer from (defaults to zeros)
         Returns:
             angles (list[float]): list of angles for each rotating joint in the chain.
         """
 
         coords = np.array(target_coords)
         rpy = np.array(target_rpy)
-        return self._chain.inverse_kinematics(target_position=coords, target_orientation=rpy)
+        initial = kwargs.get('initial_angles')
+        if initial is None:
+            initial = np.zeros(len(self._chain.links))
+        # the optimizer rejects starting points outside the joint bounds
+        initial = np.clip(np.nan_to_num(np.asarray(initial, dtype=float)), self._lower, self._upper)
+        return self._chain.inverse_kinematics(target_position=coords, target_orientation=rpy,
+                                              initial_position=initial)
 
     def forward_solve(self, angles, **kwargs):
         """Finds the (x, y, z, roll, pitch, yaw) position of the end effector of the chain.
@@ -57,3 +183,29 @@ class IKPySolver(AbstractSolver):
         for mtx in matrices:
             coords.append(matrix4x4_to_xyz_rpy(mtx)[0])
         return coords
+
+    def jacobian(self, angles, **kwargs):
+        """Finds the geometric Jacobian of the end effector for the given joint angles.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            **kwargs:
+        Returns:
+            jacobian (ndarray): array of shape (6, J), rows 0-2 linear and rows 3-5 angular velocity.
+        """
+        return self._native.jacobian(angles, **kwargs)
+
+    def differential_solve(self, angles, delta_coords, delta_rpy=None, **kwargs):
+        """Finds the joint angles that move the end effector by a small correction.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            delta_coords (list[float]): XYZ displacement of the end effector in the base frame.
+            delta_rpy (list[float]): rotation of the end effector as a rotation vector in the base frame
+                (None corrects only the position).
+            **kwargs:
+                damping (float): damping factor (default 1e-3)
+        Returns:
+            angles (ndarray): angles of each joint after the step.
+        """
+        return self._native.differential_solve(angles, delta_coords, delta_rpy, **kwargs)
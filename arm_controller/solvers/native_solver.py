@@ -0,0 +1,409 @@
+"""Implementation of Solver Class to solve Kinematics of Arm Class using only NumPy.
+
+The static part of every joint transform (origin xyz/rpy and the joint axis) is
+precomputed once from the chain's kinematic model so that forward kinematics reduces to a
+handful of 4x4 matrix products per call. scipy.optimize is only imported by
+inverse_solve, the first time it is needed.
+"""
+import math
+import numpy as np
+
+from arm_controller.chains.py_chain import PyChain
+# rpy_to_matrix moved to the kinematic model, still importable from here
+from arm_controller.chains.kinematic_model import rpy_to_matrix
+from arm_controller.solvers.abstract_solver import AbstractSolver
+
+
+def matrix_to_rotvec(matrix):
+    """Takes one or more 3x3 rotation matrices and returns their rotation vectors.
+
+    Pure NumPy equivalent of scipy's ``Rotation.from_matrix(m).as_rotvec()``,
+    vectorized over any leading dimensions.
+
+    Args:
+        matrix: array of shape (..., 3, 3) of rotation matrices
+
+    Returns:
+        rotvec: array of shape (..., 3) of rotation vectors
+    """
+    m = np.asarray(matrix, dtype=float)
+    if m.ndim == 2:
+        return _single_matrix_to_rotvec(m.tolist())
+    m00, m11, m22 = m[..., 0, 0], m[..., 1, 1], m[..., 2, 2]
+    trace = m00 + m11 + m22
+
+    # candidate quaternions (x, y, z, w), one per choice of largest component
+    candidates = np.stack([
+        np.stack([1 + 2 * m00 - trace, m[..., 1, 0] + m[..., 0, 1],
+                  m[..., 2, 0] + m[..., 0, 2], m[..., 2, 1] - m[..., 1, 2]], axis=-1),
+        np.stack([m[..., 1, 0] + m[..., 0, 1], 1 + 2 * m11 - trace,
+                  m[..., 2, 1] + m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0]], axis=-1),
+        np.stack([m[..., 2, 0] + m[..., 0, 2], m[..., 2, 1] + m[..., 1, 2],
+                  1 + 2 * m22 - trace, m[..., 1, 0] - m[..., 0, 1]], axis=-1),
+        np.stack([m[..., 2, 1] - m[..., 1, 2], m[..., 0, 2] - m[..., 2, 0],
+                  m[..., 1, 0] - m[..., 0, 1], 1 + trace], axis=-1),
+    ], axis=-2)
+    choice = np.argmax(np.stack([m00, m11, m22, trace], axis=-1), axis=-1)
+    quat = np.take_along_axis(candidates, choice[..., None, None], axis=-2)[..., 0, :]
+    quat /= np.linalg.norm(quat, axis=-1, keepdims=True)
+    quat *= np.where(quat[..., 3:] < 0, -1.0, 1.0)
+
+    sin_half = np.linalg.norm(quat[..., :3], axis=-1)
+    angle = 2 * np.arctan2(sin_half, quat[..., 3])
+    small = angle <= 1e-3
+    angle2 = angle * angle
+    scale = np.where(small,
+                     2 + angle2 / 12 + 7 * angle2 * angle2 / 2880,
+                     angle / np.where(small, 1.0, sin_half))
+    return scale[..., None] * quat[..., :3]
+
+
+def _single_matrix_to_rotvec(m):
+    """Scalar version of matrix_to_rotvec for one matrix given as nested lists.
+
+    Array operations on a single 3x3 matrix are dominated by NumPy call overhead,
+    so the single matrix case (every forward_solve) is done with plain floats.
+    """
+    trace = m[0][0] + m[1][1] + m[2][2]
+    largest = max(m[0][0], m[1][1], m[2][2], trace)
+    if largest == trace:
+        quat = [m[2][1] - m[1][2], m[0][2] - m[2][0], m[1][0] - m[0][1], 1 + trace]
+    elif largest == m[0][0]:
+        quat = [1 + 2 * m[0][0] - trace, m[1][0] + m[0][1], m[2][0] + m[0][2], m[2][1] - m[1][2]]
+    elif largest == m[1][1]:
+        quat = [m[1][0] + m[0][1], 1 + 2 * m[1][1] - trace, m[2][1] + m[1][2], m[0][2] - m[2][0]]
+    else:
+        quat = [m[2][0] + m[0][2], m[2][1] + m[1][2], 1 + 2 * m[2][2] - trace, m[1][0] - m[0][1]]
+    norm = math.sqrt(sum(c * c for c in quat))
+    if quat[3] < 0:
+        norm = -norm
+    x, y, z, w = (c / norm for c in quat)
+
+    sin_half = math.sqrt(x * x + y * y + z * z)
+    angle = 2 * math.atan2(sin_half, w)
+    if angle <= 1e-3:
+        angle2 = angle * angle
+        scale = 2 + angle2 / 12 + 7 * angle2 * angle2 / 2880
+    else:
+        scale = angle / sin_half
+    return np.array([scale * x, scale * y, scale * z])
+
+
+def rotvec_to_matrix(rotvec):
+    """Takes a rotation vector and returns the equivalent 3x3 rotation matrix (Rodrigues' formula).
+
+    Args:
+        rotvec(list[float]): rotation vector, the same representation returned as rpy by the solvers
+
+    Returns:
+        matrix: 3x3 rotation matrix
+    """
+    rotvec = np.asarray(rotvec, dtype=float)
+    angle = np.linalg.norm(rotvec)
+    if angle < 1e-12:
+        return np.eye(3)
+    k = rotvec / angle
+    skew = np.array([[0, -k[2], k[1]],
+                     [k[2], 0, -k[0]],
+                     [-k[1], k[0], 0]])
+    return np.eye(3) + np.sin(angle) * skew + (1 - np.cos(angle)) * skew @ skew
+
+
+class NativeSolver(AbstractSolver):
+
+    def __init__(self, chain: PyChain):
+        """Basic constructor for NativeSolver class.
+
+        Every joint's local transform is written as A + u * B + v * C, where A is
+        the static origin transform and B, C absorb the joint axis, so a call only
+        has to compute u and v (sin / 1 - cos of the angle for revolute joints, the
+        displacement for prismatic joints) before chaining the matrices together.
+        """
+        self.chain = chain
+        model = chain.model
+        count = len(model)
+
+        self._static = np.array(model.origins)
+        self._first = np.zeros((count, 4, 4))
+        self._second = np.zeros((count, 4, 4))
+        self._revolute = np.array(model.revolute)
+        self._prismatic = np.array(model.prismatic)
+        self._axes = np.array(model.axes)
+
+        for i in range(count):
+            axis = model.axes[i]
+            if model.revolute[i]:
+                skew = np.zeros((4, 4))
+                skew[:3, :3] = [[0, -axis[2], axis[1]],
+                                [axis[2], 0, -axis[0]],
+                                [-axis[1], axis[0], 0]]
+                self._first[i] = model.origins[i] @ skew
+                self._second[i] = model.origins[i] @ skew @ skew
+            elif model.prismatic[i]:
+                shift = np.zeros((4, 4))
+                shift[:3, 3] = axis
+                self._first[i] = model.origins[i] @ shift
+
+        self._active = self._revolute | self._prismatic
+        self._bounds = (model.lower[self._active], model.upper[self._active])
+
+        # fold fixed joints into their neighbours so the end effector only needs
+        # one product per moving joint
+        self._active_index = np.flatnonzero(self._active)
+        self._end_static = self._static[self._active_index].copy()
+        self._end_first = self._first[self._active_index].copy()
+        self._end_second = self._second[self._active_index].copy()
+        self._end_revolute = self._revolute[self._active_index]
+        self._tail = np.eye(4)
+        prefix = np.eye(4)
+        k = 0
+        for i in range(count):
+            if self._active[i]:
+                self._end_static[k] = prefix @ self._end_static[k]
+                self._end_first[k] = prefix @ self._end_first[k]
+                self._end_second[k] = prefix @ self._end_second[k]
+                prefix = np.eye(4)
+                k += 1
+            else:
+                prefix = prefix @ self._static[i]
+        self._tail = prefix
+
+    def _local_transforms(self, angles):
+        """Returns the local 4x4 transform of every joint for the given angles.
+
+        Args:
+            angles: array of shape (..., J) of joint values.
+        Returns:
+            transforms: array of shape (..., J, 4, 4).
+        """
+        q = np.asarray(angles, dtype=float)
+        u = np.where(self._revolute, np.sin(q), np.where(self._prismatic, q, 0.0))
+        v = np.where(self._revolute, 1.0 - np.cos(q), 0.0)
+        return self._static + u[..., None, None] * self._first + v[..., None, None] * self._second
+
+    def _chain_transforms(self, angles):
+        """Returns the 4x4 transform of every joint frame relative to the base of the chain.
+
+        Args:
+            angles: array of shape (..., J) of joint values.
+        Returns:
+            transforms: array of shape (..., J, 4, 4).
+        """
+        local = self._local_transforms(angles)
+        frames = np.empty_like(local)
+        frames[..., 0, :, :] = local[..., 0, :, :]
+        for i in range(1, local.shape[-3]):
+            frames[..., i, :, :] = frames[..., i - 1, :, :] @ local[..., i, :, :]
+        return frames
+
+    def _end_transform(self, angles):
+        """Returns the 4x4 transform of the end effector relative to the base of the chain.
+
+        Args:
+            angles: array of shape (..., J) of joint values.
+        Returns:
+            transform: array of shape (..., 4, 4).
+        """
+        q = np.asarray(angles, dtype=float)[..., self._active_index]
+        u = np.where(self._end_revolute, np.sin(q), q)
+        v = np.where(self._end_revolute, 1.0 - np.cos(q), 0.0)
+        local = self._end_static + u[..., None, None] * self._end_first + v[..., None, None] * self._end_second
+        if len(self._active_index) == 0:
+            return np.broadcast_to(self._tail, q.shape[:-1] + (4, 4)).copy()
+        if q.ndim == 1:
+            # np.dot carries less overhead than matmul for a single 4x4 product
+            end = local[0]
+            for mtx in local[1:]:
+                end = np.dot(end, mtx)
+            return np.dot(end, self._tail)
+        end = local[..., 0, :, :]
+        for i in range(1, local.shape[-3]):
+            end = end @ local[..., i, :, :]
+        return end @ self._tail
+
+    def _position_jacobian(self, angles):
+        """Returns the end effector position and its 3xN Jacobian with respect to the moving joints.
+
+        Args:
+            angles: array of shape (J,) of joint values.
+        Returns:
+            position: array of shape (3,) of the end effector position.
+            jacobian: array of shape (3, N) with one column per moving joint.
+        """
+        frames = self._chain_transforms(angles)
+        position = frames[-1, :3, 3]
+        joints = frames[self._active_index]
+        axes = np.einsum('jab,jb->ja', joints[:, :3, :3], self._axes[self._active_index])
+        columns = np.where(self._end_revolute[:, None],
+                           np.cross(axes, position - joints[:, :3, 3]), axes)
+        return position, columns.T
+
+    def jacobian(self, angles, **kwargs):
+        """Finds the analytic geometric Jacobian of the end effector for the given joint angles.
+
+        Column i of a revolute joint is (z_i x (p - o_i), z_i) and of a prismatic
+        joint (z_i, 0), with z_i the joint axis and o_i the joint origin in the
+        base frame and p the end effector position, all read from one pass of
+        chained transforms.
+
+        Args:
+            angles: array of shape (..., J) of joint values.
+            **kwargs:
+        Returns:
+            jacobian (ndarray): array of shape (..., 6, J), rows 0-2 linear and rows 3-5 angular velocity
+                (zero columns for fixed joints).
+        """
+        frames = self._chain_transforms(angles)
+        position = frames[..., -1, None, :3, 3]
+        axes = np.einsum('...jab,jb->...ja', frames[..., :3, :3], self._axes)
+        revolute = self._revolute[:, None]
+        linear = np.where(revolute, np.cross(axes, position - frames[..., :3, 3]), axes)
+        angular = np.where(revolute, axes, 0.0)
+        return np.swapaxes(np.concatenate([linear, angular], axis=-1), -1, -2)
+
+    def differential_solve(self, angles, delta_coords, delta_rpy=None, **kwargs):
+        """Finds the joint angles that move the end effector by a small correction.
+
+        One damped least squares step through the analytic Jacobian (see
+        AbstractSolver.differential_solve), clipped into the joint limits.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            delta_coords (list[float]): XYZ displacement of the end effector in the base frame.
+            delta_rpy (list[float]): rotation of the end effector as a rotation vector in the base frame
+                (None corrects only the position).
+            **kwargs:
+                damping (float): damping factor (default 1e-3) |
+                jacobian (ndarray): the Jacobian at angles, if the caller already has it
+        Returns:
+            angles (ndarray): angles of each joint after the step.
+        """
+        full = super().differential_solve(angles, delta_coords, delta_rpy, **kwargs)
+        full[self._active] = np.clip(full[self._active], *self._bounds)
+        return full
+
+    def inverse_solve(self, target_coords, target_rpy, **kwargs):
+        """Finds the angles for each joint of the arm given a target end effector.
+
+        Calculates the angles each joint needs to be at given the target end
+        effector (x_pos, y_pos, z_pos, roll, pitch, yaw) in cartesion space.
+        Like IKPySolver only the position is solved for unless orientation is requested.
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
+            **kwargs:
+                initial_angles (list[float]): initial angles to solve from |
+                orientation (bool): whether to also solve for target_rpy (default False)
+        Returns:
+            angles (list[float]): list of angles for each rotating joint in the chain.
+        """
+        target = np.asarray(target_coords, dtype=float)
+        full = np.zeros(len(self._active))
+        if kwargs.get('initial_angles') is not None:
+            full[:] = np.nan_to_num(np.asarray(kwargs['initial_angles'], dtype=float))
+        lower, upper = self._bounds
+        x0 = np.clip(full[self._active], lower, upper)
+
+        if kwargs.get('orientation', False):
+            target_rot = rotvec_to_matrix(target_rpy)
+
+            def residual(x):
+                full[self._active] = x
+                end = self._end_transform(full)
+                return np.concatenate([end[:3, 3] - target,
+                                       0.1 * matrix_to_rotvec(target_rot.T @ end[:3, :3])])
+        else:
+            def residual(x):
+                full[self._active] = x
+                return self._end_transform(full)[:3, 3] - target
+
+        from scipy.optimize import least_squares
+        result = least_squares(residual, x0, bounds=(lower, upper))
+        full[self._active] = result.x
+        return full
+
+    def inverse_solve_batch(self, target_coords, target_rpy, **kwargs):
+        """Finds the joint angles for a sequence of N target end effectors.
+
+        Meant for densely sampled paths: each target is reached from the solution
+        of the previous one with a few damped least squares steps, which also keeps
+        the joint motion between neighbouring targets minimal (no jumps to another
+        IK branch). Targets the steps do not converge on are handed to inverse_solve.
+
+        Args:
+            target_coords (ndarray): array of shape (N, 3) of target end effector XYZ coordinates.
+            target_rpy (ndarray): array of shape (N, 3) of target end effector Roll, Pitch, and Yaw.
+            **kwargs:
+                initial_angles (list[float]): angles to start the first solve from |
+                tolerance (float): position error in meters accepted for each target (default 1e-5) |
+                orientation (bool): whether to also solve for target_rpy (solved one by one with inverse_solve)
+        Returns:
+            angles (ndarray): array of shape (N, J) of angles for each rotating joint in the chain.
+        """
+        if kwargs.get('orientation', False):
+            return super().inverse_solve_batch(target_coords, target_rpy, **kwargs)
+        target_coords = np.atleast_2d(np.asarray(target_coords, dtype=float))
+        target_rpy = np.broadcast_to(np.asarray(target_rpy, dtype=float), target_coords.shape)
+        tolerance = kwargs.pop('tolerance', 1e-5)
+        damping = 1e-3 ** 2
+        lower, upper = self._bounds
+
+        full = np.zeros(len(self._active))
+        seed = kwargs.pop('initial_angles', None)
+        if seed is not None:
+            full[:] = np.nan_to_num(np.asarray(seed, dtype=float))
+        full[self._active] = np.clip(full[self._active], lower, upper)
+
+        solutions = np.empty((len(target_coords), len(full)))
+        for n, (target, rpy) in enumerate(zip(target_coords, target_rpy)):
+            for _ in range(20):
+                position, jacobian = self._position_jacobian(full)
+                error = target - position
+                if error @ error <= tolerance * tolerance:
+                    break
+                step = jacobian.T @ np.linalg.solve(jacobian @ jacobian.T + damping * np.eye(3), error)
+                full[self._active] = np.clip(full[self._active] + step, lower, upper)
+            else:
+                full = self.inverse_solve(target, rpy, initial_angles=full, **kwargs)
+            solutions[n] = full
+        return solutions
+
+    def forward_solve(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector of the chain.
+
+        Calculates the current (x, y, z, roll, pitch, yaw) position of the end
+        effector of the arm using the given angles of each of the joints.
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+            **kwargs:
+        Returns:
+            coords (list[float]): list containing XYZ coordinates of the end effector.
+            rpy (list[float]): list containing Roll, Pitch, and Yaw of the end effector.
+        """
+        end = self._end_transform(angles)
+        return end[:3, 3].copy(), matrix_to_rotvec(end[:3, :3])
+
+    def forward_solve_batch(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector for N sets of joint angles.
+
+        Args:
+            angles (ndarray): array of shape (N, J), one row of joint angles per configuration.
+            **kwargs:
+        Returns:
+            coords (ndarray): array of shape (N, 3) of XYZ coordinates of the end effector.
+            rpy (ndarray): array of shape (N, 3) of Roll, Pitch, and Yaw of the end effector.
+        """
+        end = self._end_transform(np.atleast_2d(np.asarray(angles, dtype=float)))
+        return end[:, :3, 3], matrix_to_rotvec(end[:, :3, :3])
+
+    def segmented_forward_solve(self, angles):
+        """Finds the (x, y, z) position of every joint in the chain (including the end effector).
+
+        Args:
+            angles (list[float]): list of current angles of each rotating joint in the chain.
+        Returns:
+            coords (list): 2 dimensional list containing sets of (X, Y, Z) coordinates of each joint.
+        """
+        return list(self._chain_transforms(angles)[:, :3, 3])
@@ -5,7 +5,6 @@ import numpy as np
 from PyKDL import *
 
 from arm_controller.chains.py_chain import PyChain
-from arm_controller.chains.urdf_object import JointType
 from arm_controller.solvers.abstract_solver import AbstractSolver
 
 
@@ -16,30 +15,31 @@ class PyKDLSolver(AbstractSolver):
         """
         self.chain = chain
         self._kdlChain = Chain()
-        joint_mins = JntArray(chain.number_of_joints())
-        joint_maxs = JntArray(chain.number_of_joints())
+        model = chain.model
+        # one limit per moving joint, the model's limits are already in radians
+        joint_mins = JntArray(int(np.sum(model.active)))
+        joint_maxs = JntArray(int(np.sum(model.active)))
         i = 0
-        # for segment in chain.segments:
-        for jnt in chain.urdf.joints:
-            rotation_frame = Frame(Rotation.EulerZYX(np.rad2deg(jnt.origin_rpy[2]),
-                                                     np.rad2deg(jnt.origin_rpy[1]),
-                                                     np.rad2deg(jnt.origin_rpy[0])))
-            vector_frame = Frame(Vector(jnt.origin_xyz[0], jnt.origin_xyz[1], jnt.origin_xyz[2]))
+        for j in range(len(model)):
+            origin_rpy, origin_xyz, axis = model.origin_rpy[j], model.origin_xyz[j], model.axes[j]
+            rotation_frame = Frame(Rotation.EulerZYX(np.rad2deg(origin_rpy[2]),
+                                                     np.rad2deg(origin_rpy[1]),
+                                                     np.rad2deg(origin_rpy[0])))
+            vector_frame = Frame(Vector(origin_xyz[0], origin_xyz[1], origin_xyz[2]))
             frame = rotation_frame * vector_frame
 
             joint = Joint()
-            if jnt.axis_xyz[0] == 1 or jnt.axis_xyz[0] == -1:
+            if axis[0] == 1 or axis[0] == -1:
                 joint = Joint(Joint.RotX)
-            elif jnt.axis_xyz[1] == 1 or jnt.axis_xyz[1] == -1:
+            elif axis[1] == 1 or axis[1] == -1:
                 joint = Joint(Joint.RotY)
-            elif jnt.axis_xyz[2] == 1 or jnt.axis_xyz[2] == -1:
+            elif axis[2] == 1 or axis[2] == -1:
                 joint = Joint(Joint.RotZ)
             self._kdlChain.addSegment(Segment(joint, frame))
 
-            if jnt.limit_lower is not None:
-                joint_mins[i] = math.radians(jnt.limit_lower)
-                if jnt.limit_upper is not None:
-                    joint_maxs[i] = math.radians(jnt.limit_upper)
+            if model.active[j]:
+                joint_mins[i] = model.lower[j]
+                joint_maxs[i] = model.upper[j]
                 i += 1
 
         self._fkSolver = ChainFkSolverPos_recursive(self._kdlChain)
@@ -61,10 +61,13 @@ class PyKDLSolver(AbstractSolver):
             target_coords (list[float]): target end effector XYZ coordinates.
             target_rpy (list[float]): target end effector Roll, Pitch, and Yaw.
             **kwargs:
+                initial_angles (list[float]): angles to start the solver from (defaults to zeros)
         Returns:
             angles (list[float]): list of angles for each rotating joint in the chain.
         """
-        initial_angles = kwargs['initial_angles']
+        initial_angles = kwargs.get('initial_angles')
+        if initial_angles is None:
+            initial_angles = [0.0] * self._kdlChain.getNrOfJoints()
         ikJointFinal = JntArray(self._kdlChain.getNrOfJoints())
         ikJointInitial = JntArray(self._kdlChain.getNrOfJoints())
         j = 0
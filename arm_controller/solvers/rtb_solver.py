@@ -2,16 +2,38 @@
 """
 
 import roboticstoolbox as rtb
-import roboticstoolbox.robot.ETS as ETS
 import numpy as np
-import os
 
 from arm_controller.chains.py_chain import PyChain
-from arm_controller.solvers.abstract_solver import AbstractSolver, matrix4x4_to_xyz_rpy, xyz_rpy_to_matrix4x4
-
-"""Location for URDF files
-/Lib/site-packages/rtbdata/xacro
-"""
+from arm_controller.solvers.abstract_solver import AbstractSolver, matrix4x4_to_xyz_rpy, matrices4x4_to_xyz_rpy, \
+    xyz_rpy_to_matrix4x4
+
+
+def _joint_ets(model, i):
+    """Builds the elementary transform sequence of one joint of a kinematic model.
+
+    The origin translation and rotation (Rz * Ry * Rx, as in the URDF) are followed
+    by the joint's own transform about (or along) its axis.
+    """
+    ets = rtb.ETS()
+    for value, et in zip(model.origin_xyz[i], (rtb.ET.tx, rtb.ET.ty, rtb.ET.tz)):
+        if value != 0:
+            ets *= et(value)
+    roll, pitch, yaw = model.origin_rpy[i]
+    for value, et in ((yaw, rtb.ET.Rz), (pitch, rtb.ET.Ry), (roll, rtb.ET.Rx)):
+        if value != 0:
+            ets *= et(value)
+    if model.active[i]:
+        axis = model.axes[i]
+        k = int(np.argmax(np.abs(axis)))
+        if not np.isclose(abs(axis[k]), 1.0):
+            raise ValueError(f'joint {model.joint_names[i]} must move about the x, y or z axis for RTBSolver')
+        if model.revolute[i]:
+            et = (rtb.ET.Rx, rtb.ET.Ry, rtb.ET.Rz)[k]
+        else:
+            et = (rtb.ET.tx, rtb.ET.ty, rtb.ET.tz)[k]
+        ets *= et(flip=bool(axis[k] < 0))
+    return ets
 
 
 class RTBSolver(AbstractSolver):
@@ -19,16 +41,19 @@ class RTBSolver(AbstractSolver):
     def __init__(self, chain: PyChain):
         """Abstract Kinematic Solver class.
 
-        Location for URDF files are relative to:
-        /Lib/site-packages/rtbdata/xacro
+        The robot is built from the chain's kinematic model, one link per joint
+        named after the joint, so the URDF is not read again.
         """
         self.chain = chain
-        # dirname = os.path.dirname(__file__)
-        # filepath = os.path.join(dirname, chain.urdf.path)
-        links, name = rtb.ERobot.urdf_to_ets_args(self,
-                                                  'mechatronics_arm.urdf')
-        self._robot = rtb.ERobot(links)
-        self._robot.name = name
+        model = chain.model
+        links = []
+        for i, name in enumerate(model.joint_names):
+            qlim = None
+            if model.active[i] and np.isfinite(model.lower[i]) and np.isfinite(model.upper[i]):
+                qlim = [model.lower[i], model.upper[i]]
+            parent = links[model.parents[i]] if model.parents[i] >= 0 else None
+            links.append(rtb.Link(_joint_ets(model, i), name=name, parent=parent, qlim=qlim))
+        self._robot = rtb.ERobot(links, name=model.name)
 
     def inverse_solve(self, target_coords, target_rpy, **kwargs):
         """Finds the angles for each joint of the arm given a target end effector.
@@ -46,7 +71,7 @@ class RTBSolver(AbstractSolver):
         Returns:
             angles (list[float]): list of angles for each rotating joint in the chain.
         """
-        if 'initial angles' in kwargs:
+        if kwargs.get('initial_angles') is not None:
             initial_angles = np.array(kwargs['initial_angles']).astype(float)
         else:
             initial_angles = self._robot.q
@@ -83,6 +108,25 @@ class RTBSolver(AbstractSolver):
             end_link = self._robot.ee_links[0].name
         return matrix4x4_to_xyz_rpy(self._robot.fkine(angles, end_link).A)
 
+    def forward_solve_batch(self, angles, **kwargs):
+        """Finds the (x, y, z, roll, pitch, yaw) position of the end effector for N sets of joint angles.
+
+        Args:
+            angles (ndarray): array of shape (N, J), one row of joint angles per configuration.
+            **kwargs:
+                end_link (str): name of end effector to calculate
+        Returns:
+            coords (ndarray): array of shape (N, 3) of XYZ coordinates of the end effector.
+            rpy (ndarray): array of shape (N, 3) of Roll, Pitch, and Yaw of the end effector.
+        """
+        if 'end_link' in kwargs:
+            end_link = kwargs['end_link']
+        else:
+            end_link = self._robot.ee_links[0].name
+        # fkine evaluates every row of a (N, J) array in one call, returning an N valued SE3
+        poses = self._robot.fkine(np.atleast_2d(np.asarray(angles, dtype=float)), end_link)
+        return matrices4x4_to_xyz_rpy(np.reshape(poses.A, (-1, 4, 4)))
+
     def segmented_forward_solve(self, angles):
         """Finds the (x, y, z) position of every joint in the chain (including the end effector).
 
@@ -90,8 +134,8 @@ class RTBSolver(AbstractSolver):
             coords (list[float]): 2 dimensional list containing sets of (X, Y, Z) coordinates of each joint.
         """
         tuples = []
-        for link in self.chain.urdf.links:
-            tuples.append(self.forward_solve(angles=angles, end_link=link.name)[0])
+        for name in self.chain.model.joint_names:
+            tuples.append(self.forward_solve(angles=angles, end_link=name)[0])
         return tuples
 
 
@@ -0,0 +1,144 @@
+"""Precomputed index of the positions an arm can reach.
+
+The index is built once per robot model by sampling the joint limits and
+forward solving every sample in one batch. Occupied voxels give an O(1)
+reachability test and a KD-tree over the sampled positions gives IK seeds.
+
+    Typical usage example:
+    workspace = WorkspaceIndex.load_or_build(chain, solver)
+    if workspace.is_reachable([0.04, 0.06, 0.09]):
+        angles = solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0],
+                                      initial_angles=workspace.nearest_seed([0.04, 0.06, 0.09]))
+"""
+import os
+import math
+import itertools
+import numpy as np
+from scipy.spatial import cKDTree
+
+from arm_controller.chains.py_chain import PyChain
+from arm_controller.chains.py_urdf import PyURDF
+from arm_controller.chains.urdf_object import JointType
+from arm_controller.solvers.abstract_solver import AbstractSolver
+
+
+class WorkspaceIndex:
+
+    def __init__(self, angles, positions, voxel_size, urdf_id):
+        """Constructs a WorkspaceIndex from already sampled configurations.
+
+        Args:
+            angles (ndarray): array of shape (N, J) of sampled joint angles.
+            positions (ndarray): array of shape (N, 3) of the end effector position of each sample.
+            voxel_size (float): edge length of a voxel in meters.
+            urdf_id (str): identity of the URDF the samples were taken from.
+        """
+        self.angles = np.asarray(angles, dtype=float)
+        self.positions = np.asarray(positions, dtype=float)
+        self.voxel_size = voxel_size
+        self.urdf_id = urdf_id
+        voxels = np.unique(np.floor(self.positions / voxel_size).astype(np.int64), axis=0)
+        self._voxels = set(map(tuple, voxels.tolist()))
+        self._tree = cKDTree(self.positions)
+
+    @classmethod
+    def build(cls, chain: PyChain, solver: AbstractSolver, samples=200_000, voxel_size=0.005, seed=0):
+        """Samples the joint limits of the chain and forward solves every sample.
+
+        Args:
+            chain (PyChain): chain to sample (limits come from its kinematic model).
+            solver (AbstractSolver): solver used for the batched forward solve.
+            samples (int): number of random configurations.
+            voxel_size (float): edge length of a voxel in meters.
+            seed (int): seed for the random generator, so builds are reproducible.
+        Returns:
+            workspace (WorkspaceIndex): the new index.
+        """
+        rng = np.random.default_rng(seed)
+        model = chain.model
+        angles = np.zeros((samples, len(model)))
+        for i, joint_type in enumerate(model.joint_types):
+            if joint_type == JointType.FIXED:
+                continue
+            # continuous joints have infinite limits in the model
+            if np.isfinite(model.lower[i]) and np.isfinite(model.upper[i]):
+                lower, upper = model.lower[i], model.upper[i]
+            else:
+                lower, upper = -math.pi, math.pi
+            angles[:, i] = rng.uniform(lower, upper, samples)
+        positions, _ = solver.forward_solve_batch(angles)
+        return cls(angles, positions, voxel_size, PyURDF.identity(chain.urdf))
+
+    def default_path(urdf_path) -> str:
+        """Returns the file a workspace index for the URDF is stored in (next to the URDF).
+        """
+        return os.path.splitext(urdf_path)[0] + '.workspace.npz'
+
+    @classmethod
+    def load_or_build(cls, chain: PyChain, solver: AbstractSolver, path=None, **kwargs):
+        """Loads the index stored next to the URDF, building and saving it if missing or out of date.
+
+        Args:
+            chain (PyChain): chain the index is for.
+            solver (AbstractSolver): solver used if the index has to be built.
+            path (str): file to use instead of the default next to the URDF.
+            **kwargs: passed to build.
+        Returns:
+            workspace (WorkspaceIndex): the loaded or built index.
+        """
+        path = path if path is not None else WorkspaceIndex.default_path(chain.urdf.path)
+        if os.path.exists(path):
+            workspace = cls.load(path)
+            if workspace.urdf_id == PyURDF.identity(chain.urdf):
+                return workspace
+        workspace = cls.build(chain, solver, **kwargs)
+        workspace.save(path)
+        return workspace
+
+    def save(self, path):
+        """Writes the index to a .npz file.
+        """
+        np.savez_compressed(path, angles=self.angles, positions=self.positions,
+                            voxel_size=self.voxel_size, urdf_id=self.urdf_id)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by save.
+        """
+        with np.load(path) as data:
+            return cls(data['angles'], data['positions'], float(data['voxel_size']), str(data['urdf_id']))
+
+    def is_reachable(self, target_coords, margin=1):
+        """Checks whether a target position lies in (or next to) a sampled voxel.
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            margin (int): number of neighbouring voxels also accepted, covering gaps between samples.
+        Returns:
+            reachable (bool): whether the target is inside the sampled workspace.
+        """
+        voxel = np.floor(np.asarray(target_coords, dtype=float) / self.voxel_size).astype(np.int64).tolist()
+        offsets = range(-margin, margin + 1)
+        for dx, dy, dz in itertools.product(offsets, offsets, offsets):
+            if (voxel[0] + dx, voxel[1] + dy, voxel[2] + dz) in self._voxels:
+                return True
+        return False
+
+    def nearest_seed(self, target_coords, reference=None, k=16):
+        """Returns the sampled configuration to seed an inverse_solve for the target with.
+
+        Args:
+            target_coords (list[float]): target end effector XYZ coordinates.
+            reference (list[float]): current angles; of the k samples nearest the
+                target the one closest to these is returned, avoiding a jump to another branch.
+            k (int): number of nearest samples considered when a reference is given.
+        Returns:
+            angles (ndarray): joint angles of the chosen sample.
+        """
+        if reference is None:
+            _, index = self._tree.query(target_coords)
+            return self.angles[index].copy()
+        _, indices = self._tree.query(target_coords, k=min(k, len(self.positions)))
+        candidates = self.angles[np.atleast_1d(indices)]
+        reference = np.nan_to_num(np.asarray(reference, dtype=float))
+        return candidates[np.argmin(np.sum(np.abs(candidates - reference), axis=1))].copy()
@@ -19,6 +19,8 @@ setuptools.setup(
         "arm_controller",
         "arm_controller.arms",
         "arm_controller.chains",
+        "arm_controller.motion",
+        "arm_controller.servos",
         "arm_controller.solvers"
     ],
     install_requires=[
@@ -26,8 +28,8 @@ setuptools.setup(
         "scipy>=1.6.1",
         "adafruit-circuitpython-servokit",
         "matplotlib>=3.3.4",
-        "ikpy>=3.1",
-        "roboticstoolbox-python>=0.9.1"
+        "ikpy>=4.1,<5",
+        "roboticstoolbox-python>=1.0"
     ],
-    python_requires=">=3.6"
+    python_requires=">=3.8"
 )
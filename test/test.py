@@ -4,13 +4,48 @@
 import unittest
 import os
 import math
+import asyncio
+import sys
+import shutil
+import json
+import pickle
+import tempfile
+from unittest import mock
+import subprocess
+import multiprocessing
 from time import sleep
+import numpy as np
+from PIL import Image
+from ikpy import chain as ikpc
+from arm_controller import instrumentation
+from arm_controller.solvers import create_solver, register_solver, solver_class, solver_names, _solvers
+from arm_controller.solvers.abstract_solver import AbstractSolver, damped_least_squares, matrix4x4_to_xyz_rpy
+from arm_controller.solvers import ikpy_solver
 from arm_controller.solvers.ikpy_solver import IKPySolver
+from arm_controller.solvers.native_solver import NativeSolver, matrix_to_rotvec, rotvec_to_matrix
+from arm_controller.solvers.cached_solver import CachedSolver
+from arm_controller.solvers.analytic_solver import AnalyticSolver
+from arm_controller.solvers.workspace_index import WorkspaceIndex
+from arm_controller.solvers.benchmark import sample_poses, run_benchmarks, write_results
+from arm_controller.solvers.collision_checker import CollisionChecker, _obb_overlap, _sphere_obb_overlap
+from arm_controller.motion.linear_trajectory import LinearTrajectory
+from arm_controller.motion.trajectory_executor import TrajectoryExecutor
+from arm_controller.motion.profiled_trajectory import ProfiledTrajectory
+from arm_controller.motion.waypoint_trajectory import plan_waypoint_trajectory
+from arm_controller.motion.blended_trajectory import BlendedTrajectory
+from arm_controller.servos.pca9685 import BatchedServoWriter, FakePCA9685
+from arm_controller.servos.simulated_backend import SimulatedBackend
+from arm_controller.arms.shared_joint_state import SharedJointState
+from arm_controller.arms.headless_renderer import resample, render_frames
+from arm_controller.arms.plotter_arm import PlotterArm
 from arm_controller.arms.mechatronics_arm import MechatronicsArm
+from arm_controller.arms.async_arm import AsyncArm
 from arm_controller.chains.py_chain import PyChain
 from arm_controller.arms.abstract_arm import AbstractArm
-from adafruit_servokit import ServoKit
 from arm_controller.chains.py_urdf import PyURDF, URDFObject
+from arm_controller.chains.kinematic_model import KinematicModel
+
+MECHATRONICS_URDF = os.path.join(os.path.dirname(__file__), '../arm_controller/urdf/mechatronics_arm.urdf')
 
 class Py_Chain(unittest.TestCase):
     """Unit testing class for py_chain class methods
@@ -59,40 +94,986 @@ class Py_Chain(unittest.TestCase):
 class Arm(unittest.TestCase):
     """Unit testing class for arm class methods
     """
+    def setUp(self):
+        self.backend = SimulatedBackend()
+        self.arm = MechatronicsArm(backend=self.backend)
 
     def test_get_pos(self):
-        arm = MechatronicsArm()
-
-        test_val = arm.get_pos()
+        test_val = self.arm.get_pos()
 
-        self.assertEqual(test_val,  self._solver.forward_solve(self.chain.get_current_values))
+        np.testing.assert_allclose(test_val[0], self.arm._solver.forward_solve(self.arm.chain.get_current_values())[0])
 
     def test_set_speed(self):
-        arm = MechatronicsArm()
-
-        self.set_speed(1)
-        self.assertEquals(arm._servo_speed, math.radians(1))
+        self.arm.set_speed(1)
+        self.assertEqual(self.arm._servo_speed, math.radians(1))
 
     def test_move_to(self):
-        arm = MechatronicsArm()
-        
-        test_val = arm.move_to(100, 100, 100, 0, 0, 0)
-        self.assertEquals(test_val, arm.get_pos())
+        self.arm.set_speed(90)
+        self.arm.move_to(0.04, 0.06, 0.09, 0, 0, 0)
+        np.testing.assert_allclose(self.arm.get_pos()[0], [0.04, 0.06, 0.09], atol=1e-3)
+        for joint in ('waist', 'shoulder', 'elbow', 'wrist_roll', 'wrist_pitch'):
+            channel = self.arm.chain.joints[joint]['servo#']
+            self.assertAlmostEqual(self.backend.commanded[channel], math.degrees(self.arm.chain.joints[joint]['current_value']))
 
     def test_open_claw(self):
-        arm = MechatronicsArm()
-
-        arm.close_claw()
-        arm.open_claw()
-        test_val = arm.chain.joints['claw']
-        self.assertEqual(test_val, {'current_value': 80})
+        self.arm.close_claw()
+        self.arm.open_claw()
+        test_val = self.arm.chain.joints['claw']['current_value']
+        self.assertAlmostEqual(test_val, math.radians(80))
 
     def test_close_claw(self):
-        arm = MechatronicsArm()
+        self.arm.close_claw()
+        test_val = self.arm.chain.joints['claw']['current_value']
+        self.assertAlmostEqual(test_val, math.radians(30))
+        self.assertEqual(self.backend.commanded[self.arm.chain.joints['claw']['servo#']], 30)
+
+
+    def test_jog(self):
+        target = np.asarray(self.arm.get_pos()[0]) + [0.01, -0.005, 0.008]
+        for _ in range(100):
+            angles = self.arm.jog(*(0.5 * (target - self.arm.get_pos()[0])))
+        np.testing.assert_allclose(self.arm.get_pos()[0], target, atol=1e-6)
+        np.testing.assert_allclose(angles, self.arm.chain.current_values())
+        # a large correction is limited to what the servos cover in one tick
+        before = self.arm.chain.current_values().copy()
+        self.arm.jog(0.05, 0, 0)
+        step = np.abs(self.arm.chain.current_values() - before)
+        self.assertLessEqual(np.max(step), self.arm._servo_speed / self.arm.executor.rate + 1e-12)
+
+    def test_failed_write_keeps_pose(self):
+        def fail(angles):
+            raise OSError('I2C write failed')
+        before = self.arm.chain.current_values().copy()
+        self.backend.set_angles = fail
+        with self.assertRaises(OSError):
+            self.arm.set_joint('waist', 45.0)
+        np.testing.assert_array_equal(self.arm.chain.current_values(), before)
+
+class Async_Arm(unittest.TestCase):
+    """Unit testing class for async_arm class methods
+    """
+    def setUp(self):
+        self.arm = AsyncArm(MechatronicsArm(backend=SimulatedBackend()))
+
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_move_to(self):
+        self.run_async(self.arm.move_to(0.04, 0.06, 0.09))
+        np.testing.assert_allclose(self.arm.get_pos()[0], [0.04, 0.06, 0.09], atol=1e-3)
+
+    def test_jog_during_awaited_move(self):
+        async def jog_midway():
+            move = asyncio.ensure_future(self.arm.move_to(0.04, 0.06, 0.09))
+            await asyncio.sleep(0)
+            self.assertTrue(self.arm.moving)
+            with self.assertRaises(RuntimeError):
+                self.arm.jog(0.001, 0, 0)
+            await move
+
+        self.run_async(jog_midway())
+        self.assertFalse(self.arm.moving)
+
+    def test_default_position_holds_lock(self):
+        async def interleave():
+            default = asyncio.ensure_future(self.arm.set_default_position())
+            await asyncio.sleep(0)
+            await self.arm.set_joint('waist', 45.0)
+            self.assertTrue(default.done())
+
+        self.run_async(interleave())
+        self.assertAlmostEqual(self.arm.chain.joints['waist']['current_value'], math.radians(45.0))
+
+class Simulated_Backend(unittest.TestCase):
+    """Unit testing class for simulated_backend class methods
+    """
+    def test_slew_rate(self):
+        backend = SimulatedBackend(slew_rate=100.0, latency=0.02)
+        backend.set_angles({0: 90.0})
+        backend.sleep(0.02)
+        self.assertEqual(backend.get_angles(), {0: 90.0})
+        backend.set_angles({0: 120.0})
+        backend.sleep(0.12)
+        # 0.02 s latency, then 0.1 s at 100 deg/s
+        self.assertAlmostEqual(backend.get_angles()[0], 100.0)
+        self.assertAlmostEqual(backend.settle(tolerance=0.0), 0.2, places=2)
+
+    def test_settle_waits_for_latency(self):
+        backend = SimulatedBackend(latency=0.05)
+        backend.set_angles({0: 90.0})
+        self.assertEqual(backend.get_angles(), {})
+        self.assertAlmostEqual(backend.settle(), 0.05, places=2)
+        self.assertEqual(backend.get_angles(), {0: 90.0})
+
+    def test_virtual_time(self):
+        backend = SimulatedBackend(write_time=0.001)
+        arm = MechatronicsArm(backend=backend)
+        start = backend.clock()
+        arm.set_joint('waist', 45.0)
+        # the move takes seconds of simulated time but is not waited for
+        self.assertGreater(backend.clock() - start, 1.0)
+        self.assertEqual(arm.executor.stats.missed_deadlines, 0)
+
+
+class Py_URDF(unittest.TestCase):
+    """Unit testing class for the compiled URDF cache of PyURDF
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'arm.urdf')
+        shutil.copy(MECHATRONICS_URDF, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load(self):
+        urdf = PyURDF.load(self.path)
+        self.assertTrue(os.path.exists(PyURDF.compiled_path(self.path)))
+        self.assertIs(PyURDF.load(self.path), urdf)
+        self.assertEqual([jnt.name for jnt in urdf.joints], [jnt.name for jnt in PyURDF.parse(self.path).joints])
+        self.assertEqual(PyURDF.identity(urdf), PyURDF.identity(PyURDF.parse(self.path)))
+
+    def test_invalidation(self):
+        urdf = PyURDF.load(self.path)
+        # same contents with a new modification time reuses the compiled copy
+        os.utime(self.path, ns=(0, 0))
+        touched = PyURDF.load(self.path)
+        self.assertEqual(touched.sha1, urdf.sha1)
+        with open(self.path) as fh:
+            contents = fh.read()
+        with open(self.path, 'w') as fh:
+            fh.write(contents.replace('velocity="0.5"', 'velocity="0.75"', 1))
+        changed = PyURDF.load(self.path)
+        self.assertNotEqual(changed.sha1, urdf.sha1)
+        self.assertEqual(changed.joints[0].limit_velocity, 0.75)
+        self.assertEqual(PyChain(urdf_file_path=self.path).get_velocity_limits()[0], 0.75)
+
+    def test_tampered_compiled_copy(self):
+        urdf = PyURDF.load(self.path)
+        compiled_path = PyURDF.compiled_path(self.path)
+        with open(compiled_path) as fh:
+            compiled = json.load(fh)
+        compiled['urdf']['class'] = 'Popen'
+        with open(compiled_path, 'w') as fh:
+            json.dump(compiled, fh)
+        os.utime(self.path, ns=(0, 0))
+        loaded = PyURDF.load(self.path)
+        self.assertIsInstance(loaded, URDFObject)
+        self.assertEqual([jnt.name for jnt in loaded.joints], [jnt.name for jnt in urdf.joints])
+
+    def test_ikpy_chain(self):
+        chain = PyChain(urdf_file_path=self.path)
+        solver = IKPySolver(chain)
+        angles = [1.57, 2.61, 0.61, 2.44, 1.48, 0.0]
+        xyz, _ = solver.forward_solve(angles)
+        np.testing.assert_allclose(xyz, NativeSolver(chain).forward_solve(angles)[0], atol=1e-9)
+
+    def test_ikpy_links_match_stock_chain(self):
+        chain = PyChain(urdf_file_path=self.path)
+        links = IKPySolver(chain)._chain
+        stock = ikpc.Chain(ikpc.URDF.get_urdf_parameters(self.path, [chain.urdf.links[0].name]))
+        self.assertEqual([link.name for link in links.links], [link.name for link in stock.links])
+        rng = np.random.default_rng(445)
+        for _ in range(50):
+            angles = rng.uniform(-math.pi, math.pi, len(stock.links))
+            np.testing.assert_allclose(links.forward_kinematics(angles), stock.forward_kinematics(angles), atol=1e-12)
+            np.testing.assert_allclose(links.forward_kinematics(angles, full_kinematics=True),
+                                       stock.forward_kinematics(angles, full_kinematics=True), atol=1e-12)
+
+    def test_ikpy_links_fallback(self):
+        from ikpy import link as ikpl
+        # an ikpy whose stock frames no longer match what the precomputed links assume
+        ikpy_solver._link_class = None
+        try:
+            with mock.patch.object(ikpl.URDFLink, 'get_link_frame_matrix', lambda link, parameters: np.eye(4)):
+                links = IKPySolver(PyChain(urdf_file_path=self.path))._chain.links
+            self.assertTrue(all(type(link) is ikpl.URDFLink for link in links))
+        finally:
+            ikpy_solver._link_class = None
+        self.assertIsNot(type(IKPySolver(PyChain(urdf_file_path=self.path))._chain.links[0]), ikpl.URDFLink)
+
+
+class Kinematic_Model(unittest.TestCase):
+    """Unit testing class for the kinematic model shared by chains and solvers
+    """
+    def test_shared(self):
+        chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.assertIs(PyChain(urdf_file_path=MECHATRONICS_URDF).model, chain.model)
+        self.assertIs(NativeSolver(chain).chain.model, chain.model)
+        model = chain.model
+        self.assertEqual(list(model.joint_names), list(chain.joints))
+        self.assertEqual(model.index('elbow'), 2)
+        self.assertEqual(list(model.parents), [-1, 0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(model.active, [True] * 5 + [False])
+        self.assertEqual(model.velocity_limits(), chain.get_velocity_limits())
+
+    def test_immutable(self):
+        model = PyChain(urdf_file_path=MECHATRONICS_URDF).model
+        with self.assertRaises(AttributeError):
+            model.name = 'other'
+        with self.assertRaises(ValueError):
+            model.lower[0] = -1.0
+        copy = pickle.loads(pickle.dumps(model))
+        self.assertEqual(copy.joint_names, model.joint_names)
+        np.testing.assert_array_equal(copy.origins, model.origins)
+        self.assertFalse(copy.origins.flags.writeable)
+
+
+class Joint_State(unittest.TestCase):
+    """Unit testing class for the array-backed joint state of PyChain
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+
+    def test_compatibility(self):
+        joints = self.chain.joints
+        self.assertEqual(list(joints), ['waist', 'shoulder', 'elbow', 'wrist_roll', 'wrist_pitch', 'claw'])
+        self.assertIn('elbow', joints)
+        self.assertAlmostEqual(joints['shoulder']['default_value'], math.radians(150))
+        self.assertIsNone(joints['claw']['default_value'])
+        self.assertIsNone(joints['claw']['servo#'])
+        joints['elbow']['current_value'] = 0.5
+        joints['claw']['servo#'] = 5
+        self.assertEqual(joints['elbow']['current_value'], 0.5)
+        self.assertEqual(joints['claw']['servo#'], 5)
+        self.assertEqual(self.chain.get_current_values(), [0.0, 0.0, 0.5, 0.0, 0.0, 0.0])
+        self.assertEqual(self.chain.get_default_values()[-1], None)
+        with self.assertRaises(KeyError):
+            joints['elbow']['speed']
+
+    def test_views(self):
+        joints = self.chain.joints
+        view = self.chain.current_values()
+        self.assertTrue(np.shares_memory(view, joints.current))
+        with self.assertRaises(ValueError):
+            view[0] = 1.0
+        index = joints.select(('waist', 'elbow'))
+        self.assertIs(joints.select(['waist', 'elbow']), index)
+        joints.current[index] = [1.2, 0.4]
+        np.testing.assert_allclose(view, [1.2, 0.0, 0.4, 0.0, 0.0, 0.0])
+
+    def test_shared_state_read_into(self):
+        state = SharedJointState(list(self.chain.joints))
+        try:
+            self.chain.joints['waist']['current_value'] = 1.0
+            state.write(self.chain.joints.current)
+            out = np.empty(len(self.chain.joints))
+            seq, values = state.read(out=out)
+            self.assertIs(values, out)
+            self.assertEqual((seq, values[0]), (1, 1.0))
+        finally:
+            state.close()
+
+
+class Native_Solver(unittest.TestCase):
+    """Unit testing class for native_solver class methods
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.solver = NativeSolver(self.chain)
+        self.reference = IKPySolver(self.chain)
+        self.rng = np.random.default_rng(445)
+
+    def stock_chain(self):
+        # ikpy's own chain, parsed from the URDF without any of the solver's links
+        return ikpc.Chain(ikpc.URDF.get_urdf_parameters(MECHATRONICS_URDF, [self.chain.urdf.links[0].name], symbolic=False))
+
+    def test_forward_solve(self):
+        stock = self.stock_chain()
+        for _ in range(50):
+            angles = self.rng.uniform(-math.pi, math.pi, 6)
+            xyz, rpy = self.solver.forward_solve(angles)
+            ref_xyz, ref_rpy = matrix4x4_to_xyz_rpy(stock.forward_kinematics(angles))
+            np.testing.assert_allclose(xyz, ref_xyz, atol=1e-9)
+            np.testing.assert_allclose(rpy, ref_rpy, atol=1e-9)
+            ikpy_xyz, ikpy_rpy = self.reference.forward_solve(angles)
+            np.testing.assert_allclose(ikpy_xyz, ref_xyz, atol=1e-9)
+            np.testing.assert_allclose(ikpy_rpy, ref_rpy, atol=1e-9)
+
+    def test_segmented_forward_solve(self):
+        angles = self.rng.uniform(-math.pi, math.pi, 6)
+        frames = self.stock_chain().forward_kinematics(angles, full_kinematics=True)
+        np.testing.assert_allclose(self.solver.segmented_forward_solve(angles),
+                                   [frame[:3, 3] for frame in frames], atol=1e-9)
+        np.testing.assert_allclose(self.reference.segmented_forward_solve(angles),
+                                   [frame[:3, 3] for frame in frames], atol=1e-9)
+
+    def test_forward_solve_batch(self):
+        angles = self.rng.uniform(-math.pi, math.pi, (20, 6))
+        for solver in (self.solver, self.reference):
+            xyz, rpy = solver.forward_solve_batch(angles)
+            self.assertEqual(xyz.shape, (20, 3))
+            self.assertEqual(rpy.shape, (20, 3))
+            for i in range(20):
+                ref_xyz, ref_rpy = self.reference.forward_solve(angles[i])
+                np.testing.assert_allclose(xyz[i], ref_xyz, atol=1e-9)
+                np.testing.assert_allclose(rpy[i], ref_rpy, atol=1e-9)
+
+    def test_inverse_solve(self):
+        angles = self.solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0])
+        xyz, rpy = self.solver.forward_solve(angles)
+        np.testing.assert_allclose(xyz, [0.04, 0.06, 0.09], atol=1e-4)
+
+    def test_inverse_solve_batch(self):
+        targets = np.linspace([0.04, 0.06, 0.09], [-0.04, 0.07, 0.10], 10)
+        for solver in (self.solver, self.reference):
+            angles = solver.inverse_solve_batch(targets, [0, 0, 0])
+            self.assertEqual(angles.shape, (10, 6))
+            xyz, rpy = solver.forward_solve_batch(angles)
+            np.testing.assert_allclose(xyz, targets, atol=1e-4)
+
+    def test_inverse_solve_batch_fallback(self):
+        # targets the damped steps do not converge on are solved one by one with their own rpy
+        rpys = []
+        inverse_solve = self.solver.inverse_solve
+        self.solver.inverse_solve = lambda coords, rpy, **kwargs: rpys.append(np.asarray(rpy)) or \
+            inverse_solve(coords, rpy, **kwargs)
+        targets = np.linspace([0.04, 0.06, 0.09], [-0.04, 0.07, 0.10], 3)
+        self.solver.inverse_solve_batch(targets, [[0, 0, 0], [0, 0, 0.1], [0, 0, 0.2]], tolerance=0.0)
+        np.testing.assert_array_equal(rpys, [[0, 0, 0], [0, 0, 0.1], [0, 0, 0.2]])
+        rpys.clear()
+        self.solver.inverse_solve_batch(targets, [0, 0, 0.3], tolerance=0.0)
+        np.testing.assert_array_equal(rpys, [[0, 0, 0.3]] * 3)
+
+    def test_inverse_solve_batch_path(self):
+        # a dense line from the default pose should be followed without jumps between branches
+        start = np.array([math.pi / 2, 2.618, 0.6109, 2.4435, 1.4835, 0.0])
+        targets = np.linspace(self.solver.forward_solve(start)[0], [0.1, 0.1, 0.02], 200)
+        angles = self.solver.inverse_solve_batch(targets, [0, 0, 0], initial_angles=start)
+        xyz, rpy = self.solver.forward_solve_batch(angles)
+        np.testing.assert_allclose(xyz, targets, atol=1e-4)
+        self.assertLess(np.max(np.abs(np.diff(angles, axis=0))), 0.05)
+
+    def test_position_jacobian(self):
+        angles = self.rng.uniform(-1.0, 1.0, 6)
+        xyz, jacobian = self.solver._position_jacobian(angles)
+        for column, joint in enumerate(self.solver._active_index):
+            moved = angles.copy()
+            moved[joint] += 1e-6
+            np.testing.assert_allclose((self.solver.forward_solve(moved)[0] - xyz) / 1e-6,
+                                       jacobian[:, column], atol=1e-5)
+
+
+    def test_jacobian(self):
+        angles = self.rng.uniform(-1.0, 1.0, (4, 6))
+        jacobian = self.solver.jacobian(angles)
+        self.assertEqual(jacobian.shape, (4, 6, 6))
+        for i in range(4):
+            # the numerical default of AbstractSolver, evaluated with ikpy's forward kinematics
+            np.testing.assert_allclose(jacobian[i], AbstractSolver.jacobian(self.reference, angles[i]), atol=1e-6)
+        np.testing.assert_array_equal(jacobian[:, :, 5], 0.0)
+
+    def test_differential_solve(self):
+        angles = np.array([math.pi / 2, 2.618, 0.6109, 2.4435, 1.4835, 0.0])
+        xyz, rpy = self.solver.forward_solve(angles)
+        moved = self.solver.differential_solve(angles, [0.0005, -0.0003, 0.0002])
+        np.testing.assert_allclose(self.solver.forward_solve(moved)[0] - xyz, [0.0005, -0.0003, 0.0002], atol=2e-5)
+        # the arm has five joints, so a rotation of the claw moves it slightly
+        turned = self.solver.differential_solve(angles, [0, 0, 0], [0, 0, 0.002])
+        turned_xyz, turned_rpy = self.solver.forward_solve(turned)
+        rotation = rotvec_to_matrix(turned_rpy) @ rotvec_to_matrix(rpy).T
+        np.testing.assert_allclose(matrix_to_rotvec(rotation), [0, 0, 0.002], atol=2e-5)
+        np.testing.assert_allclose(turned_xyz, xyz, atol=1e-4)
+        np.testing.assert_allclose(damped_least_squares(np.eye(3), [1.0, 2.0, 3.0], damping=0.0), [1.0, 2.0, 3.0])
+
+class Analytic_Solver(unittest.TestCase):
+    """Unit testing class for analytic_solver class methods
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.solver = AnalyticSolver(self.chain)
+
+    def test_planar(self):
+        self.assertTrue(self.solver.planar)
+
+    def test_inverse_solve_all(self):
+        angles = [1.0, 1.5, 0.5, self.solver._roll_neutral, 1.0, 0.0]
+        target, rpy = self.solver.forward_solve(angles)
+        solutions = self.solver.inverse_solve_all(target, rpy)
+        self.assertGreater(len(solutions), 1)
+        xyz, _ = self.solver.forward_solve_batch(solutions)
+        np.testing.assert_allclose(xyz, np.tile(target, (len(solutions), 1)), atol=1e-9)
+
+    def test_inverse_solve(self):
+        angles = [1.0, 1.5, 0.5, self.solver._roll_neutral, 1.0, 0.0]
+        target, rpy = self.solver.forward_solve(angles)
+        solution = self.solver.inverse_solve(target, rpy, initial_angles=angles)
+        np.testing.assert_allclose(solution, angles, atol=0.1)
+
+
+class Cached_Solver(unittest.TestCase):
+    """Unit testing class for cached_solver class methods
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.solver = CachedSolver(self.chain, NativeSolver(self.chain), max_entries=2)
+
+    def test_inverse_solve(self):
+        first = self.solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0])
+        second = self.solver.inverse_solve([0.04, 0.06, 0.0901], [0, 0, 0])
+        np.testing.assert_allclose(first, second)
+        self.assertEqual((self.solver.hits, self.solver.misses), (1, 1))
+
+    def test_eviction(self):
+        for z in (0.08, 0.09, 0.10):
+            self.solver.inverse_solve([0.04, 0.06, z], [0, 0, 0])
+        self.solver.inverse_solve([0.04, 0.06, 0.08], [0, 0, 0])
+        self.assertEqual((self.solver.hits, self.solver.misses), (0, 4))
+
+    def test_unreachable_not_cached(self):
+        for _ in range(2):
+            self.solver.inverse_solve([1.0, 1.0, 1.0], [0, 0, 0])
+        self.assertEqual((self.solver.hits, self.solver.misses), (0, 2))
+
+    def test_hit_checked_against_target(self):
+        target = [0.04, 0.06, 0.09]
+        angles = np.zeros(len(self.chain.model))
+        # a stale entry whose angles reach their recorded position but not the target of its cell
+        self.solver._store(self.solver._key(target, [0, 0, 0]), angles, self.solver.forward_solve(angles)[0])
+        solution = self.solver.inverse_solve(target, [0, 0, 0])
+        self.assertEqual((self.solver.hits, self.solver.rejected), (0, 1))
+        np.testing.assert_allclose(self.solver.forward_solve(solution)[0], target, atol=self.solver.tolerance)
+
+    def test_same_cell_hits(self):
+        # every target of a cell is within tolerance of the solution cached for its center
+        rng = np.random.default_rng(445)
+        center = np.round(np.array([0.04, 0.06, 0.09]) / self.solver._cell) * self.solver._cell
+        for offset in rng.uniform(-0.5, 0.5, (20, 3)) * self.solver._cell:
+            solution = self.solver.inverse_solve(center + offset, [0, 0, 0])
+            self.assertLessEqual(np.linalg.norm(self.solver.forward_solve(solution)[0] - center - offset),
+                                 self.solver.tolerance)
+        self.assertEqual((self.solver.hits, self.solver.misses, self.solver.rejected), (19, 1, 0))
+
+    def test_options_keyed(self):
+        target, rpy = [0.04, 0.06, 0.09], [0.0, 0.0, 0.0]
+        self.solver.inverse_solve(target, rpy)
+        self.solver.inverse_solve(target, rpy, initial_angles=np.zeros(6))
+        self.assertEqual((self.solver.hits, self.solver.misses), (1, 1))
+        # a position-only solution is not returned for a request that asks for the orientation
+        self.solver.inverse_solve(target, rpy, orientation=True)
+        self.assertEqual((self.solver.hits, self.solver.misses), (1, 2))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ik_cache.json')
+            self.solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0])
+            self.solver.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0], approach=[0.1, 0.2])
+            self.solver.save(path)
+            restored = CachedSolver(self.chain, NativeSolver(self.chain), cache_path=path)
+            restored.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0])
+            restored.inverse_solve([0.04, 0.06, 0.09], [0, 0, 0], approach=[0.1, 0.2])
+            self.assertEqual((restored.hits, restored.misses), (2, 0))
+
+
+class Solver_Registry(unittest.TestCase):
+    """Unit testing class for the solver registry and factory
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+
+    def test_create_solver(self):
+        self.assertIsInstance(create_solver('native', self.chain), NativeSolver)
+        self.assertIsInstance(create_solver(AnalyticSolver, self.chain), AnalyticSolver)
+        self.assertIsInstance(create_solver('arm_controller.solvers.native_solver:NativeSolver', self.chain),
+                              NativeSolver)
+        solver = NativeSolver(self.chain)
+        self.assertIs(create_solver(solver, self.chain), solver)
+        self.assertIs(solver_class('ikpy'), IKPySolver)
+        with self.assertRaises(ValueError):
+            create_solver('unknown', self.chain)
+
+    def test_register_solver(self):
+        register_solver('custom', 'arm_controller.solvers.native_solver:NativeSolver')
+        try:
+            self.assertIn('custom', solver_names())
+            arm = MechatronicsArm(backend=SimulatedBackend(), solver='custom')
+            self.assertIsInstance(arm._solver, NativeSolver)
+        finally:
+            _solvers.pop('custom')
+
+    def test_lazy_import(self):
+        # the arm and the solvers it does not use must not import the kinematics libraries or matplotlib
+        code = ('import sys\n'
+                'from arm_controller.arms.mechatronics_arm import MechatronicsArm\n'
+                'from arm_controller.arms.plotter_arm import PlotterArm\n'
+                'from arm_controller.servos.simulated_backend import SimulatedBackend\n'
+                'arm = MechatronicsArm(backend=SimulatedBackend(), solver="analytic")\n'
+                'print(" ".join(m for m in ("ikpy", "scipy.optimize", "matplotlib") if m in sys.modules))\n'
+                # the default IKPy solver only imports ikpy for its first solve
+                'arm = MechatronicsArm(backend=SimulatedBackend())\n'
+                'print(" ".join(m for m in ("ikpy", "scipy.optimize", "matplotlib") if m in sys.modules))\n'
+                'arm.move_to(0.04, 0.06, 0.09)\n'
+                'print("ikpy" in sys.modules)\n')
+        env = {key: value for key, value in os.environ.items() if key != 'ARM_CONTROLLER_SOLVER'}
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.join(os.path.dirname(__file__), '..'), env=env)
+        self.assertEqual(result.stdout.split('\n'), ['', '', 'True', ''])
+
+
+class Solver_Benchmark(unittest.TestCase):
+    """Unit testing class for the solver benchmark
+    """
+    def test_sample_poses(self):
+        chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        angles, coords, rpy = sample_poses(chain, 10, seed=3)
+        np.testing.assert_array_equal(angles, sample_poses(chain, 10, seed=3)[0])
+        self.assertTrue(np.all((angles >= chain.model.lower) & (angles <= chain.model.upper)))
+        np.testing.assert_allclose(coords, NativeSolver(chain).forward_solve_batch(angles)[0])
+
+    def test_run_benchmarks(self):
+        ex_urdf = os.path.join(os.path.dirname(MECHATRONICS_URDF), 'ex.urdf')
+        results = run_benchmarks([MECHATRONICS_URDF, ex_urdf], ['native', 'pykdl'], samples=5)
+        self.assertEqual([(entry['urdf'], entry['backend']) for entry in results['results']],
+                         [('mechatronics_arm.urdf', 'native'), ('mechatronics_arm.urdf', 'pykdl'),
+                          ('ex.urdf', 'native'), ('ex.urdf', 'pykdl')])
+        native = results['results'][0]
+        self.assertEqual(native['status'], 'ok')
+        self.assertEqual(native['fk']['position_error']['max'], 0.0)
+        self.assertGreater(native['ik']['convergence_rate'], 0.5)
+        self.assertGreater(native['ik']['latency']['p99_us'], 0.0)
+        try:
+            import PyKDL
+        except ImportError:
+            self.assertEqual(results['results'][1]['status'], 'skipped')
+
+        ikpy = run_benchmarks([MECHATRONICS_URDF], ['ikpy'], samples=5)['results'][0]
+        self.assertLess(ikpy['fk']['position_error']['max'], 1e-9)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.json')
+            write_results(results, path)
+            with open(path) as fh:
+                self.assertEqual(json.load(fh)['meta']['samples'], 5)
+
+
+class Workspace_Index(unittest.TestCase):
+    """Unit testing class for workspace_index class methods
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.solver = NativeSolver(self.chain)
+        self.workspace = WorkspaceIndex.build(self.chain, self.solver, samples=20_000, voxel_size=0.01)
+
+    def test_is_reachable(self):
+        self.assertTrue(self.workspace.is_reachable(self.workspace.positions[0]))
+        self.assertFalse(self.workspace.is_reachable([1.0, 1.0, 1.0]))
+
+    def test_nearest_seed(self):
+        seed = self.workspace.nearest_seed([0.04, 0.06, 0.09])
+        xyz, _ = self.solver.forward_solve(seed)
+        self.assertLess(np.linalg.norm(xyz - [0.04, 0.06, 0.09]), 0.01)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'workspace.npz')
+            self.workspace.save(path)
+            restored = WorkspaceIndex.load(path)
+            self.assertEqual(restored.urdf_id, self.workspace.urdf_id)
+            np.testing.assert_allclose(restored.angles, self.workspace.angles)
+
+
+class Collision_Checker(unittest.TestCase):
+    """Unit testing class for collision_checker class methods
+    """
+    def setUp(self):
+        self.chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        self.checker = CollisionChecker(self.chain)
+        self.default = [0.0 if value is None else value for value in self.chain.get_default_values()]
+
+    def test_primitives(self):
+        eye = np.tile(np.eye(3), (4, 1, 1))
+        turned = np.array([[math.cos(math.pi / 4), -math.sin(math.pi / 4), 0],
+                           [math.sin(math.pi / 4), math.cos(math.pi / 4), 0],
+                           [0, 0, 1]])
+        rb = np.array([np.eye(3), np.eye(3), turned, turned])
+        cb = np.array([[1.9, 0, 0], [2.1, 0, 0], [2.3, 0, 0], [2.5, 0, 0]])
+        halves = np.ones((4, 3))
+        np.testing.assert_array_equal(_obb_overlap(np.zeros((4, 3)), eye, halves, cb, rb, halves),
+                                      [True, False, True, False])
+        # the sphere reaches the corner of the box only when it is closer than its radius
+        centers = np.array([[1.5, 1.5, 0], [1.3, 1.3, 0]])
+        np.testing.assert_array_equal(_sphere_obb_overlap(centers, np.full(2, 0.6), np.zeros((2, 3)),
+                                                          eye[:2], halves[:2]), [False, True])
+
+    def test_self_collision(self):
+        self.assertFalse(self.checker.in_collision(self.default))
+        folded = [0.01, 0.46, 0.82, 1.53, 0.58, 0.0]
+        self.assertIn(('base_waist_link', 'shoulder_elbow_link'), self.checker.collisions(folded))
+        np.testing.assert_array_equal(self.checker.in_collision(np.array([self.default, folded])), [False, True])
+        index, pairs = self.checker.first_collision(np.array([self.default, self.default, folded]))
+        self.assertEqual(index, 2)
+        self.assertTrue(pairs)
+
+    def test_obstacles(self):
+        claw = NativeSolver(self.chain).forward_solve(self.default)[0]
+        self.checker.add_sphere('ball', 0.01, xyz=claw)
+        self.assertIn(('ball', 'claw_end_link'), self.checker.collisions(self.default))
+        self.checker.remove_obstacle('ball')
+        self.assertFalse(self.checker.in_collision(self.default))
+
+        self.chain.joints.current[:] = self.default
+        trajectory = LinearTrajectory(self.default[:1], [self.default[0] + 1.0], 2.0)
+        self.checker.add_box('post', [0.02, 0.02, 0.4], xyz=NativeSolver(self.chain).forward_solve(
+            [self.default[0] + 0.5] + self.default[1:])[0])
+        when, pairs = self.checker.check_trajectory(trajectory, ['waist'])
+        self.assertGreater(when, 0.0)
+        self.assertLess(when, 1.0)
+        self.assertTrue(all('post' in pair for pair in pairs))
+
+    def test_arm_rejects_collision(self):
+        arm = MechatronicsArm(backend=SimulatedBackend())
+        arm.set_speed(90)
+        arm.collision = CollisionChecker(arm.chain)
+        target = arm._solver.forward_solve([arm.chain.joints['waist']['current_value'] + 0.6] +
+                                           arm.chain.get_current_values()[1:])[0]
+        arm.collision.add_sphere('ball', 0.02, xyz=target)
+        before = arm.chain.get_current_values()
+        with self.assertRaises(ValueError):
+            arm.set_joint('waist', math.degrees(before[0]) + 60)
+        self.assertEqual(arm.chain.get_current_values(), before)
+
+
+class Instrumentation(unittest.TestCase):
+    """Unit testing class for the instrumentation spans, counters and exporters
+    """
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        with instrumentation.span('outer') as span:
+            instrumentation.count('calls')
+            instrumentation.observe('value', 1.0)
+        self.assertIsNone(instrumentation.current())
+        self.assertEqual(instrumentation.snapshot(), {'counters': {}, 'histograms': {}, 'recent': []})
+        self.assertIs(span, instrumentation.span('other'))
+
+    def test_breakdown(self):
+        instrumentation.enable()
+        with instrumentation.span('move') as move:
+            with instrumentation.span('solve'):
+                sleep(0.002)
+            for _ in range(3):
+                with instrumentation.span('write'):
+                    with instrumentation.span('servo'):
+                        sleep(0.001)
+        record = instrumentation.recent()[-1]
+        self.assertEqual(record['name'], 'move')
+        self.assertEqual(set(record['breakdown']), {'move', 'solve', 'write', 'servo'})
+        self.assertAlmostEqual(sum(record['breakdown'].values()), move.duration)
+        self.assertGreaterEqual(record['breakdown']['servo'], 0.003)
+        self.assertEqual(instrumentation.snapshot()['histograms']['servo']['count'], 3)
+
+        with self.assertRaises(ValueError):
+            with instrumentation.span('move'):
+                raise ValueError()
+        self.assertEqual(instrumentation.snapshot()['counters'], {'move.errors': 1})
+        self.assertTrue(instrumentation.recent()[-1]['error'])
+
+    def test_exporters(self):
+        instrumentation.enable()
+        instrumentation.count('executor.missed_deadlines', 2)
+        instrumentation.observe('solver.inverse_solve', 0.003)
+        text = instrumentation.prometheus_text()
+        self.assertIn('arm_controller_executor_missed_deadlines_total 2', text)
+        self.assertIn('arm_controller_solver_inverse_solve_seconds_bucket{le="0.0025"} 0', text)
+        self.assertIn('arm_controller_solver_inverse_solve_seconds_bucket{le="0.005"} 1', text)
+        self.assertIn('arm_controller_solver_inverse_solve_seconds_count 1', text)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metrics.json')
+            instrumentation.write_json(path)
+            with open(path) as fh:
+                self.assertEqual(json.load(fh)['histograms']['solver.inverse_solve']['buckets']['0.005'], 1)
+
+    def test_arm_breakdown(self):
+        arm = MechatronicsArm(backend=SimulatedBackend())
+        instrumentation.enable()
+        arm.move_to(0.04, 0.06, 0.09)
+        record = instrumentation.recent()[-1]
+        self.assertEqual(record['name'], 'arm.move_to')
+        for name in ('solver.inverse_solve', 'arm.set_joints', 'arm.plan', 'executor.write', 'servo.write'):
+            self.assertIn(name, record['breakdown'])
+
+
+class VirtualClock:
+    """Clock and sleep pair that advances virtual time instead of waiting.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Trajectory_Executor(unittest.TestCase):
+    """Unit testing class for trajectory_executor class methods
+    """
+    def setUp(self):
+        self.time = VirtualClock()
+        self.executor = TrajectoryExecutor(rate=100.0, clock=self.time.clock, sleep=self.time.sleep)
+
+    def test_run(self):
+        setpoints = []
+        trajectory = LinearTrajectory([0.0, 0.0], [1.0, -0.5], speed=2.0)
+        stats = self.executor.run(trajectory, setpoints.append)
+        self.assertEqual(len(setpoints), 51)
+        np.testing.assert_allclose(setpoints[-1], [1.0, -0.5])
+        np.testing.assert_allclose(setpoints[25], [0.5, -0.25])
+        self.assertAlmostEqual(stats.duration, 0.5)
+        self.assertEqual(stats.missed_deadlines, 0)
+
+    def test_missed_deadlines(self):
+        def slow_write(setpoint):
+            self.time.now += 0.025
+        stats = self.executor.run(LinearTrajectory([0.0], [1.0], speed=1.0), slow_write)
+        self.assertGreater(stats.missed_deadlines, 0)
+        self.assertLess(stats.ticks, 101)
+
+    def test_run_async_cancel(self):
+        executor = TrajectoryExecutor(rate=100.0)
+        setpoints = []
+
+        async def cancel_midway():
+            task = asyncio.ensure_future(executor.run_async(LinearTrajectory([0.0], [1.0], speed=1.0), setpoints.append))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            written = len(setpoints)
+            await asyncio.sleep(0.05)
+            return written
+
+        loop = asyncio.new_event_loop()
+        try:
+            written = loop.run_until_complete(cancel_midway())
+        finally:
+            loop.close()
+        self.assertEqual(len(setpoints), written)
+        self.assertTrue(0.0 < setpoints[-1][0] < 1.0)
+
+
+class Profiled_Trajectory(unittest.TestCase):
+    """Unit testing class for profiled_trajectory class methods
+    """
+    def check_limits(self, trajectory, velocity, acceleration):
+        dt = 1e-3
+        times = np.arange(0.0, trajectory.duration + dt, dt)
+        samples = np.array([trajectory.sample(t) for t in times])
+        np.testing.assert_allclose(samples[0], trajectory.start)
+        np.testing.assert_allclose(samples[-1], trajectory.end)
+        speeds = np.abs(np.diff(samples, axis=0)) / dt
+        self.assertTrue(np.all(speeds <= np.asarray(velocity) * 1.001))
+        accelerations = np.abs(np.diff(speeds, axis=0)) / dt
+        self.assertTrue(np.all(accelerations <= np.asarray(acceleration) * 1.01))
+
+    def test_trapezoidal(self):
+        trajectory = ProfiledTrajectory([0.0, 1.0], [2.0, 0.5], [0.5, 0.2], [1.0, 1.0])
+        # cruise limited by the first joint: 4 s of cruise travel plus two 0.5 s ramps
+        self.assertAlmostEqual(trajectory.duration, 4.5)
+        self.check_limits(trajectory, [0.5, 0.2], [1.0, 1.0])
+
+    def test_triangular(self):
+        trajectory = ProfiledTrajectory([0.0], [0.1], [0.5], [1.0])
+        self.assertAlmostEqual(trajectory.duration, 2 * math.sqrt(0.1))
+        self.check_limits(trajectory, [0.5], [1.0])
+
+    def test_s_curve(self):
+        trajectory = ProfiledTrajectory([0.0, 1.0], [2.0, 0.5], [0.5, 0.2], [1.0, 1.0], profile='s_curve')
+        self.assertAlmostEqual(trajectory.duration, 5.0)
+        self.check_limits(trajectory, [0.5, 0.2], [1.0, 1.0])
+
+
+class Waypoint_Trajectory(unittest.TestCase):
+    """Unit testing class for waypoint_trajectory class methods
+    """
+    def test_sample(self):
+        waypoints = np.array([[0.0, 0.0], [0.1, 0.05], [0.3, 0.1], [0.4, 0.1]])
+        trajectory = plan_waypoint_trajectory(waypoints, [1.0, 1.0], [10.0, 10.0])
+        np.testing.assert_allclose(trajectory.sample(0.0), waypoints[0])
+        np.testing.assert_allclose(trajectory.sample(trajectory.duration), waypoints[-1])
+        # samples stay on the polyline through the waypoints
+        for t in np.linspace(0.0, trajectory.duration, 50):
+            value = trajectory.sample(t)
+            self.assertAlmostEqual(value[1], np.interp(value[0], waypoints[:, 0], waypoints[:, 1]))
+
+    def test_max_rate(self):
+        waypoints = np.linspace([0.0], [1.0], 11)
+        fast = plan_waypoint_trajectory(waypoints, [1.0], [100.0], 'linear')
+        slow = plan_waypoint_trajectory(waypoints, [1.0], [100.0], 'linear', max_rate=5.0)
+        self.assertAlmostEqual(fast.duration, 1.0)
+        self.assertAlmostEqual(slow.duration, 2.0)
+
+
+class Blended_Trajectory(unittest.TestCase):
+    """Unit testing class for blended_trajectory class methods
+    """
+    def setUp(self):
+        self.points = np.array([[0.0, 0.0, 0.0], [1.0, 0.5, 0.0], [1.2, 1.0, 0.3], [0.0, 0.0, 0.0]])
+        self.velocity = [1.0, 1.0, 0.5]
+        self.acceleration = [2.0, 2.0, 2.0]
+
+    def test_limits(self):
+        trajectory = BlendedTrajectory(self.points, self.velocity, self.acceleration, [0.5, 0.5])
+        dt = 1e-3
+        samples = np.array([trajectory.sample(t) for t in np.arange(0.0, trajectory.duration + dt, dt)])
+        np.testing.assert_allclose(samples[0], self.points[0])
+        np.testing.assert_allclose(samples[-1], self.points[-1])
+        speeds = np.abs(np.diff(samples, axis=0)) / dt
+        self.assertTrue(np.all(speeds <= np.asarray(self.velocity) * 1.001))
+        accelerations = np.abs(np.diff(speeds, axis=0)) / dt
+        self.assertTrue(np.all(accelerations <= np.asarray(self.acceleration) * 1.01))
+        # the arm keeps moving while it passes the via points
+        for via in self.points[1:-1]:
+            closest = np.argmin(np.linalg.norm(samples[:-1] - via, axis=1))
+            self.assertGreater(np.max(speeds[closest]), 0.1)
+
+    def test_faster_than_stopping(self):
+        trajectory = BlendedTrajectory(self.points, self.velocity, self.acceleration)
+        stopping = sum(ProfiledTrajectory(start, end, self.velocity, self.acceleration).duration
+                       for start, end in zip(self.points[:-1], self.points[1:]))
+        self.assertLess(trajectory.duration, stopping)
+
+    def test_blend_fractions(self):
+        sharp = BlendedTrajectory(self.points[:3], [1.0] * 3, [100.0] * 3, [0.0])
+        round = BlendedTrajectory(self.points[:3], [1.0] * 3, [100.0] * 3, [1.0])
+        dt = 1e-3
+        def deviation(trajectory):
+            samples = np.array([trajectory.sample(t) for t in np.arange(0.0, trajectory.duration + dt, dt)])
+            return np.min(np.linalg.norm(samples - self.points[1], axis=1))
+        self.assertLess(deviation(sharp), deviation(round))
+
+
+class Batched_Servo_Writer(unittest.TestCase):
+    """Unit testing class for pca9685 class methods
+    """
+    def setUp(self):
+        self.device = FakePCA9685()
+        self.writer = BatchedServoWriter(self.device, frequency=50.0)
+
+    def test_auto_increment(self):
+        self.assertTrue(self.device.registers[0x00] & 0x20)
+
+    def test_flush(self):
+        angles = [90.0, 150.0, 35.0, 140.0, 85.0]
+        before = self.device.transactions
+        for channel, angle in enumerate(angles):
+            self.writer.set_angle(channel, angle)
+        self.assertEqual(self.device.transactions, before)
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(self.device.transactions, before + 1)
+        self.assertEqual(self.writer.flush(), 0)
+        # same register values as adafruit_motor.servo with the ServoKit defaults (750 - 2250 us, 180 degrees)
+        min_duty = int(750 * 50.0 / 1000000 * 0xFFFF)
+        duty_range = int(2250 * 50.0 / 1000000 * 0xFFFF - min_duty)
+        for channel, angle in enumerate(angles):
+            duty_cycle = min_duty + int(angle / 180 * duty_range)
+            self.assertEqual(self.device.channel_registers(channel), (0, duty_cycle >> 4))
+
+    def test_gaps(self):
+        for channel in range(3):
+            self.writer.set_angle(channel, 90.0)
+        self.writer.flush()
+        middle = self.device.channel_registers(1)
+        # channel 1 keeps its last value when the block 0 - 2 is rewritten
+        self.writer.set_angle(0, 10.0)
+        self.writer.set_angle(2, 20.0)
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(self.device.channel_registers(1), middle)
+        # channels never written are not touched, the block is split around them
+        self.writer.set_angle(2, 30.0)
+        self.writer.set_angle(6, 30.0)
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(self.device.channel_registers(4), (0, 0))
+
+    def test_out_of_range(self):
+        with self.assertRaises(ValueError):
+            self.writer.set_angle(0, 181.0)
+        with self.assertRaises(ValueError):
+            self.writer.set_angle(16, 90.0)
+
+
+def read_shared_state(name, joints, queue):
+    state = SharedJointState(joints, name=name)
+    seq, values = state.read()
+    queue.put((seq, values.tolist(), state.exit_requested))
+    state.close()
+
+
+class Shared_Joint_State(unittest.TestCase):
+    """Unit testing class for shared_joint_state class methods
+    """
+    def setUp(self):
+        self.state = SharedJointState(['waist', 'shoulder', 'claw'], slots=4)
+
+    def tearDown(self):
+        self.state.close()
+
+    def test_write_read(self):
+        self.assertEqual(self.state.read()[0], 0)
+        for i in range(10):
+            self.state.write([0.1 * i, 0.2 * i, None])
+        seq, values = self.state.read()
+        self.assertEqual(seq, 10)
+        np.testing.assert_allclose(values[:2], [0.9, 1.8])
+        self.assertTrue(math.isnan(values[2]))
+        self.state.fps = 59.5
+        self.assertEqual(SharedJointState(self.state.joints, name=self.state.name).fps, 59.5)
+
+    def test_other_process(self):
+        self.state.write([1.0, 2.0, 3.0])
+        self.state.request_exit()
+        queue = multiprocessing.Queue()
+        proc = multiprocessing.Process(target=read_shared_state, args=(self.state.name, self.state.joints, queue))
+        proc.start()
+        seq, values, exit_requested = queue.get(timeout=10)
+        proc.join()
+        self.assertEqual(seq, 1)
+        self.assertEqual(values, [1.0, 2.0, 3.0])
+        self.assertTrue(exit_requested)
+
+
+class Headless_Renderer(unittest.TestCase):
+    """Unit testing class for headless_renderer functions and the headless PlotterArm
+    """
+    def test_resample(self):
+        angles = np.arange(6, dtype=float).reshape(6, 1)
+        frames = resample([0.0, 0.01, 0.02, 0.5, 0.51, 1.0], angles, fps=4)
+        np.testing.assert_allclose(frames[:, 0], [0, 2, 3, 4, 5])
+
+    def test_render_frames(self):
+        chain = PyChain(urdf_file_path=MECHATRONICS_URDF)
+        angles = np.tile(np.array(chain.get_default_values(), dtype=float), (4, 1))
+        angles[2:, 0] += 0.5
+        with tempfile.TemporaryDirectory() as directory:
+            paths = render_frames(IKPySolver(chain), angles, directory, workers=2, dpi=40)
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             [f'frame_{i:06d}.png' for i in range(4)])
+            frames = [np.asarray(Image.open(path)) for path in paths]
+        self.assertTrue(np.array_equal(frames[0], frames[1]))
+        self.assertFalse(np.array_equal(frames[1], frames[2]))
 
-        arm.close_claw()
-        test_val = arm.chain.joints['claw']
-        self.assertEqual(test_val, {'current_value': 30})
+    def test_headless_arm(self):
+        arm = PlotterArm(headless=True)
+        self.assertIsNone(arm.proc)
+        arm.set_joint('waist', 120)
+        duration = arm.recording[-1][0] - arm.recording[0][0]
+        self.assertGreater(duration, 1.0)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = arm.render(directory, fps=10, dpi=30)
+            self.assertEqual(len(paths), int(duration * 10) + 1)
+            gif = arm.render(os.path.join(directory, 'arm.gif'), fps=10, dpi=30)
+            self.assertEqual(Image.open(gif).n_frames, len(paths))
+        arm.exit()
 
 
 if __name__ == '__main__':